@@ -6,6 +6,9 @@ class Settings(BaseSettings):
     serp_api_key: str
     groq_api_key: str
     database_url: str
+    serp_base_url: str = "https://serpapi.com"
+    groq_base_url: str = "https://api.groq.com/openai/v1"
+    peekaboo_landing_url: str = ""  # e.g. a local stand-in (python -m standin); default https://{peekaboo_base}
     faiss_index_path: str = "./data/faiss.index"
     faiss_metadata_path: str = "./data/faiss_meta.json"
     skip_bootstrap: bool = False  # skip scrape+RAG on startup (e.g. PythonAnywhere)
@@ -35,6 +38,43 @@ class Settings(BaseSettings):
         return v
     scrape_interval_hours: int = 12
     log_level: str = "INFO"
+    scrape_bank_concurrency: int = 6  # banks scraped at once in run_full_scrape
+    scrape_host_concurrency: int = 4  # banks scraped at once per host (e.g. peekaboo.guru)
+    peekaboo_city_concurrency: int = 5  # Peekaboo city shards fetched at once per bank
+    peekaboo_requests_per_second: float = 10.0  # per Peekaboo host, shared by all banks (0 = no cap)
+    scrape_host_requests_per_second: float = 5.0  # ceiling per other host: bank pages, SERP (0 = no cap)
+    scrape_host_min_requests_per_second: float = 0.2  # floor the adaptive rate backs off to
+    scrape_host_backoff_factor: float = 0.5  # rate multiplier on a 429, 5xx or timeout
+    scrape_host_recovery_step: float = 0.25  # requests/s added back per successful request
+    scrape_breaker_failures: int = 5  # consecutive failures that open a host's circuit
+    scrape_breaker_cooldown_seconds: float = 60  # how long an open circuit skips the host
+    peekaboo_config_ttl_hours: float = 24  # cached SDK config per Peekaboo host (needs the fetch cache)
+    http_max_connections: int = 100  # shared httpx pool size per client
+    http_max_keepalive_connections: int = 40
+    http_max_connections_per_host: int = 10
+    http_keepalive_expiry_seconds: float = 30.0
+    http2: bool = False  # needs the optional h2 package (pip install httpx[http2])
+    fetch_cache_enabled: bool = True  # conditional requests + parsed page cache for bank pages/PDFs
+    fetch_cache_path: str = "./data/fetch_cache.sqlite3"
+    fetch_cache_max_mb: float = 200.0
+    scrape_deadline_minutes: float = 0  # stop and checkpoint a run after this long (0 = no deadline)
+    scrape_commit_margin_seconds: float = 120  # reserved before the deadline to sync and checkpoint
+    scrape_resume_max_age_hours: float = 48  # older unfinished runs are abandoned, not resumed
+    scrape_write_batch_size: int = 1000  # deals per DB write while a bank is still scraping
+    scrape_queue_batches: int = 8  # write batches buffered between scrapers and the DB writer
+    scrape_worker_embedded: bool = True  # API starts the scrape worker as a child process (false = run app.tasks.worker yourself)
+    scrape_worker_poll_seconds: float = 5.0  # how often the worker checks for queued jobs and cancellation
+    groq_batch_size: int = 20  # garbled deal texts per Groq request
+    groq_concurrency: int = 3  # Groq batch requests in flight per bank
+    groq_requests_per_minute: float = 30.0  # shared by all banks (0 = no cap)
+    groq_cache_enabled: bool = True  # memoize Groq cleanup by raw-text hash
+    groq_cache_path: str = "./data/groq_cache.sqlite3"
+    event_listener_enabled: bool = True  # API workers LISTEN for cache/index events from other processes
+    data_generation_poll_seconds: float = 30.0  # how stale an API worker's view of the data generation may get without the listener
+    response_cache_max_mb: float = 64.0  # in-process cache of read endpoint responses (0 = off)
+    response_cache_ttl_seconds: float = 3600.0  # upper bound on a cached response's age, whatever the generation
+    discount_count_cache_entries: int = 1024  # GET /discounts totals kept per filter combination until the next refresh (0 = off)
+    parse_workers: int = 2  # processes for HTML/PDF parsing during scrapes (0 = parse on the event loop)
 
     class Config:
         env_file = ".env"
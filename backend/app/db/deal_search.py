@@ -0,0 +1,139 @@
+"""deal_search: one flattened, indexed row per discount for the read paths.
+
+A materialized view over discounts, merchants, cards and banks (created and
+indexed by app/db/migrations.py). GET /discounts, the filter endpoints, the
+analytics endpoints, the AI assistant and the RAG index read it instead of
+repeating the four-way join. It is refreshed, without blocking readers, after
+run_full_scrape and whenever expired deals are deleted; until then readers see
+the previous complete scrape. Each refresh, and each scrape that changed no
+deals, bumps data_generation in the same transaction, so anything cached from
+the read paths can key on the generation (see known_generation).
+
+Declared on its own MetaData so create_all leaves it to the migrations. A
+migration that changes a column the view selects must drop and recreate it.
+"""
+
+import logging
+import time
+
+from sqlalchemy import (
+    Column,
+    Date,
+    Float,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    func,
+    select,
+    text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.events import GENERATION_BUMPED, publish
+from app.db.models import DataGeneration
+
+logger = logging.getLogger(__name__)
+
+view_metadata = MetaData()
+
+deal_search = Table(
+    "deal_search",
+    view_metadata,
+    Column("discount_id", Integer, primary_key=True),
+    Column("discount_percent", Float, nullable=False),
+    Column("conditions", Text),
+    Column("valid_from", Date),
+    Column("valid_to", Date),
+    Column("search_vector", TSVECTOR),
+    Column("merchant_id", Integer, nullable=False),
+    Column("merchant", Text, nullable=False),
+    Column("city", String(120), nullable=False),
+    Column("category", String(150), nullable=False),
+    Column("merchant_image_url", Text),
+    # Merchant's deal count over the busiest merchant's (0-1], as the assistant ranks it.
+    Column("merchant_popularity", Float, nullable=False),
+    # Recommender score inputs in [0, 1] (app/services/recommender.py).
+    Column("discount_factor", Float, nullable=False),
+    Column("card_accessibility", Float, nullable=False),
+    Column("card_id", Integer, nullable=False),
+    Column("card_name", String(255), nullable=False),
+    Column("card_type", String(50), nullable=False),
+    Column("card_tier", String(100)),
+    Column("bank_id", Integer, nullable=False),
+    Column("bank", String(255), nullable=False),
+)
+
+
+# The generation as this process last read, set or was notified of.
+_known_generation: int | None = None
+_generation_checked_at = 0.0
+_generation_pushed = False
+
+
+async def current_generation(session: AsyncSession) -> int:
+    generation = (
+        await session.execute(select(DataGeneration.generation).where(DataGeneration.id == 1))
+    ).scalar_one_or_none()
+    return generation or 0
+
+
+def note_generation(generation: int) -> None:
+    """Record a generation this process learned of (never moves backwards)."""
+    global _known_generation, _generation_checked_at
+    if _known_generation is None or generation > _known_generation:
+        _known_generation = generation
+    _generation_checked_at = time.monotonic()
+
+
+def set_generation_pushed(pushed: bool) -> None:
+    """True while this process LISTENs for generation events
+    (app/services/event_listener.py); known_generation then stops re-reading."""
+    global _generation_pushed
+    _generation_pushed = pushed
+
+
+async def known_generation(session: AsyncSession) -> int:
+    """The data generation without a query per call. Another process's bump
+    arrives by notification, or without a listener, is re-read at most every
+    DATA_GENERATION_POLL_SECONDS."""
+    if _known_generation is None or (
+        not _generation_pushed
+        and time.monotonic() - _generation_checked_at >= settings.data_generation_poll_seconds
+    ):
+        note_generation(await current_generation(session))
+    return _known_generation
+
+
+async def bump_generation(session: AsyncSession) -> int:
+    """Increment data_generation in the session's transaction (not committed)
+    and notify other processes on commit; returns the new generation."""
+    stmt = pg_insert(DataGeneration).values(id=1, generation=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DataGeneration.id],
+        set_={"generation": DataGeneration.generation + 1, "updated_at": func.now()},
+    ).returning(DataGeneration.generation)
+    generation = (await session.execute(stmt)).scalar_one()
+    await publish(session, GENERATION_BUMPED, generation=generation)
+    return generation
+
+
+async def refresh_deal_search(session: AsyncSession) -> int:
+    """Rebuild deal_search from the base tables, bump the data generation and
+    commit; returns the new generation. CONCURRENTLY keeps the view readable
+    meanwhile (needs its unique index on discount_id)."""
+    started = time.perf_counter()
+    await session.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY deal_search"))
+    generation = await bump_generation(session)
+    await session.commit()
+    note_generation(generation)
+    logger.info(
+        "Refreshed deal_search in %.0f ms (generation %d)",
+        (time.perf_counter() - started) * 1000,
+        generation,
+    )
+    return generation
@@ -0,0 +1,34 @@
+"""Cross-process events over Postgres NOTIFY.
+
+The scrape worker changes data and the FAISS index that every API worker
+caches. It announces each change on one channel: the data generation was
+bumped, the index was rebuilt, a scrape started or finished. Every API worker
+LISTENs (app/services/event_listener.py) and drops or reloads what it holds.
+
+publish() notifies inside the caller's transaction, so listeners only hear of
+a change once it is committed, and not at all if it is rolled back.
+"""
+
+import json
+import os
+import socket
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+CHANNEL = "pb_events"
+
+GENERATION_BUMPED = "generation_bumped"
+INDEX_REBUILT = "index_rebuilt"
+SCRAPE_STARTED = "scrape_started"
+SCRAPE_FINISHED = "scrape_finished"
+
+_ORIGIN = f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def publish(session: AsyncSession, event: str, **data) -> None:
+    """Queue event (with small JSON-serializable data) for the session's commit."""
+    payload = json.dumps({"event": event, "origin": _ORIGIN, **data})
+    await session.execute(
+        text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload}
+    )
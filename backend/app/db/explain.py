@@ -0,0 +1,36 @@
+"""EXPLAIN for SQLAlchemy statements, used for planner row estimates and by
+scripts/explain_queries.py to check index usage."""
+
+import json
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of stmt; nothing is executed."""
+
+    inherit_cache = False
+
+    def __init__(self, stmt) -> None:
+        self.stmt = stmt
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    # Bound parameters stay bound, so statements keep their types (e.g. regconfig).
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.stmt, **kw)
+
+
+async def explain_plan(conn, stmt) -> dict:
+    """Top plan node of stmt. conn is an AsyncConnection or AsyncSession."""
+    plan = (await conn.execute(Explain(stmt))).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+async def estimate_rows(conn, stmt) -> int:
+    """The planner's row estimate for stmt: instant, but only as good as the
+    table statistics (off by a factor for rare or combined filters)."""
+    return int((await explain_plan(conn, stmt))["Plan Rows"])
@@ -1,19 +1,18 @@
 import logging
 
+from app.db.migrations import run_migrations
 from app.db.models import Base
 from app.db.session import engine
 
 logger = logging.getLogger(__name__)
 
+# API workers and the scrape worker start together; one of them migrates at a time.
+INIT_LOCK_KEY = 0x5CA9D
+
 
 async def init_db() -> None:
     async with engine.begin() as conn:
+        await conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({INIT_LOCK_KEY})")
         await conn.run_sync(Base.metadata.create_all)
-        # Ensure merchant name can store long scraped text.
-        await conn.exec_driver_sql(
-            "ALTER TABLE IF EXISTS merchants ALTER COLUMN name TYPE TEXT;"
-        )
-        await conn.exec_driver_sql(
-            "ALTER TABLE IF EXISTS merchants ADD COLUMN IF NOT EXISTS image_url TEXT;"
-        )
+        await run_migrations(conn)
     logger.info("Database initialized")
@@ -0,0 +1,369 @@
+"""Versioned schema changes applied by init_db after create_all.
+
+create_all only creates missing tables, so changes to existing tables (new
+columns, indexes, extensions) are listed here in order. Each runs once per
+database and is recorded in schema_migrations. Statements stay idempotent
+(IF NOT EXISTS) because databases set up before this table existed already
+have some of them.
+
+A migration whose requirement is missing (e.g. pg_trgm not installable on
+this server) is skipped without being recorded, and retried on the next start.
+It runs in a savepoint, so one that still fails (e.g. CREATE EXTENSION without
+the privilege) is skipped the same way instead of aborting init_db.
+"""
+
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    statements: tuple[str, ...]
+    # Returns False to skip (and retry later) when the server lacks something.
+    precondition: Callable[[AsyncConnection], Awaitable[bool]] | None = None
+    # Recorded without running when still pending once this later version is
+    # applied, because later migrations drop what it creates.
+    superseded_by: int | None = None
+
+
+async def _pg_trgm_available(conn: AsyncConnection) -> bool:
+    result = await conn.exec_driver_sql(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+    )
+    return result.scalar() is not None
+
+
+_DEAL_SEARCH_INDEXES = (
+    # Unique index: required by REFRESH ... CONCURRENTLY.
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_deal_search_discount_id "
+    "ON deal_search (discount_id)",
+    "CREATE INDEX IF NOT EXISTS ix_deal_search_lower_bank ON deal_search (lower(bank))",
+    "CREATE INDEX IF NOT EXISTS ix_deal_search_lower_category "
+    "ON deal_search (lower(category))",
+    "CREATE INDEX IF NOT EXISTS ix_deal_search_lower_city ON deal_search (lower(city))",
+    "CREATE INDEX IF NOT EXISTS ix_deal_search_card_name ON deal_search (card_name)",
+    "CREATE INDEX IF NOT EXISTS ix_deal_search_valid_to ON deal_search (valid_to)",
+    "CREATE INDEX IF NOT EXISTS ix_deal_search_search_vector "
+    "ON deal_search USING gin (search_vector)",
+)
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(
+        1,
+        "columns added before versioned migrations",
+        (
+            # Ensure merchant name can store long scraped text.
+            "ALTER TABLE merchants ALTER COLUMN name TYPE TEXT",
+            "ALTER TABLE merchants ADD COLUMN IF NOT EXISTS image_url TEXT",
+            "ALTER TABLE scrape_runs ADD COLUMN IF NOT EXISTS wall_ms FLOAT, "
+            "ADD COLUMN IF NOT EXISTS loop_lag_max_ms FLOAT",
+            # Filled in by the scraper's DealWriter for rows that predate the column.
+            "ALTER TABLE discounts ADD COLUMN IF NOT EXISTS fingerprint VARCHAR(32)",
+            "CREATE INDEX IF NOT EXISTS ix_discounts_fingerprint ON discounts (fingerprint)",
+        ),
+    ),
+    Migration(
+        2,
+        "foreign key, expiry and lower() filter indexes",
+        (
+            # discounts.merchant_id leads uq_discount_unique, which already serves it.
+            "CREATE INDEX IF NOT EXISTS ix_discounts_card_id ON discounts (card_id)",
+            "CREATE INDEX IF NOT EXISTS ix_discounts_valid_to ON discounts (valid_to)",
+            "CREATE INDEX IF NOT EXISTS ix_cards_bank_id ON cards (bank_id)",
+            "CREATE INDEX IF NOT EXISTS ix_banks_lower_name ON banks (lower(name))",
+            "CREATE INDEX IF NOT EXISTS ix_cards_lower_type ON cards (lower(type))",
+            "CREATE INDEX IF NOT EXISTS ix_merchants_lower_category "
+            "ON merchants (lower(category))",
+        ),
+    ),
+    Migration(
+        3,
+        "pg_trgm indexes for ILIKE '%term%' filters",
+        (
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            "CREATE INDEX IF NOT EXISTS ix_merchants_name_trgm "
+            "ON merchants USING gin (name gin_trgm_ops)",
+            "CREATE INDEX IF NOT EXISTS ix_merchants_category_trgm "
+            "ON merchants USING gin (category gin_trgm_ops)",
+            "CREATE INDEX IF NOT EXISTS ix_merchants_city_trgm "
+            "ON merchants USING gin (city gin_trgm_ops)",
+            "CREATE INDEX IF NOT EXISTS ix_cards_name_trgm ON cards USING gin (name gin_trgm_ops)",
+            "CREATE INDEX IF NOT EXISTS ix_discounts_conditions_trgm "
+            "ON discounts USING gin (conditions gin_trgm_ops)",
+        ),
+        precondition=_pg_trgm_available,
+        # 4 drops three of these; 6 (same requirement, so it runs along) the rest.
+        superseded_by=4,
+    ),
+    Migration(
+        4,
+        "weighted full-text search vector on discounts",
+        (
+            "ALTER TABLE discounts ADD COLUMN IF NOT EXISTS search_vector tsvector",
+            # Merchant name > category and city > card name > conditions. 'simple'
+            # (no stemming): names are proper nouns; queries match by prefix instead.
+            """
+            CREATE OR REPLACE FUNCTION discount_search_vector(
+                p_merchant_id integer, p_card_id integer, p_conditions text
+            ) RETURNS tsvector LANGUAGE sql STABLE AS $$
+                SELECT setweight(to_tsvector('simple', coalesce(m.name, '')), 'A')
+                    || setweight(to_tsvector('simple', coalesce(m.category, '') || ' '
+                                                       || coalesce(m.city, '')), 'B')
+                    || setweight(to_tsvector('simple', coalesce(c.name, '')), 'C')
+                    || setweight(to_tsvector('simple', coalesce(p_conditions, '')), 'D')
+                FROM merchants m, cards c
+                WHERE m.id = p_merchant_id AND c.id = p_card_id
+            $$
+            """,
+            """
+            CREATE OR REPLACE FUNCTION discounts_search_vector_trigger() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                NEW.search_vector := discount_search_vector(
+                    NEW.merchant_id, NEW.card_id, NEW.conditions
+                );
+                RETURN NEW;
+            END
+            $$
+            """,
+            "DROP TRIGGER IF EXISTS trg_discounts_search_vector ON discounts",
+            "CREATE TRIGGER trg_discounts_search_vector "
+            "BEFORE INSERT OR UPDATE OF merchant_id, card_id, conditions ON discounts "
+            "FOR EACH ROW EXECUTE FUNCTION discounts_search_vector_trigger()",
+            # Renamed or recategorized merchants and cards refresh their deals' vectors.
+            """
+            CREATE OR REPLACE FUNCTION merchants_search_vector_trigger() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                UPDATE discounts
+                SET search_vector = discount_search_vector(merchant_id, card_id, conditions)
+                WHERE merchant_id = NEW.id;
+                RETURN NULL;
+            END
+            $$
+            """,
+            "DROP TRIGGER IF EXISTS trg_merchants_search_vector ON merchants",
+            "CREATE TRIGGER trg_merchants_search_vector "
+            "AFTER UPDATE OF name, category, city ON merchants "
+            "FOR EACH ROW EXECUTE FUNCTION merchants_search_vector_trigger()",
+            """
+            CREATE OR REPLACE FUNCTION cards_search_vector_trigger() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                UPDATE discounts
+                SET search_vector = discount_search_vector(merchant_id, card_id, conditions)
+                WHERE card_id = NEW.id;
+                RETURN NULL;
+            END
+            $$
+            """,
+            "DROP TRIGGER IF EXISTS trg_cards_search_vector ON cards",
+            "CREATE TRIGGER trg_cards_search_vector AFTER UPDATE OF name ON cards "
+            "FOR EACH ROW EXECUTE FUNCTION cards_search_vector_trigger()",
+            "UPDATE discounts "
+            "SET search_vector = discount_search_vector(merchant_id, card_id, conditions)",
+            "CREATE INDEX IF NOT EXISTS ix_discounts_search_vector "
+            "ON discounts USING gin (search_vector)",
+            # Keyword search uses search_vector now; these only slowed down writes.
+            "DROP INDEX IF EXISTS ix_merchants_name_trgm",
+            "DROP INDEX IF EXISTS ix_merchants_category_trgm",
+            "DROP INDEX IF EXISTS ix_discounts_conditions_trgm",
+        ),
+    ),
+    Migration(
+        5,
+        "deal_search materialized view",
+        (
+            """
+            CREATE MATERIALIZED VIEW IF NOT EXISTS deal_search AS
+            SELECT
+                joined.*,
+                joined.merchant_deals::float
+                    / max(joined.merchant_deals) OVER () AS merchant_popularity
+            FROM (
+                SELECT
+                    d.id AS discount_id,
+                    d.discount_percent,
+                    d.conditions,
+                    d.valid_from,
+                    d.valid_to,
+                    d.search_vector,
+                    m.id AS merchant_id,
+                    m.name AS merchant,
+                    m.city,
+                    m.category,
+                    m.image_url AS merchant_image_url,
+                    count(*) OVER (PARTITION BY m.id) AS merchant_deals,
+                    c.id AS card_id,
+                    c.name AS card_name,
+                    c.type AS card_type,
+                    c.tier AS card_tier,
+                    b.id AS bank_id,
+                    b.name AS bank
+                FROM discounts d
+                JOIN merchants m ON m.id = d.merchant_id
+                JOIN cards c ON c.id = d.card_id
+                JOIN banks b ON b.id = c.bank_id
+            ) AS joined
+            """,
+        )
+        + _DEAL_SEARCH_INDEXES,
+    ),
+    Migration(
+        6,
+        "pg_trgm indexes on deal_search",
+        (
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            "CREATE INDEX IF NOT EXISTS ix_deal_search_city_trgm "
+            "ON deal_search USING gin (city gin_trgm_ops)",
+            "CREATE INDEX IF NOT EXISTS ix_deal_search_card_name_trgm "
+            "ON deal_search USING gin (card_name gin_trgm_ops)",
+            # The ILIKE filters they served read deal_search now.
+            "DROP INDEX IF EXISTS ix_merchants_city_trgm",
+            "DROP INDEX IF EXISTS ix_cards_name_trgm",
+        ),
+        precondition=_pg_trgm_available,
+    ),
+    Migration(
+        7,
+        "deal_search score factors",
+        (
+            "DROP MATERIALIZED VIEW IF EXISTS deal_search",
+            # discount_factor and card_accessibility are the date- and request-independent
+            # inputs of the recommender score (app/services/recommender.py); the
+            # accessibility values copy its CARD_ACCESSIBILITY.
+            """
+            CREATE MATERIALIZED VIEW deal_search AS
+            SELECT
+                joined.*,
+                joined.merchant_deals::float
+                    / max(joined.merchant_deals) OVER () AS merchant_popularity,
+                least(joined.discount_percent / 100, 1.0) AS discount_factor,
+                least(
+                    CASE lower(coalesce(nullif(joined.card_type, ''), 'debit'))
+                        WHEN 'debit' THEN 1.0 WHEN 'basic' THEN 0.9 WHEN 'classic' THEN 0.85
+                        WHEN 'gold' THEN 0.8 WHEN 'platinum' THEN 0.7
+                        WHEN 'signature' THEN 0.6 WHEN 'infinite' THEN 0.5
+                        ELSE 0.7
+                    END,
+                    CASE lower(joined.card_tier)
+                        WHEN 'debit' THEN 1.0 WHEN 'basic' THEN 0.9 WHEN 'classic' THEN 0.85
+                        WHEN 'gold' THEN 0.8 WHEN 'platinum' THEN 0.7
+                        WHEN 'signature' THEN 0.6 WHEN 'infinite' THEN 0.5
+                        ELSE 1.0
+                    END
+                )::float AS card_accessibility
+            FROM (
+                SELECT
+                    d.id AS discount_id,
+                    d.discount_percent,
+                    d.conditions,
+                    d.valid_from,
+                    d.valid_to,
+                    d.search_vector,
+                    m.id AS merchant_id,
+                    m.name AS merchant,
+                    m.city,
+                    m.category,
+                    m.image_url AS merchant_image_url,
+                    count(*) OVER (PARTITION BY m.id) AS merchant_deals,
+                    c.id AS card_id,
+                    c.name AS card_name,
+                    c.type AS card_type,
+                    c.tier AS card_tier,
+                    b.id AS bank_id,
+                    b.name AS bank
+                FROM discounts d
+                JOIN merchants m ON m.id = d.merchant_id
+                JOIN cards c ON c.id = d.card_id
+                JOIN banks b ON b.id = c.bank_id
+            ) AS joined
+            """,
+        )
+        + _DEAL_SEARCH_INDEXES
+        + (
+            # Dropped with the old view; migration 6 creates them if it has not run yet.
+            """
+            DO $$
+            BEGIN
+                IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+                    CREATE INDEX IF NOT EXISTS ix_deal_search_city_trgm
+                    ON deal_search USING gin (city gin_trgm_ops);
+                    CREATE INDEX IF NOT EXISTS ix_deal_search_card_name_trgm
+                    ON deal_search USING gin (card_name gin_trgm_ops);
+                END IF;
+            END
+            $$
+            """,
+        ),
+    ),
+)
+
+
+async def run_migrations(conn: AsyncConnection) -> list[int]:
+    """Apply pending migrations inside the caller's transaction; returns the
+    versions applied. Callers serialize concurrent starts (see init_db)."""
+    await conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, "
+        "name TEXT NOT NULL, "
+        "applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+    )
+    applied = set((await conn.exec_driver_sql("SELECT version FROM schema_migrations")).scalars())
+    done = []
+    for migration in MIGRATIONS:
+        if migration.version in applied:
+            continue
+        if migration.superseded_by in applied:
+            await _record(conn, migration)
+            logger.info(
+                "Recorded migration %d (%s) without running it: superseded by %d",
+                migration.version,
+                migration.name,
+                migration.superseded_by,
+            )
+            continue
+        if migration.precondition:
+            if not await migration.precondition(conn):
+                logger.warning(
+                    "Skipping migration %d (%s): requirement not available on this server",
+                    migration.version,
+                    migration.name,
+                )
+                continue
+            try:
+                async with conn.begin_nested():
+                    await _apply(conn, migration)
+            except DBAPIError as exc:
+                logger.warning(
+                    "Skipping migration %d (%s): %s", migration.version, migration.name, exc.orig
+                )
+                continue
+        else:
+            await _apply(conn, migration)
+        logger.info("Applied migration %d: %s", migration.version, migration.name)
+        done.append(migration.version)
+    return done
+
+
+async def _apply(conn: AsyncConnection, migration: Migration) -> None:
+    for statement in migration.statements:
+        await conn.exec_driver_sql(statement)
+    await _record(conn, migration)
+
+
+async def _record(conn: AsyncConnection, migration: Migration) -> None:
+    await conn.execute(
+        text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+        {"version": migration.version, "name": migration.name},
+    )
@@ -1,14 +1,20 @@
-from datetime import date
+from datetime import date, datetime
 
 from sqlalchemy import (
+    BigInteger,
+    Boolean,
     Date,
+    DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     UniqueConstraint,
+    func,
 )
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -50,10 +56,15 @@ class Card(Base):
     bank: Mapped["Bank"] = relationship(back_populates="cards")
     discounts: Mapped[list["Discount"]] = relationship(back_populates="card")
 
-    __table_args__ = (UniqueConstraint("bank_id", "name", name="uq_cards_bank_name"),)
+    # Expression and pg_trgm indexes are created by app/db/migrations.py.
+    __table_args__ = (
+        UniqueConstraint("bank_id", "name", name="uq_cards_bank_name"),
+        Index("ix_cards_bank_id", "bank_id"),
+    )
 
 
 class Merchant(Base):
+    """Name, category and city have lower() and pg_trgm indexes (app/db/migrations.py)."""
     __tablename__ = "merchants"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -75,6 +86,11 @@ class Discount(Base):
     conditions: Mapped[str] = mapped_column(Text, nullable=True)
     valid_from: Mapped[date] = mapped_column(Date, nullable=True)
     valid_to: Mapped[date] = mapped_column(Date, nullable=True)
+    # Hash of percent, conditions and validity dates (scraper.discount_fingerprint).
+    fingerprint: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    # Weighted merchant/category/card/conditions text, kept current by triggers
+    # (app/db/migrations.py); only queried, never loaded.
+    search_vector: Mapped[str | None] = mapped_column(TSVECTOR, nullable=True, deferred=True)
 
     merchant: Mapped["Merchant"] = relationship(back_populates="discounts")
     card: Mapped["Card"] = relationship(back_populates="discounts")
@@ -88,4 +104,109 @@ class Discount(Base):
             "valid_to",
             name="uq_discount_unique",
         ),
+        Index("ix_discounts_fingerprint", "fingerprint"),
+        Index("ix_discounts_card_id", "card_id"),
+        Index("ix_discounts_valid_to", "valid_to"),
+        Index("ix_discounts_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+
+class ScrapeRun(Base):
+    """One full scrape across all sources. A run killed by the host stays "running"
+    (or "partial" when it stopped at its deadline) and is resumed by the next run."""
+    __tablename__ = "scrape_runs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="running")
+    started_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
     )
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    wall_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    loop_lag_max_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+
+class DataGeneration(Base):
+    """Single row (id 1) whose generation goes up each time deal_search is
+    refreshed; caches of deal data key on it (app/db/deal_search.py)."""
+    __tablename__ = "data_generation"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    generation: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class ScrapeJob(Base):
+    """A requested scrape (API trigger, scheduler, bootstrap or CLI), run by the
+    scrape worker: queued -> running -> finished | failed | cancelled."""
+    __tablename__ = "scrape_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="queued")
+    trigger: Mapped[str] = mapped_column(String(20), nullable=False, default="api")
+    requested_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    worker: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    run_id: Mapped[int | None] = mapped_column(
+        ForeignKey("scrape_runs.id", ondelete="SET NULL"), nullable=True
+    )
+    inserted: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+
+class ScrapeCheckpoint(Base):
+    """Progress of one bank (city == "") or one Peekaboo city within a run."""
+    __tablename__ = "scrape_checkpoints"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    run_id: Mapped[int] = mapped_column(ForeignKey("scrape_runs.id", ondelete="CASCADE"), nullable=False)
+    bank_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    city: Mapped[str] = mapped_column(String(120), nullable=False, default="")
+    next_offset: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    done: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    # Bank rows only: JSON list of (merchant, card, percent) keys synced so far in this run.
+    seen_keys: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("run_id", "bank_name", "city", name="uq_checkpoint_run_bank_city"),
+    )
+
+
+class ScrapeRunStage(Base):
+    """Telemetry for one bank within a run. Counters accumulate across resumed
+    attempts; times are milliseconds. fetch_ms and parse_ms sum per-request and
+    per-page durations (including waits for the parse pool), so they can exceed
+    wall_ms when requests overlap."""
+    __tablename__ = "scrape_run_stages"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    run_id: Mapped[int] = mapped_column(ForeignKey("scrape_runs.id", ondelete="CASCADE"), nullable=False)
+    bank_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="running")
+    requests: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    bytes_downloaded: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    fetch_ms: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    parse_ms: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    groq_ms: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    sync_ms: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    wall_ms: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    deals_seen: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    inserted: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    expired: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    errors: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    __table_args__ = (UniqueConstraint("run_id", "bank_name", name="uq_run_stage_run_bank"),)
@@ -28,7 +28,85 @@ CREATE TABLE IF NOT EXISTS discounts (
     conditions TEXT,
     valid_from DATE,
     valid_to DATE,
+    fingerprint VARCHAR(32),
+    -- maintained by the triggers in app/db/migrations.py (migration 4)
+    search_vector TSVECTOR,
     CONSTRAINT uq_discount_unique UNIQUE (
         merchant_id, card_id, discount_percent, valid_from, valid_to
     )
 );
+
+CREATE INDEX IF NOT EXISTS ix_discounts_fingerprint ON discounts (fingerprint);
+CREATE INDEX IF NOT EXISTS ix_discounts_card_id ON discounts (card_id);
+CREATE INDEX IF NOT EXISTS ix_discounts_valid_to ON discounts (valid_to);
+CREATE INDEX IF NOT EXISTS ix_discounts_search_vector ON discounts USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS ix_cards_bank_id ON cards (bank_id);
+CREATE INDEX IF NOT EXISTS ix_banks_lower_name ON banks (lower(name));
+CREATE INDEX IF NOT EXISTS ix_cards_lower_type ON cards (lower(type));
+CREATE INDEX IF NOT EXISTS ix_merchants_lower_category ON merchants (lower(category));
+
+-- deal_search (flattened discounts/merchants/cards/banks for the read paths) is a
+-- materialized view created with its indexes by the migrations in app/db/migrations.py.
+
+CREATE TABLE IF NOT EXISTS data_generation (
+    id INTEGER PRIMARY KEY,
+    generation BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS scrape_runs (
+    id SERIAL PRIMARY KEY,
+    status VARCHAR(20) NOT NULL DEFAULT 'running',
+    started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    finished_at TIMESTAMPTZ,
+    wall_ms FLOAT,
+    loop_lag_max_ms FLOAT
+);
+
+CREATE TABLE IF NOT EXISTS scrape_jobs (
+    id SERIAL PRIMARY KEY,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    trigger VARCHAR(20) NOT NULL DEFAULT 'api',
+    requested_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ,
+    cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+    worker VARCHAR(255),
+    run_id INTEGER REFERENCES scrape_runs(id) ON DELETE SET NULL,
+    inserted INTEGER,
+    error TEXT
+);
+
+CREATE TABLE IF NOT EXISTS scrape_checkpoints (
+    id SERIAL PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES scrape_runs(id) ON DELETE CASCADE,
+    bank_name VARCHAR(255) NOT NULL,
+    city VARCHAR(120) NOT NULL DEFAULT '',
+    next_offset INTEGER NOT NULL DEFAULT 0,
+    done BOOLEAN NOT NULL DEFAULT FALSE,
+    seen_keys TEXT,
+    CONSTRAINT uq_checkpoint_run_bank_city UNIQUE (run_id, bank_name, city)
+);
+
+CREATE TABLE IF NOT EXISTS scrape_run_stages (
+    id SERIAL PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES scrape_runs(id) ON DELETE CASCADE,
+    bank_name VARCHAR(255) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'running',
+    requests INTEGER NOT NULL DEFAULT 0,
+    bytes_downloaded BIGINT NOT NULL DEFAULT 0,
+    fetch_ms FLOAT NOT NULL DEFAULT 0,
+    parse_ms FLOAT NOT NULL DEFAULT 0,
+    groq_ms FLOAT NOT NULL DEFAULT 0,
+    sync_ms FLOAT NOT NULL DEFAULT 0,
+    wall_ms FLOAT NOT NULL DEFAULT 0,
+    deals_seen INTEGER NOT NULL DEFAULT 0,
+    inserted INTEGER NOT NULL DEFAULT 0,
+    expired INTEGER NOT NULL DEFAULT 0,
+    updated INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    CONSTRAINT uq_run_stage_run_bank UNIQUE (run_id, bank_name)
+);
@@ -12,7 +12,7 @@ engine = create_async_engine(
     settings.database_url,
     echo=False,
     future=True,
-    connect_args=_connect_args if _connect_args else None,
+    connect_args=_connect_args,
 )
 
 AsyncSessionLocal = sessionmaker(
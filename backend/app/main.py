@@ -1,5 +1,8 @@
 import asyncio
 import logging
+import os
+import subprocess
+import sys
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,8 +11,10 @@ from app.core.logging import configure_logging
 from app.db.init_db import init_db
 from app.db.session import get_session
 from app.routers import admin, ai, banks, discounts
-from app.services.rag import RAGService
-from app.services.scraper import run_full_scrape
+from app.services.event_listener import listen_for_events
+from app.services.http_client import close_http_clients, http_metrics, init_http_clients
+from app.services.parse_pool import shutdown_parse_pool
+from app.services.scrape_jobs import enqueue_job
 from app.tasks.scheduler import start_scheduler
 
 configure_logging()
@@ -30,24 +35,61 @@ app.include_router(banks.router)
 app.include_router(ai.router)
 app.include_router(admin.router)
 
+_scrape_worker: subprocess.Popen | None = None
+_event_listener: asyncio.Task | None = None
+
 
 @app.on_event("startup")
 async def on_startup():
+    global _scrape_worker, _event_listener
     from app.core.config import settings
 
     await init_db()
-    if not settings.skip_bootstrap:
-        async def bootstrap_data():
-            async for session in get_session():
-                await run_full_scrape(session)
-                await RAGService().rebuild_index(session)
+    init_http_clients()
+    if settings.event_listener_enabled:
+        # Scrapes run in another process; its changes reach this worker's caches this way.
+        _event_listener = asyncio.create_task(listen_for_events())
+    if not settings.skip_rag:
+        async def warm_rag():
+            from app.services.embeddings import warm_up
+
+            try:
+                await asyncio.to_thread(warm_up)
+            except Exception as exc:
+                logger.warning("RAG warm-up failed: %s", exc)
 
-        asyncio.create_task(bootstrap_data())
+        asyncio.create_task(warm_rag())
+    if not settings.skip_bootstrap:
+        # Scrape + RAG rebuild run in the scrape worker; this only queues them.
+        async for session in get_session():
+            await enqueue_job(session, "bootstrap")
+    if settings.scrape_worker_embedded:
+        # Every API worker starts one; the advisory lock lets one scrape at a time.
+        _scrape_worker = subprocess.Popen(
+            [sys.executable, "-m", "app.tasks.worker", "--parent-pid", str(os.getpid())]
+        )
     if not settings.disable_scheduler:
         start_scheduler(get_session)
     logger.info("Application started")
 
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    logger.info("HTTP client stats: %s", http_metrics())
+    if _event_listener is not None:
+        _event_listener.cancel()
+        await asyncio.gather(_event_listener, return_exceptions=True)
+    if _scrape_worker is not None:
+        # SIGTERM requeues a running job for the next worker to resume.
+        _scrape_worker.terminate()
+        try:
+            await asyncio.to_thread(_scrape_worker.wait, 30)
+        except subprocess.TimeoutExpired:
+            _scrape_worker.kill()
+    await close_http_clients()
+    shutdown_parse_pool()
+
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
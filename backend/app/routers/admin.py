@@ -1,106 +1,200 @@
+import asyncio
 from datetime import date, timedelta
 
-from fastapi import APIRouter, BackgroundTasks, Depends
-from sqlalchemy import func, select
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, literal_column, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import Bank, Card, Discount, Merchant
+from app.db.deal_search import deal_search
 from app.db.session import get_session
-from app.services.scrape_state import get_last_scrape_result, is_maintenance, set_scraping
+from app.services.response_cache import cached_response
+from app.services.scrape_jobs import (
+    cancel_job,
+    enqueue_job,
+    get_job,
+    job_dict,
+    last_finished_job,
+    list_jobs,
+    maintenance_status as scrape_maintenance,
+)
 
 router = APIRouter(prefix="/admin", tags=["admin"])
+ds = deal_search.c
 
 
 @router.get("/maintenance")
-async def maintenance_status():
+async def maintenance_status(session: AsyncSession = Depends(get_session)):
     """Returns maintenance flag for weekly scrape window (used by frontend banner)."""
-    ok, msg = is_maintenance()
+    ok, msg = await scrape_maintenance(session)
     return {"maintenance": ok, "message": msg}
 
 
 @router.get("/scrape-status")
-async def scrape_status():
-    """Returns last scrape result (inserted count, completed time)."""
-    inserted, completed_at = get_last_scrape_result()
+async def scrape_status(session: AsyncSession = Depends(get_session)):
+    """Returns last scrape result (inserted count, completed time) and the latest
+    run's telemetry per bank (requests, bytes, stage times, deal counts, errors)."""
+    from app.services.scrape_telemetry import latest_run
+
+    last = await last_finished_job(session)
+    return {
+        "last_inserted": last.inserted if last else 0,
+        "last_completed_at": last.finished_at.isoformat() if last else None,
+        "latest_run": await latest_run(session),
+    }
+
+
+@router.get("/scrape-runs")
+async def scrape_runs(
+    limit: int = Query(20, ge=1, le=200), session: AsyncSession = Depends(get_session)
+):
+    """Recent scrape runs, newest first, with telemetry summed over their banks."""
+    from app.services.scrape_telemetry import run_history
+
+    return {"runs": await run_history(session, limit)}
+
+
+@router.get("/rag-status")
+async def rag_status():
+    """Returns embedding model/index load times and query latency for this worker."""
+    from app.core.config import settings
+
+    if settings.skip_rag:
+        return {"enabled": False}
+    from app.services.embeddings import get_embedding_service
+
+    service = await asyncio.to_thread(get_embedding_service)
+    return {"enabled": True, **service.stats()}
+
+
+@router.get("/http-stats")
+async def http_stats():
+    """Requests, new TCP connections, TLS handshakes and reused connections per HTTP client."""
+    from app.services.http_client import http_metrics
+
+    return http_metrics()
+
+
+@router.get("/scrape-hosts")
+async def scrape_hosts():
+    """Adaptive rate, circuit state, errors, 429s and latency per host the scraper hit."""
+    from app.services.scraper import scrape_host_stats
+
+    return scrape_host_stats()
+
+
+@router.get("/fetch-cache")
+async def fetch_cache_stats():
+    """Hit/miss, 304 and eviction counters for the scraper's page cache."""
+    from app.services.fetch_cache import get_fetch_cache
+
+    cache = get_fetch_cache()
+    return await asyncio.to_thread(cache.stats) if cache else {"enabled": False}
+
+
+@router.get("/groq-cache")
+async def groq_cache_stats():
+    """Entries in the Groq normalization cache (raw-text hash -> cleaned fields)."""
+    from app.services.groq_normalizer import get_normalization_cache
+
+    cache = get_normalization_cache()
+    return cache.stats() if cache else {"enabled": False}
+
+
+@router.get("/response-cache")
+async def response_cache_stats():
+    """Hit ratio, eviction and invalidation counters for cached read responses
+    and GET /discounts totals (this API worker only)."""
+    from app.services.count_cache import get_count_cache
+    from app.services.response_cache import get_response_cache
+
+    cache = get_response_cache()
+    count_cache = get_count_cache()
     return {
-        "last_inserted": inserted,
-        "last_completed_at": completed_at.isoformat() if completed_at else None,
+        **(cache.stats() if cache else {"enabled": False}),
+        "discount_counts": count_cache.stats() if count_cache else {"enabled": False},
     }
 
 
+@router.get("/events")
+async def event_listener_status():
+    """Whether this API worker is listening for cross-process events, and what it received."""
+    from app.services.event_listener import event_listener_stats
+
+    return event_listener_stats()
+
+
 @router.post("/trigger-scrape")
-async def trigger_scrape(background_tasks: BackgroundTasks):
-    """Trigger scraper in background. Use from cron (GitHub Actions etc) or manually."""
-
-    def _run():
-        import asyncio
-        from app.db.session import AsyncSessionLocal
-        from app.services.rag import RAGService
-        from app.services.scraper import run_full_scrape
-        from app.tasks.scheduler import expire_old_discounts
-
-        set_scraping(True)
-        inserted = -1
-        try:
-            async def _scrape():
-                async with AsyncSessionLocal() as session:
-                    n = await run_full_scrape(session)
-                    await expire_old_discounts(session)
-                    try:
-                        await RAGService().rebuild_index(session)
-                    except Exception:
-                        pass
-                    return n
-
-            inserted = asyncio.run(_scrape())
-        finally:
-            set_scraping(False, inserted)
-
-    background_tasks.add_task(_run)
-    return {"status": "started", "message": "Scraper running in background"}
+async def trigger_scrape(session: AsyncSession = Depends(get_session)):
+    """Queue a scrape for the scrape worker. Use from cron (GitHub Actions etc) or manually.
+    Returns the already queued or running job instead of starting a second scrape."""
+    job, created = await enqueue_job(session, "api")
+    return {
+        "status": job.status,
+        "job_id": job.id,
+        "message": "Scrape queued" if created else "Scrape already " + job.status,
+    }
+
+
+@router.get("/scrape-jobs")
+async def scrape_jobs(
+    limit: int = Query(20, ge=1, le=200), session: AsyncSession = Depends(get_session)
+):
+    """Recent scrape jobs, newest first."""
+    return {"jobs": [job_dict(job) for job in await list_jobs(session, limit)]}
+
+
+@router.get("/scrape-jobs/{job_id}")
+async def scrape_job(job_id: int, session: AsyncSession = Depends(get_session)):
+    job = await get_job(session, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Scrape job not found")
+    return job_dict(job)
+
+
+@router.post("/scrape-jobs/{job_id}/cancel")
+async def cancel_scrape_job(job_id: int, session: AsyncSession = Depends(get_session)):
+    """Cancel a queued job, or stop a running one at the worker's next poll."""
+    job = await cancel_job(session, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Scrape job not found")
+    return job_dict(job)
 
 
 @router.get("/analytics")
 async def analytics(session: AsyncSession = Depends(get_session)):
-    total_discounts = (
-        await session.execute(select(func.count(Discount.id)))
-    ).scalar_one()
-    avg_discount = (
-        await session.execute(select(func.avg(Discount.discount_percent)))
-    ).scalar_one()
+    # expiring_soon counts from today.
+    return await cached_response(
+        session, "admin/analytics", {"today": date.today().isoformat()}, lambda: _analytics(session)
+    )
+
+
+async def _analytics(session: AsyncSession) -> dict:
+    total_discounts, avg_discount = (
+        await session.execute(select(func.count(), func.avg(ds.discount_percent)))
+    ).one()
     top_categories = (
         await session.execute(
-            select(Merchant.category, func.count(Discount.id))
-            .join(Discount, Discount.merchant_id == Merchant.id)
-            .group_by(Merchant.category)
-            .order_by(func.count(Discount.id).desc())
+            select(ds.category, func.count())
+            .group_by(ds.category)
+            .order_by(func.count().desc())
             .limit(5)
         )
     ).all()
     top_cities = (
         await session.execute(
-            select(Merchant.city, func.count(Discount.id))
-            .join(Discount, Discount.merchant_id == Merchant.id)
-            .group_by(Merchant.city)
-            .order_by(func.count(Discount.id).desc())
-            .limit(5)
+            select(ds.city, func.count()).group_by(ds.city).order_by(func.count().desc()).limit(5)
         )
     ).all()
     top_banks = (
         await session.execute(
-            select(Bank.name, func.count(Discount.id))
-            .join(Card, Card.bank_id == Bank.id)
-            .join(Discount, Discount.card_id == Card.id)
-            .group_by(Bank.name)
-            .order_by(func.count(Discount.id).desc())
-            .limit(5)
+            select(ds.bank, func.count()).group_by(ds.bank).order_by(func.count().desc()).limit(5)
         )
     ).all()
     expiring_soon = (
         await session.execute(
-            select(func.count(Discount.id)).where(
-                Discount.valid_to.is_not(None),
-                Discount.valid_to <= date.today() + timedelta(days=7),
+            select(func.count()).where(
+                ds.valid_to.is_not(None),
+                ds.valid_to <= date.today() + timedelta(days=7),
             )
         )
     ).scalar_one()
@@ -119,15 +213,14 @@ async def analytics(session: AsyncSession = Depends(get_session)):
 
 @router.get("/trends")
 async def trends(session: AsyncSession = Depends(get_session)):
+    # Inline 'week': as three bound parameters Postgres cannot tell GROUP BY matches SELECT.
+    week = func.date_trunc(literal_column("'week'"), ds.valid_from)
     rows = (
         await session.execute(
-            select(
-                func.date_trunc("week", Discount.valid_from).label("week"),
-                func.count(Discount.id),
-            )
-            .where(Discount.valid_from.is_not(None))
-            .group_by(func.date_trunc("week", Discount.valid_from))
-            .order_by(func.date_trunc("week", Discount.valid_from))
+            select(week.label("week"), func.count())
+            .where(ds.valid_from.is_not(None))
+            .group_by(week)
+            .order_by(week)
         )
     ).all()
     series = [{"week": row[0].date().isoformat(), "count": row[1]} for row in rows]
@@ -144,16 +237,13 @@ async def insights(session: AsyncSession = Depends(get_session)):
     rows = (
         await session.execute(
             select(
-                Bank.name,
-                func.count(Discount.id),
-                func.sum(Discount.discount_percent),
-                func.count(func.distinct(Merchant.category)),
+                ds.bank,
+                func.count(),
+                func.sum(ds.discount_percent),
+                func.count(func.distinct(ds.category)),
             )
-            .join(Card, Card.bank_id == Bank.id)
-            .join(Discount, Discount.card_id == Card.id)
-            .join(Merchant, Discount.merchant_id == Merchant.id)
-            .group_by(Bank.name)
-            .order_by(func.sum(Discount.discount_percent).desc())
+            .group_by(ds.bank)
+            .order_by(func.sum(ds.discount_percent).desc())
         )
     ).all()
     insights = []
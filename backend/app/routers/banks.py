@@ -4,12 +4,17 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import Bank, Card
 from app.db.session import get_session
+from app.services.response_cache import cached_response
 
 router = APIRouter(prefix="/banks", tags=["banks"])
 
 
 @router.get("")
 async def list_banks(session: AsyncSession = Depends(get_session)):
+    return await cached_response(session, "banks", {}, lambda: _list_banks(session))
+
+
+async def _list_banks(session: AsyncSession) -> dict:
     result = await session.execute(select(Bank))
     banks = [
         {"id": bank.id, "name": bank.name, "website": bank.website}
@@ -1,14 +1,25 @@
+import base64
+import binascii
+import hashlib
+import json
 import re
+from datetime import date
+from typing import Literal, NamedTuple
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import func, or_, select
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement, Select
 
-from app.db.models import Bank, Card, Discount, Merchant
+from app.db.deal_search import deal_search, known_generation
+from app.db.explain import estimate_rows
 from app.db.session import get_session
-from app.services.recommender import rank_discounts
+from app.services.count_cache import get_count_cache
+from app.services.recommender import discount_score
+from app.services.response_cache import cached_response
 
 router = APIRouter(prefix="/discounts", tags=["discounts"])
+ds = deal_search.c
 
 # Cities that appear in data - used to extract city from search intent (e.g. "DHA Karachi" -> Karachi)
 KNOWN_CITIES = [
@@ -25,16 +36,9 @@ def _is_readable(text: str) -> bool:
     return bool(cleaned)
 
 
-def _keyword_filter(term: str):
-    """Build OR condition: term matches merchant, category, city, conditions, or card name."""
-    pattern = f"%{term}%"
-    return or_(
-        Merchant.name.ilike(pattern),
-        Merchant.category.ilike(pattern),
-        Merchant.city.ilike(pattern),
-        Card.name.ilike(pattern),
-        func.coalesce(Discount.conditions, "").ilike(pattern),
-    )
+def _search_words(text: str) -> list[str]:
+    """Searchable words of text: lowercase letters/digits, safe to put in a tsquery."""
+    return re.findall(r"[^\W_]+", text.lower())
 
 
 def _extract_city_from_intent(intent: str | None) -> tuple[str | None, str]:
@@ -62,29 +66,33 @@ async def list_filter_options(
 ):
     """Return available card tiers (and types) for given bank and card type.
     Used to make filter dropdowns intelligent: e.g. HBL Debit has no Platinum."""
-    q = (
-        select(Card.tier, Card.type)
-        .join(Bank, Card.bank_id == Bank.id)
-        .join(Discount, Discount.card_id == Card.id)
-        .distinct()
+    return await cached_response(
+        session,
+        "discounts/filter-options",
+        {"bank": bank and bank.lower(), "card_type": card_type and card_type.lower()},
+        lambda: _filter_options(session, bank, card_type),
     )
+
+
+async def _filter_options(session: AsyncSession, bank: str | None, card_type: str | None) -> dict:
+    q = select(ds.card_tier, ds.card_type).distinct()
     if bank:
-        q = q.where(func.lower(Bank.name) == bank.lower())
+        q = q.where(func.lower(ds.bank) == bank.lower())
     if card_type:
         q = q.where(
             or_(
-                func.lower(Card.type) == card_type.lower(),
-                Card.name.ilike(f"%{card_type}%"),
+                func.lower(ds.card_type) == card_type.lower(),
+                ds.card_name.ilike(f"%{card_type}%"),
             )
         )
     result = await session.execute(q)
     tiers = set()
     types_seen = set()
     for row in result.all():
-        if row.tier and str(row.tier).strip():
-            tiers.add(str(row.tier).strip())
-        if row.type and str(row.type).strip():
-            t = str(row.type).strip().lower()
+        if row.card_tier and str(row.card_tier).strip():
+            tiers.add(str(row.card_tier).strip())
+        if row.card_type and str(row.card_type).strip():
+            t = str(row.card_type).strip().lower()
             if t in ("credit", "debit"):
                 types_seen.add(t.title())
     tier_order = ["Basic", "Classic", "Gold", "Platinum", "Signature", "Infinite"]
@@ -101,21 +109,42 @@ async def list_cards_with_discounts(
     session: AsyncSession = Depends(get_session),
 ):
     """Return distinct card names that have discounts. Optional bank filter."""
-    q = (
-        select(Card.name, Bank.name.label("bank_name"))
-        .join(Bank, Card.bank_id == Bank.id)
-        .join(Discount, Discount.card_id == Card.id)
-        .distinct()
+    return await cached_response(
+        session,
+        "discounts/cards",
+        {"bank": bank and bank.lower()},
+        lambda: _cards_with_discounts(session, bank),
     )
+
+
+async def _cards_with_discounts(session: AsyncSession, bank: str | None) -> dict:
+    q = select(ds.card_name, ds.bank).distinct()
     if bank:
-        q = q.where(func.lower(Bank.name) == bank.lower())
+        q = q.where(func.lower(ds.bank) == bank.lower())
     result = await session.execute(q)
-    cards = [{"card_name": row.name, "bank": row.bank_name} for row in result.all()]
+    cards = [{"card_name": row.card_name, "bank": row.bank} for row in result.all()]
     return {"count": len(cards), "results": cards}
 
 
-@router.get("")
-async def list_discounts(
+class SortKey(NamedTuple):
+    name: str  # attribute of the result row
+    column: ColumnElement
+    descending: bool
+
+
+class DiscountQuery(NamedTuple):
+    query: Select
+    effective_city: str | None
+    effective_intent: str | None
+    # Normalized filters: equal for requests that match the same deals.
+    signature: str
+    # Normalized sort: with signature, equal for requests that list them in the same order.
+    ordering: str
+    # The query's total ORDER BY; the last key is unique, so pages never overlap.
+    sort_keys: tuple[SortKey, ...]
+
+
+def filtered_discounts_query(
     city: str | None = None,
     category: str | None = None,
     bank: str | None = None,
@@ -123,10 +152,11 @@ async def list_discounts(
     card_tier: str | None = None,
     card: str | None = None,
     intent: str | None = None,
-    limit: int = Query(50, ge=1, le=500),
-    offset: int = Query(0, ge=0),
-    session: AsyncSession = Depends(get_session),
-):
+    sort: str = "score",
+) -> DiscountQuery:
+    """The filtered, ordered deal query behind GET /discounts (no pagination).
+    sort: "score" (the recommender's score, best first), "relevance" (full-text
+    rank of the intent) or "id"."""
     # When user searches "DHA Karachi" without selecting city, extract city from intent
     effective_city = city
     effective_intent = intent
@@ -136,78 +166,228 @@ async def list_discounts(
             effective_city = parsed_city
             effective_intent = remaining if remaining else None
 
-    base = (
-        select(
-            Discount.id,
-            Discount.discount_percent,
-            Discount.conditions,
-            Discount.valid_from,
-            Discount.valid_to,
-            Merchant.name.label("merchant"),
-            Merchant.city,
-            Merchant.category,
-            Merchant.image_url.label("merchant_image_url"),
-            Card.name.label("card_name"),
-            Card.type.label("card_type"),
-            Card.tier.label("card_tier"),
-            Bank.name.label("bank"),
-        )
-        .join(Merchant, Discount.merchant_id == Merchant.id)
-        .join(Card, Discount.card_id == Card.id)
-        .join(Bank, Card.bank_id == Bank.id)
+    base = select(
+        ds.discount_id,
+        ds.discount_percent,
+        ds.conditions,
+        ds.valid_from,
+        ds.valid_to,
+        ds.merchant,
+        ds.city,
+        ds.category,
+        ds.merchant_image_url,
+        ds.card_name,
+        ds.card_type,
+        ds.card_tier,
+        ds.bank,
     )
 
+    filters = {}
     # Use partial match for city so "Karachi" matches "Karachi", "DHA Karachi", etc.
     if effective_city:
+        filters["city"] = effective_city.lower()
         pattern = f"%{effective_city}%"
-        base = base.where(Merchant.city.ilike(pattern))
+        base = base.where(ds.city.ilike(pattern))
     if category:
-        base = base.where(func.lower(Merchant.category) == category.lower())
+        filters["category"] = category.lower()
+        base = base.where(func.lower(ds.category) == category.lower())
     if bank:
-        base = base.where(func.lower(Bank.name) == bank.lower())
+        filters["bank"] = bank.lower()
+        base = base.where(func.lower(ds.bank) == bank.lower())
     # Exact card filter: show all discounts for this specific card (skip type/tier when card selected)
     if card and card.strip():
-        base = base.where(Card.name == card.strip())
+        filters["card"] = card.strip()
+        base = base.where(ds.card_name == card.strip())
     elif card_type or card_tier:
         # Match card type on Card.type OR card name (e.g. "Meezan Bank Debit Card" matches "Debit")
         if card_type:
             ct = card_type.lower()
+            filters["card_type"] = ct
             base = base.where(
                 or_(
-                    func.lower(Card.type) == ct,
-                    Card.name.ilike(f"%{card_type}%"),
+                    func.lower(ds.card_type) == ct,
+                    ds.card_name.ilike(f"%{card_type}%"),
                 )
             )
         # Match card tier on Card.tier OR card name (e.g. "Basic Debit Card", "Gold Credit Card")
         if card_tier:
             ct = card_tier.lower()
+            filters["card_tier"] = ct
             base = base.where(
                 or_(
-                    func.lower(func.coalesce(Card.tier, "")) == ct,
-                    Card.name.ilike(f"%{card_tier}%"),
+                    func.lower(func.coalesce(ds.card_tier, "")) == ct,
+                    ds.card_name.ilike(f"%{card_tier}%"),
                 )
             )
 
     # Apply keyword filter: when city was extracted from intent (e.g. "DHA Karachi"),
     # remaining words ("DHA") are used for ranking only - don't exclude deals without them.
     # When intent was provided directly (user typed, no city extraction), filter by keywords.
-    if effective_intent and effective_intent.strip() and (city or not effective_city):
-        words = [w.strip() for w in effective_intent.split() if w.strip()]
-        if words:
-            for word in words:
-                base = base.where(_keyword_filter(word))
-
-    # Total count (before pagination)
-    subq = base.subquery()
-    count_q = select(func.count()).select_from(subq)
-    total_result = await session.execute(count_q)
-    total_count = total_result.scalar() or 0
-
-    # Paginated results
-    result = await session.execute(base.offset(offset).limit(limit))
+    # Either way, results are ordered by the score (which counts the words as its
+    # intent term) or by full-text relevance (merchant > category/city > card >
+    # conditions), then by id, so every page continues the previous one.
+    sort_keys = (SortKey("discount_id", ds.discount_id, False),)
+    words = _search_words(effective_intent) if effective_intent else []
+    if words:
+        query = func.to_tsquery("simple", " & ".join(f"{word}:*" for word in words))
+        if city or not effective_city:
+            filters["match"] = words
+            base = base.where(ds.search_vector.bool_op("@@")(query))
+        relevance = func.ts_rank(ds.search_vector, query)
+        base = base.add_columns(relevance.label("relevance"))
+        if sort == "relevance":
+            sort_keys = (SortKey("relevance", relevance, True),) + sort_keys
+    if sort == "score":
+        score = discount_score(effective_city, words)
+        base = base.add_columns(score.label("score"))
+        sort_keys = (SortKey("score", score, True),) + sort_keys
+    base = base.order_by(
+        *(key.column.desc() if key.descending else key.column for key in sort_keys)
+    )
+
+    signature = json.dumps(filters, sort_keys=True, separators=(",", ":"))
+    ordering = json.dumps({"keys": [key.name for key in sort_keys], "words": words})
+    return DiscountQuery(base, effective_city, effective_intent, signature, ordering, sort_keys)
+
+
+def _cursor_tag(filtered: DiscountQuery) -> str:
+    return hashlib.sha256(f"{filtered.signature}|{filtered.ordering}".encode()).hexdigest()[:16]
+
+
+def _encode_cursor(filtered: DiscountQuery, values: list) -> str:
+    payload = json.dumps({"f": _cursor_tag(filtered), "after": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, filtered: DiscountQuery) -> list:
+    """Sort values of the last row of the previous page; 400 for a malformed cursor
+    or one issued for other filters or another sort."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        values = payload["after"]
+        tag = payload["f"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if tag != _cursor_tag(filtered):
+        raise HTTPException(
+            status_code=400, detail="Cursor was issued for different filters or sort"
+        )
+    if (
+        not isinstance(values, list)
+        or len(values) != len(filtered.sort_keys)
+        or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values)
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def _after(sort_keys: tuple[SortKey, ...], values: list):
+    """Rows that sort after values: (a, b) > (x, y) spelled out per key, since
+    relevance sorts descending and discount_id ascending."""
+    clauses = []
+    for i, key in enumerate(sort_keys):
+        ties = [prev.column == value for prev, value in zip(sort_keys[:i], values)]
+        beyond = key.column < values[i] if key.descending else key.column > values[i]
+        clauses.append(and_(*ties, beyond))
+    return or_(*clauses)
+
+
+async def _total_count(
+    session: AsyncSession, discounts: DiscountQuery, mode: str
+) -> tuple[int, bool]:
+    """(total matches, whether it is the planner's estimate)."""
+    unordered = discounts.query.order_by(None)
+    if mode == "estimate":
+        return await estimate_rows(session, unordered), True
+    cache = get_count_cache()
+    generation = await known_generation(session) if cache else 0
+    if cache:
+        cached = cache.get(discounts.signature, generation)
+        if cached is not None:
+            return cached, False
+    total = (
+        await session.execute(select(func.count()).select_from(unordered.subquery()))
+    ).scalar() or 0
+    if cache:
+        cache.put(discounts.signature, generation, total)
+    return total, False
+
+
+@router.get("")
+async def list_discounts(
+    city: str | None = None,
+    category: str | None = None,
+    bank: str | None = None,
+    card_type: str | None = None,
+    card_tier: str | None = None,
+    card: str | None = None,
+    intent: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    cursor: str | None = None,
+    count: Literal["exact", "estimate"] = "exact",
+    sort: Literal["score", "relevance", "id"] = "score",
+    session: AsyncSession = Depends(get_session),
+):
+    """Filtered deals, best first by default, one page at a time. Pass
+    next_cursor from the previous response as cursor to continue; offset still
+    works but scans every skipped row. Only sort=id pages cost the same however
+    deep they are; score and relevance are computed for every match. total_count
+    is exact (cached per filter combination until the next scrape) or, with
+    count=estimate, the planner's estimate."""
+    if cursor and offset:
+        raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
+    filtered = filtered_discounts_query(
+        city, category, bank, card_type, card_tier, card, intent, sort
+    )
+    params = {
+        "filters": filtered.signature,
+        "ordering": filtered.ordering,
+        "limit": limit,
+        "offset": offset,
+        "cursor": cursor,
+        "count": count,
+    }
+    if sort == "score":
+        # The score's validity term counts days from today.
+        params["today"] = date.today().isoformat()
+    return await cached_response(
+        session,
+        "discounts",
+        params,
+        lambda: _discounts_page(session, filtered, limit, offset, cursor, count),
+    )
+
+
+async def _discounts_page(
+    session: AsyncSession,
+    filtered: DiscountQuery,
+    limit: int,
+    offset: int,
+    cursor: str | None,
+    count: str,
+) -> dict:
+    page = filtered.query
+    if cursor:
+        after = _decode_cursor(cursor, filtered)
+        page = page.where(_after(filtered.sort_keys, after))
+    else:
+        page = page.offset(offset)
+
+    total_count, estimated = await _total_count(session, filtered, count)
+
+    # One extra row tells whether there is a next page.
+    rows = (await session.execute(page.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_cursor(
+            filtered, [getattr(last, key.name) for key in filtered.sort_keys]
+        )
     discounts = [
         {
-            "discount_id": row.id,
+            "discount_id": row.discount_id,
             "discount_percent": row.discount_percent,
             "conditions": row.conditions,
             "valid_from": row.valid_from.isoformat() if row.valid_from else None,
@@ -220,10 +400,15 @@ async def list_discounts(
             "card_type": row.card_type,
             "card_tier": row.card_tier,
             "bank": row.bank,
+            **({"relevance": round(row.relevance, 4)} if "relevance" in row._fields else {}),
+            **({"score": round(row.score, 2)} if "score" in row._fields else {}),
         }
-        for row in result.all()
+        for row in rows
     ]
-
-    if intent or effective_intent:
-        discounts = rank_discounts(discounts, effective_city or "", effective_intent or intent or "")
-    return {"count": len(discounts), "total_count": total_count, "results": discounts}
+    return {
+        "count": len(discounts),
+        "total_count": total_count,
+        "total_count_estimated": estimated,
+        "next_cursor": next_cursor,
+        "results": discounts,
+    }
@@ -7,9 +7,9 @@ from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.db.models import Bank, Card, Discount, Merchant
+from app.db.deal_search import deal_search
 from app.services.rag import RAGService
-from app.services.recommender import rank_cards, rank_discounts
+from app.services.recommender import discount_score, matches_any_word, rank_cards, rank_discounts
 from app.services.serp_client import SerpApiClient
 
 logger = logging.getLogger(__name__)
@@ -43,6 +43,8 @@ CATEGORY_KEYWORDS = {
 }
 
 MAX_TEXT_LEN = 240
+# Best deals fetched per question; the response lists 12 and returns 10.
+RECOMMENDATION_LIMIT = 12
 STOPWORDS = {
     "best",
     "deals",
@@ -352,46 +354,42 @@ def _build_human_response(
 
 
 async def _fetch_discount_candidates(
-    session: AsyncSession, city: str | None, category: str | None
-) -> list[dict]:
-    counts = (
-        await session.execute(
-            select(Merchant.id, func.count(Discount.id))
-            .join(Discount, Discount.merchant_id == Merchant.id)
-            .group_by(Merchant.id)
-        )
-    ).all()
-    count_map = {row[0]: int(row[1]) for row in counts}
-    max_count = max(count_map.values(), default=1)
-
-    query = (
-        select(
-            Discount.id.label("discount_id"),
-            Discount.discount_percent,
-            Discount.conditions,
-            Discount.valid_from,
-            Discount.valid_to,
-            Merchant.name.label("merchant_name"),
-            Merchant.id.label("merchant_id"),
-            Merchant.city.label("merchant_city"),
-            Merchant.category.label("merchant_category"),
-            Card.name.label("card_name"),
-            Card.type.label("card_type"),
-            Card.tier.label("card_tier"),
-            Bank.name.label("bank_name"),
-        )
-        .join(Merchant, Discount.merchant_id == Merchant.id)
-        .join(Card, Discount.card_id == Card.id)
-        .join(Bank, Card.bank_id == Bank.id)
+    session: AsyncSession, city: str | None, category: str | None, keywords: list[str]
+) -> tuple[list[dict], bool]:
+    """The best deals for city and category by the recommender score, ranked in
+    SQL. Only deals mentioning a keyword when any do; the flag says whether they did."""
+    ds = deal_search.c
+    score = discount_score(city, keywords)
+    query = select(
+        ds.discount_id,
+        ds.discount_percent,
+        ds.conditions,
+        ds.valid_from,
+        ds.valid_to,
+        ds.merchant.label("merchant_name"),
+        ds.city.label("merchant_city"),
+        ds.category.label("merchant_category"),
+        ds.card_name,
+        ds.card_type,
+        ds.card_tier,
+        ds.bank.label("bank_name"),
+        ds.merchant_popularity,
+        score.label("score"),
     )
     if city:
-        query = query.where(func.lower(Merchant.city) == city.lower())
+        query = query.where(func.lower(ds.city) == city.lower())
     if category:
-        query = query.where(func.lower(Merchant.category) == category.lower())
-
-    result = await session.execute(query)
+        query = query.where(func.lower(ds.category) == category.lower())
+    query = query.order_by(score.desc(), ds.discount_id).limit(RECOMMENDATION_LIMIT)
+
+    rows = []
+    if keywords:
+        rows = (await session.execute(query.where(matches_any_word(keywords)))).all()
+    keyword_focus = bool(rows)
+    if not rows:
+        rows = (await session.execute(query)).all()
     discounts = []
-    for row in result.all():
+    for row in rows:
         discounts.append(
             {
                 "discount_id": row.discount_id,
@@ -406,28 +404,24 @@ async def _fetch_discount_candidates(
                 "card_type": row.card_type,
                 "card_tier": row.card_tier,
                 "bank": row.bank_name,
-                "merchant_popularity": count_map.get(row.merchant_id, 1) / max_count,
+                "merchant_popularity": row.merchant_popularity,
+                "score": round(row.score, 2),
             }
         )
-    return discounts
+    return discounts, keyword_focus
 
 
 async def _build_card_suggestions(session: AsyncSession) -> list[dict]:
-    query = (
-        select(
-            Card.name.label("card_name"),
-            Card.type.label("card_type"),
-            Card.tier.label("card_tier"),
-            Bank.name.label("bank_name"),
-            func.count(Discount.id).label("discount_count"),
-            func.sum(Discount.discount_percent).label("discount_sum"),
-            func.count(func.distinct(Merchant.city)).label("city_count"),
-        )
-        .join(Bank, Card.bank_id == Bank.id)
-        .join(Discount, Discount.card_id == Card.id)
-        .join(Merchant, Discount.merchant_id == Merchant.id)
-        .group_by(Card.id, Bank.name)
-    )
+    ds = deal_search.c
+    query = select(
+        ds.card_name,
+        ds.card_type,
+        ds.card_tier,
+        ds.bank.label("bank_name"),
+        func.count().label("discount_count"),
+        func.sum(ds.discount_percent).label("discount_sum"),
+        func.count(func.distinct(ds.city)).label("city_count"),
+    ).group_by(ds.card_id, ds.card_name, ds.card_type, ds.card_tier, ds.bank)
     result = await session.execute(query)
     cards = []
     for row in result.all():
@@ -455,15 +449,15 @@ async def run_assistant(
     rag_hits: list[dict] = []
     if use_rag and not settings.skip_rag:
         try:
-            rag_service = RAGService()
-            rag_hits = await asyncio.to_thread(rag_service.search, query, 6)
+            # The shared model/index is built on first use; keep that off the loop too.
+            rag_hits = await asyncio.to_thread(lambda: RAGService().search(query, 6))
         except Exception as e:
             logger.warning("RAG search failed, continuing without: %s", e)
             rag_hits = []
 
     try:
-        discounts = await _fetch_discount_candidates(
-            session, intent.get("city"), intent.get("category")
+        ranked, keyword_focus = await _fetch_discount_candidates(
+            session, intent.get("city"), intent.get("category"), search_keywords
         )
     except Exception as e:
         logger.exception("Failed to fetch discount candidates: %s", e)
@@ -475,18 +469,20 @@ async def run_assistant(
             "response": "I'm having trouble reaching the database right now. Please try again in a moment.",
         }
 
-    if not discounts and rag_hits:
+    if ranked:
+        if search_keywords:
+            intent["keyword_focus"] = keyword_focus
+    else:
+        # RAG hits are not in deal_search's order; filter and rank them here.
         discounts = rag_hits
-
-    if search_keywords:
-        filtered = _filter_by_keywords(discounts, search_keywords)
-        if filtered:
-            discounts = filtered
-            intent["keyword_focus"] = True
-        else:
-            intent["keyword_focus"] = False
-
-    ranked = rank_discounts(discounts, intent.get("city") or "", query)
+        if search_keywords:
+            filtered = _filter_by_keywords(discounts, search_keywords)
+            if filtered:
+                discounts = filtered
+                intent["keyword_focus"] = True
+            else:
+                intent["keyword_focus"] = False
+        ranked = rank_discounts(discounts, intent.get("city") or "", query)
 
     try:
         cards = await _build_card_suggestions(session)
@@ -0,0 +1,72 @@
+"""In-process cache of GET /discounts total counts.
+
+Counting every match is the slowest part of a page once pagination is keyset
+based, and the total only changes when deal_search is refreshed. Counts are
+kept per normalized filter signature for the current data generation (see
+app/db/deal_search.py); the first lookup under a newer generation drops them
+all. Least recently used signatures are evicted past DISCOUNT_COUNT_CACHE_ENTRIES.
+"""
+
+import threading
+from collections import OrderedDict
+
+from app.core.config import settings
+
+
+class CountCache:
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._counts: OrderedDict[str, int] = OrderedDict()
+        self._generation: int | None = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def _sync_generation(self, generation: int) -> None:
+        if generation != self._generation:
+            if self._counts:
+                self._stats["invalidations"] += 1
+            self._counts.clear()
+            self._generation = generation
+
+    def get(self, signature: str, generation: int) -> int | None:
+        with self._lock:
+            self._sync_generation(generation)
+            count = self._counts.get(signature)
+            if count is None:
+                self._stats["misses"] += 1
+                return None
+            self._counts.move_to_end(signature)
+            self._stats["hits"] += 1
+            return count
+
+    def put(self, signature: str, generation: int, count: int) -> None:
+        with self._lock:
+            # A count computed before a refresh must not land in the newer generation.
+            if self._generation is not None and generation < self._generation:
+                return
+            self._sync_generation(generation)
+            self._counts[signature] = count
+            self._counts.move_to_end(signature)
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "entries": len(self._counts), "generation": self._generation}
+
+
+_cache: CountCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_count_cache() -> CountCache | None:
+    """Process-wide cache, or None when DISCOUNT_COUNT_CACHE_ENTRIES is 0."""
+    global _cache
+    if settings.discount_count_cache_entries <= 0:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CountCache(settings.discount_count_cache_entries)
+    return _cache
@@ -1,5 +1,7 @@
 import json
 import logging
+import threading
+import time
 from pathlib import Path
 
 import faiss
@@ -10,57 +12,157 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = "all-MiniLM-L6-v2"
+
 
 class EmbeddingService:
+    """Holds the sentence-transformer model and the FAISS index.
+
+    One instance is shared per process (see get_embedding_service). The index and
+    its metadata are swapped together under a lock, so searches always see a
+    consistent pair while rebuild_index/reload replace them.
+    """
+
     def __init__(self) -> None:
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
+        started = time.perf_counter()
+        self.model = SentenceTransformer(MODEL_NAME)
         self.index_path = Path(settings.faiss_index_path)
         self.meta_path = Path(settings.faiss_metadata_path)
         self.index: faiss.Index | None = None
         self.metadata: list[dict] = []
+        self._lock = threading.Lock()
+        self._timings: dict[str, float | int | None] = {
+            "model_load_ms": round((time.perf_counter() - started) * 1000, 1),
+            "index_load_ms": None,
+            "first_query_ms": None,
+            "last_query_ms": None,
+            "avg_query_ms": None,
+            "queries": 0,
+        }
+        logger.info("Embedding model loaded in %.0f ms", self._timings["model_load_ms"])
 
     def embed(self, texts: list[str]) -> np.ndarray:
         return np.array(self.model.encode(texts, show_progress_bar=False)).astype("float32")
 
+    def _swap(self, index: faiss.Index | None, metadata: list[dict]) -> None:
+        with self._lock:
+            self.index = index
+            self.metadata = metadata
+
+    def _snapshot(self) -> tuple[faiss.Index | None, list[dict]]:
+        with self._lock:
+            return self.index, self.metadata
+
     def build_index(self, texts: list[str], metadata: list[dict]) -> None:
         if not texts:
-            self.index = faiss.IndexFlatIP(384)
-            self.metadata = []
+            # Saved too: other processes reload this index when told it was rebuilt.
+            self._swap(faiss.IndexFlatIP(384), [])
+            self.save()
             return
         vectors = self.embed(texts)
         faiss.normalize_L2(vectors)
-        self.index = faiss.IndexFlatIP(vectors.shape[1])
-        self.index.add(vectors)
-        self.metadata = metadata
+        index = faiss.IndexFlatIP(vectors.shape[1])
+        index.add(vectors)
+        self._swap(index, metadata)
         self.save()
 
     def save(self) -> None:
-        if not self.index:
+        index, metadata = self._snapshot()
+        if index is None:
             return
         self.index_path.parent.mkdir(parents=True, exist_ok=True)
-        faiss.write_index(self.index, str(self.index_path))
-        self.meta_path.write_text(json.dumps(self.metadata, ensure_ascii=False, indent=2))
+        faiss.write_index(index, str(self.index_path))
+        self.meta_path.write_text(json.dumps(metadata, ensure_ascii=False, indent=2))
         logger.info("FAISS index saved: %s", self.index_path)
 
     def load(self) -> None:
         if self.index_path.exists() and self.meta_path.exists():
-            self.index = faiss.read_index(str(self.index_path))
-            self.metadata = json.loads(self.meta_path.read_text())
-            logger.info("FAISS index loaded: %s", self.index_path)
+            started = time.perf_counter()
+            index = faiss.read_index(str(self.index_path))
+            metadata = json.loads(self.meta_path.read_text())
+            self._swap(index, metadata)
+            self._timings["index_load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            logger.info(
+                "FAISS index loaded: %s (%d entries, %.0f ms)",
+                self.index_path,
+                len(metadata),
+                self._timings["index_load_ms"],
+            )
 
     def search(self, query: str, top_k: int = 5) -> list[dict]:
-        if not self.index:
+        index, metadata = self._snapshot()
+        if not index:
             self.load()
-        if not self.index:
+            index, metadata = self._snapshot()
+        if not index:
             return []
+        started = time.perf_counter()
         vector = self.embed([query])
         faiss.normalize_L2(vector)
-        scores, indices = self.index.search(vector, top_k)
+        scores, indices = index.search(vector, top_k)
         results: list[dict] = []
         for idx, score in zip(indices[0], scores[0], strict=False):
             if idx == -1:
                 continue
-            record = self.metadata[idx].copy()
+            record = metadata[idx].copy()
             record["score"] = float(score)
             results.append(record)
+        self._record_query((time.perf_counter() - started) * 1000)
         return results
+
+    def _record_query(self, elapsed_ms: float) -> None:
+        with self._lock:
+            timings = self._timings
+            if timings["first_query_ms"] is None:
+                timings["first_query_ms"] = round(elapsed_ms, 1)
+                logger.info("First RAG query took %.0f ms", elapsed_ms)
+            else:
+                # Steady-state average excludes the first (cold) query.
+                steady = timings["queries"] - 1
+                prev = timings["avg_query_ms"] or 0.0
+                timings["avg_query_ms"] = round((prev * steady + elapsed_ms) / (steady + 1), 2)
+            timings["last_query_ms"] = round(elapsed_ms, 2)
+            timings["queries"] += 1
+
+    def stats(self) -> dict:
+        index, _ = self._snapshot()
+        with self._lock:
+            return {
+                **self._timings,
+                "index_entries": int(index.ntotal) if index is not None else 0,
+            }
+
+
+_shared_service: EmbeddingService | None = None
+_shared_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Process-wide EmbeddingService; the model and index are loaded only once."""
+    global _shared_service
+    if _shared_service is None:
+        with _shared_lock:
+            if _shared_service is None:
+                _shared_service = EmbeddingService()
+    return _shared_service
+
+
+def reload_index() -> bool:
+    """Reload the saved index into this process's service, if it has one; a
+    process that has not loaded the model yet reads the new file on first use."""
+    service = _shared_service
+    if service is None:
+        return False
+    service.load()
+    return True
+
+
+def warm_up() -> dict:
+    """Load the model and index and run one query so the first user request is warm."""
+    started = time.perf_counter()
+    service = get_embedding_service()
+    service.load()
+    service.search("restaurant discount Karachi", top_k=1)
+    elapsed = (time.perf_counter() - started) * 1000
+    logger.info("RAG warm-up finished in %.0f ms", elapsed)
+    return {"warm_up_ms": round(elapsed, 1), **service.stats()}
@@ -0,0 +1,132 @@
+"""Every API worker's LISTEN side of app/db/events.py.
+
+One pooled connection per worker LISTENs on the events channel:
+
+- generation bumped: the worker takes the new generation, so its response and
+  count caches drop their entries on the next lookup and known_generation
+  stops polling while the listener is connected;
+- index rebuilt: the worker reloads the saved FAISS index;
+- scrape started/finished: logged and counted (the job itself is in scrape_jobs).
+
+Notifications sent while the connection is down are lost, so every
+(re)connect re-reads the generation and a reconnect also reloads the index.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+
+from app.core.config import settings
+from app.db.deal_search import current_generation, note_generation, set_generation_pushed
+from app.db.events import (
+    CHANNEL,
+    GENERATION_BUMPED,
+    INDEX_REBUILT,
+    SCRAPE_FINISHED,
+    SCRAPE_STARTED,
+)
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+# Without traffic, check the connection this often so a dead one is replaced.
+_KEEPALIVE_SECONDS = 60.0
+_RECONNECT_MAX_SECONDS = 30.0
+
+_received: Counter = Counter()
+_state = {"connected": False, "connects": 0, "last_event": None, "last_event_at": None}
+
+
+async def _reload_index() -> None:
+    if settings.skip_rag:
+        return
+    from app.services.embeddings import reload_index
+
+    try:
+        if await asyncio.to_thread(reload_index):
+            logger.info("Reloaded FAISS index after a rebuild elsewhere")
+    except Exception as exc:
+        logger.warning("FAISS index reload failed: %s", exc)
+
+
+async def _handle(payload: str) -> None:
+    try:
+        event = json.loads(payload)
+        kind = event["event"]
+    except (ValueError, TypeError, KeyError):
+        logger.warning("Ignoring malformed event: %r", payload[:200])
+        return
+    _received[kind] += 1
+    _state["last_event"] = kind
+    _state["last_event_at"] = time.time()
+    if kind == GENERATION_BUMPED:
+        note_generation(int(event["generation"]))
+    elif kind == INDEX_REBUILT:
+        await _reload_index()
+    elif kind in (SCRAPE_STARTED, SCRAPE_FINISHED):
+        logger.info(
+            "Scrape job %s %s (%s)",
+            event.get("job_id"),
+            "started" if kind == SCRAPE_STARTED else event.get("status"),
+            event.get("origin"),
+        )
+
+
+async def _listen_once() -> None:
+    """LISTEN until the connection is lost (returns) or the task is cancelled."""
+    queue: asyncio.Queue[str | None] = asyncio.Queue()
+    async with engine.connect() as conn:
+        raw = (await conn.get_raw_connection()).driver_connection
+        try:
+            raw.add_termination_listener(lambda _conn: queue.put_nowait(None))
+            await raw.add_listener(
+                CHANNEL, lambda _conn, _pid, _channel, payload: queue.put_nowait(payload)
+            )
+            note_generation(await current_generation(conn))
+            # Notifications only arrive outside a transaction.
+            await conn.commit()
+            reconnect = _state["connects"] > 0
+            _state["connects"] += 1
+            _state["connected"] = True
+            set_generation_pushed(True)
+            logger.info("Listening for events on %s", CHANNEL)
+            if reconnect:
+                await _reload_index()
+            while True:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), _KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    await raw.fetchval("SELECT 1")
+                    continue
+                if payload is None:
+                    logger.warning("Event connection closed")
+                    return
+                await _handle(payload)
+        finally:
+            _state["connected"] = False
+            set_generation_pushed(False)
+            # Never hand a connection with LISTEN state back to the pool.
+            await conn.invalidate()
+
+
+async def listen_for_events() -> None:
+    """Run for the worker's lifetime (cancel to stop), reconnecting with backoff."""
+    delay = 1.0
+    while True:
+        started = time.monotonic()
+        try:
+            await _listen_once()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("Event listener failed: %s", exc)
+        if time.monotonic() - started > _RECONNECT_MAX_SECONDS:
+            delay = 1.0
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, _RECONNECT_MAX_SECONDS)
+
+
+def event_listener_stats() -> dict:
+    return {**_state, "received": dict(_received)}
@@ -0,0 +1,272 @@
+"""Persistent fetch cache for scraped bank pages and PDFs.
+
+Per URL it stores ETag, Last-Modified and the SHA-256 of the last body so the
+scraper can send conditional requests. Parse results are keyed by content hash
+and parser version: the extracted page text (and Peekaboo base) by (hash,
+parser version), the _extract_deals_from_text output by (hash, bank, parser
+version). Unchanged pages therefore skip BeautifulSoup/PDF
+extraction and deal parsing entirely. Stored text and deals are evicted least
+recently used once the cache grows past FETCH_CACHE_MAX_MB.
+
+The methods do blocking sqlite I/O; async callers run them in a thread
+(asyncio.to_thread) so they don't stall the event loop.
+
+It also keeps each Peekaboo host's SDK config (owner key, domain, version,
+page limit, country), which otherwise costs a landing page plus several JS
+bundles per bank and scrape.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fetches (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    sha256 TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS page_texts (
+    sha256 TEXT NOT NULL,
+    parser_version TEXT NOT NULL,
+    text TEXT NOT NULL,
+    peekaboo_base TEXT,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (sha256, parser_version)
+);
+CREATE TABLE IF NOT EXISTS page_deals (
+    sha256 TEXT NOT NULL,
+    bank_name TEXT NOT NULL,
+    parser_version TEXT NOT NULL,
+    deals TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (sha256, bank_name, parser_version)
+);
+CREATE TABLE IF NOT EXISTS peekaboo_configs (
+    host TEXT PRIMARY KEY,
+    config TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_page_texts_last_used ON page_texts (last_used);
+CREATE INDEX IF NOT EXISTS ix_page_deals_last_used ON page_deals (last_used);
+"""
+
+
+@dataclass
+class CachedFetch:
+    etag: str | None
+    last_modified: str | None
+    sha256: str
+    content_type: str
+
+
+class FetchCache:
+    def __init__(self, path: str, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(page_texts)")}
+        if columns and "parser_version" not in columns:
+            # Texts cached before they were keyed by parser version: re-derived on use.
+            self._conn.execute("DROP TABLE page_texts")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        # Running total of stored text and deal sizes, so puts don't rescan.
+        self._bytes = self._size()
+        self._stats = {
+            "not_modified": 0,
+            "text_hits": 0,
+            "text_misses": 0,
+            "deal_hits": 0,
+            "deal_misses": 0,
+            "evictions": 0,
+            "config_hits": 0,
+            "config_misses": 0,
+            "config_invalidations": 0,
+        }
+
+    def _count(self, key: str) -> None:
+        self._stats[key] += 1
+
+    def get_fetch(self, url: str) -> CachedFetch | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, sha256, content_type FROM fetches WHERE url = ?",
+                (url,),
+            ).fetchone()
+        return CachedFetch(*row) if row else None
+
+    def conditional_headers(self, cached: CachedFetch | None) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+        return headers
+
+    def record_not_modified(self) -> None:
+        with self._lock:
+            self._count("not_modified")
+
+    def put_fetch(
+        self,
+        url: str,
+        etag: str | None,
+        last_modified: str | None,
+        sha256: str,
+        content_type: str,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fetches VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, sha256, content_type, time.time()),
+            )
+
+    def get_text(self, sha256: str, parser_version: str) -> tuple[str, str | None] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, peekaboo_base FROM page_texts "
+                "WHERE sha256 = ? AND parser_version = ?",
+                (sha256, parser_version),
+            ).fetchone()
+            self._count("text_hits" if row else "text_misses")
+            if row:
+                self._conn.execute(
+                    "UPDATE page_texts SET last_used = ? WHERE sha256 = ? AND parser_version = ?",
+                    (time.time(), sha256, parser_version),
+                )
+        return (row[0], row[1]) if row else None
+
+    def put_text(
+        self, sha256: str, parser_version: str, text: str, peekaboo_base: str | None
+    ) -> None:
+        size = len(text.encode("utf-8"))
+        with self._lock:
+            replaced = self._conn.execute(
+                "SELECT size FROM page_texts WHERE sha256 = ? AND parser_version = ?",
+                (sha256, parser_version),
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO page_texts VALUES (?, ?, ?, ?, ?, ?)",
+                (sha256, parser_version, text, peekaboo_base, size, time.time()),
+            )
+            self._bytes += size - (replaced[0] if replaced else 0)
+            self._evict()
+
+    def get_deals(self, sha256: str, bank_name: str, parser_version: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT deals FROM page_deals WHERE sha256 = ? AND bank_name = ? AND parser_version = ?",
+                (sha256, bank_name, parser_version),
+            ).fetchone()
+            self._count("deal_hits" if row else "deal_misses")
+            if row:
+                self._conn.execute(
+                    "UPDATE page_deals SET last_used = ? "
+                    "WHERE sha256 = ? AND bank_name = ? AND parser_version = ?",
+                    (time.time(), sha256, bank_name, parser_version),
+                )
+        return row[0] if row else None
+
+    def put_deals(self, sha256: str, bank_name: str, parser_version: str, deals_json: str) -> None:
+        with self._lock:
+            replaced = self._conn.execute(
+                "SELECT size FROM page_deals WHERE sha256 = ? AND bank_name = ? AND parser_version = ?",
+                (sha256, bank_name, parser_version),
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO page_deals VALUES (?, ?, ?, ?, ?, ?)",
+                (sha256, bank_name, parser_version, deals_json, len(deals_json), time.time()),
+            )
+            self._bytes += len(deals_json) - (replaced[0] if replaced else 0)
+            self._evict()
+
+    def get_peekaboo_config(self, host: str, max_age_seconds: float) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT config FROM peekaboo_configs WHERE host = ? AND fetched_at >= ?",
+                (host, time.time() - max_age_seconds),
+            ).fetchone()
+            self._count("config_hits" if row else "config_misses")
+        return json.loads(row[0]) if row else None
+
+    def put_peekaboo_config(self, host: str, config: dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO peekaboo_configs VALUES (?, ?, ?)",
+                (host, json.dumps(config), time.time()),
+            )
+
+    def drop_peekaboo_config(self, host: str) -> None:
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM peekaboo_configs WHERE host = ?", (host,)
+            ).rowcount
+            if deleted:
+                self._count("config_invalidations")
+
+    def _size(self) -> int:
+        texts = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM page_texts").fetchone()[0]
+        deals = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM page_deals").fetchone()[0]
+        return int(texts) + int(deals)
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits max_bytes."""
+        while self._bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT 'page_texts', rowid, size, last_used FROM page_texts "
+                "UNION ALL SELECT 'page_deals', rowid, size, last_used FROM page_deals "
+                "ORDER BY last_used LIMIT 100"
+            ).fetchall()
+            if not rows:
+                break
+            for table, rowid, size, _ in rows:
+                self._conn.execute(f"DELETE FROM {table} WHERE rowid = ?", (rowid,))
+                self._count("evictions")
+                self._bytes -= size
+                if self._bytes <= self.max_bytes:
+                    break
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = {
+                "texts": self._conn.execute("SELECT COUNT(*) FROM page_texts").fetchone()[0],
+                "deal_sets": self._conn.execute("SELECT COUNT(*) FROM page_deals").fetchone()[0],
+                "urls": self._conn.execute("SELECT COUNT(*) FROM fetches").fetchone()[0],
+                "peekaboo_configs": self._conn.execute(
+                    "SELECT COUNT(*) FROM peekaboo_configs"
+                ).fetchone()[0],
+            }
+            return {**self._stats, **entries, "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+_cache: FetchCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_fetch_cache() -> FetchCache | None:
+    """Process-wide cache, or None when FETCH_CACHE_ENABLED is false."""
+    global _cache
+    if not settings.fetch_cache_enabled:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = FetchCache(
+                    settings.fetch_cache_path, int(settings.fetch_cache_max_mb * 1024 * 1024)
+                )
+    return _cache
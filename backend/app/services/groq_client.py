@@ -1,9 +1,9 @@
 import logging
 
-import httpx
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from app.core.config import settings
+from app.services.http_client import get_client
 
 logger = logging.getLogger(__name__)
 
@@ -11,20 +11,27 @@ logger = logging.getLogger(__name__)
 class GroqClient:
     def __init__(self) -> None:
         self.api_key = settings.groq_api_key
-        self.base_url = "https://api.groq.com/openai/v1/chat/completions"
+        self.base_url = f"{settings.groq_base_url.rstrip('/')}/chat/completions"
         self.model = "openai/gpt-oss-120b"
 
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=8))
-    async def chat(self, messages: list[dict], temperature: float = 0.2) -> str:
+    async def chat(
+        self,
+        messages: list[dict],
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        json_mode: bool = False,
+    ) -> str:
         headers = {"Authorization": f"Bearer {self.api_key}"}
         payload = {
             "model": self.model,
             "messages": messages,
             "temperature": temperature,
-            "max_tokens": 512,
+            "max_tokens": max_tokens,
         }
-        async with httpx.AsyncClient(timeout=60) as client:
-            response = await client.post(self.base_url, json=payload, headers=headers)
-            response.raise_for_status()
-            data = response.json()
+        if json_mode:
+            payload["response_format"] = {"type": "json_object"}
+        response = await get_client("groq").post(self.base_url, json=payload, headers=headers)
+        response.raise_for_status()
+        data = response.json()
         return data["choices"][0]["message"]["content"]
@@ -0,0 +1,196 @@
+"""Batched Groq cleanup of garbled scraped deal text.
+
+Raw `conditions` strings are packed into one JSON-array prompt per
+GROQ_BATCH_SIZE texts, batches run GROQ_CONCURRENCY at a time, and requests are
+paced to GROQ_REQUESTS_PER_MINUTE across all banks. Answers are memoized in a
+SQLite file keyed by the SHA-256 of the raw text, so a garbled line seen in an
+earlier run costs no request.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from app.core.config import settings
+from app.services.groq_client import GroqClient
+from app.services.rate_limit import HostRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Bump when the prompt or expected fields change so cached answers are not reused.
+PROMPT_VERSION = "1"
+
+_SYSTEM_PROMPT = "You output JSON only."
+_USER_PROMPT = (
+    "You clean scraped bank discount text into structured fields.\n"
+    "Input is a JSON array of objects with keys id and text.\n"
+    'Return a JSON object {{"results": [...]}} with one entry per input, each with keys: '
+    "id, merchant_name, category, city, conditions.\n"
+    "Use category values like Food, Retail, Fashion, Travel, Medical, Electronics, Grocery, Entertainment.\n"
+    "Use Pakistan city names when possible. If unknown, keep city empty.\n\n"
+    "Bank: {bank}\n"
+    "Input: {items}\n"
+)
+# Output tokens budgeted per text in a batch, plus a fixed allowance for the wrapper.
+_TOKENS_PER_ITEM = 120
+_TOKENS_BASE = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS normalizations (
+    sha256 TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (sha256, prompt_version)
+);
+"""
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class NormalizationCache:
+    def __init__(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def get_many(self, hashes: list[str]) -> dict[str, dict]:
+        found: dict[str, dict] = {}
+        with self._lock:
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start : start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT sha256, result FROM normalizations "
+                    f"WHERE prompt_version = ? AND sha256 IN ({marks})",
+                    (PROMPT_VERSION, *chunk),
+                ).fetchall()
+                found.update((sha256, json.loads(result)) for sha256, result in rows)
+        return found
+
+    def put_many(self, results: dict[str, dict]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO normalizations VALUES (?, ?, ?, ?)",
+                [
+                    (sha256, PROMPT_VERSION, json.dumps(result), now)
+                    for sha256, result in results.items()
+                ],
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM normalizations").fetchone()[0]
+        return {"entries": entries, "prompt_version": PROMPT_VERSION}
+
+
+_cache: NormalizationCache | None = None
+_cache_lock = threading.Lock()
+_groq = GroqClient()
+_groq_limiter = HostRateLimiter(settings.groq_requests_per_minute / 60)
+
+
+def get_normalization_cache() -> NormalizationCache | None:
+    """Process-wide cache, or None when GROQ_CACHE_ENABLED is false."""
+    global _cache
+    if not settings.groq_cache_enabled:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = NormalizationCache(settings.groq_cache_path)
+    return _cache
+
+
+def _parse_results(response: str) -> list[dict]:
+    payload = json.loads(response)
+    if isinstance(payload, dict):
+        payload = payload.get("results", [])
+    return [item for item in payload if isinstance(item, dict)] if isinstance(payload, list) else []
+
+
+async def _normalize_batch(
+    bank_name: str, batch: list[tuple[str, str]], slots: asyncio.Semaphore
+) -> dict[str, dict]:
+    """One Groq request for a batch of (hash, text); returns answers by hash."""
+    items = [{"id": idx, "text": text} for idx, (_, text) in enumerate(batch)]
+    prompt = _USER_PROMPT.format(bank=bank_name, items=json.dumps(items, ensure_ascii=False))
+    async with slots:
+        await _groq_limiter.wait(_groq.base_url)
+        try:
+            response = await _groq.chat(
+                [
+                    {"role": "system", "content": _SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0.1,
+                max_tokens=_TOKENS_BASE + _TOKENS_PER_ITEM * len(batch),
+                json_mode=True,
+            )
+            results = _parse_results(response)
+        except Exception as exc:
+            logger.warning("Groq normalization failed for %d texts: %s", len(batch), exc)
+            return {}
+
+    answers: dict[str, dict] = {}
+    for item in results:
+        # Models sometimes echo the id as a string ("3").
+        try:
+            idx = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        if 0 <= idx < len(batch):
+            answers[batch[idx][0]] = {
+                key: str(item.get(key) or "")
+                for key in ("merchant_name", "category", "city", "conditions")
+            }
+    return answers
+
+
+async def normalize_texts(bank_name: str, texts: list[str]) -> list[dict | None]:
+    """Structured fields (merchant_name, category, city, conditions) for each raw
+    text, or None where Groq gave no answer. Cached texts are not sent again."""
+    if not texts:
+        return []
+    hashes = [text_hash(text) for text in texts]
+    cache = get_normalization_cache()
+    answers = cache.get_many(list(set(hashes))) if cache else {}
+
+    pending: dict[str, str] = {}
+    for sha256, text in zip(hashes, texts):
+        if sha256 not in answers:
+            pending.setdefault(sha256, text)
+    if pending:
+        started = time.perf_counter()
+        items = list(pending.items())
+        size = max(settings.groq_batch_size, 1)
+        slots = asyncio.Semaphore(max(settings.groq_concurrency, 1))
+        batches = [items[start : start + size] for start in range(0, len(items), size)]
+        fresh: dict[str, dict] = {}
+        for result in await asyncio.gather(
+            *(_normalize_batch(bank_name, batch, slots) for batch in batches)
+        ):
+            fresh.update(result)
+        if cache and fresh:
+            cache.put_many(fresh)
+        answers.update(fresh)
+        logger.info(
+            "%s: Groq normalized %d/%d new texts in %d batches (%.1fs), %d cached",
+            bank_name,
+            len(fresh),
+            len(pending),
+            len(batches),
+            time.perf_counter() - started,
+            len(set(hashes)) - len(pending),
+        )
+    return [answers.get(sha256) for sha256 in hashes]
@@ -0,0 +1,190 @@
+"""Application-scoped httpx clients with keep-alive pools.
+
+One client per name ("scraper", "groq", "serp") and event loop, so connections
+and TLS sessions are reused across pages, script bundles and LLM calls. Clients
+are created at startup and closed at shutdown (see app.main); scripts that run
+their own loop call close_http_clients() before exiting.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import time
+import weakref
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Callable
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CLIENT_TIMEOUTS = {"scraper": 60.0, "groq": 60.0, "serp": 30.0}
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+_metrics: dict[str, dict[str, int]] = defaultdict(
+    lambda: {"requests": 0, "connections_opened": 0, "tls_handshakes": 0}
+)
+_transport_factory: Callable[[], httpx.AsyncBaseTransport] | None = None
+# Called with (body bytes, seconds from send to body closed) for each response in
+# the current context; scrape telemetry sets it per bank.
+response_observer: ContextVar[Callable[[int, float], None] | None] = ContextVar(
+    "response_observer", default=None
+)
+
+
+def _observe(nbytes: int, started: float) -> None:
+    observer = response_observer.get()
+    if observer is not None:
+        observer(nbytes, time.perf_counter() - started)
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body wrapper that frees the host slot once the body is closed
+    and reports the body size to the response observer."""
+
+    def __init__(
+        self, stream: httpx.AsyncByteStream, release: Callable[[], None], started: float
+    ) -> None:
+        self._stream = stream
+        self._release = release
+        self._started = started
+        self._nbytes = 0
+        self._released = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._nbytes += len(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+                _observe(self._nbytes, self._started)
+
+
+class HostLimitedTransport(httpx.AsyncBaseTransport):
+    """Caps in-flight requests (and so pooled connections) per host."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, per_host: int) -> None:
+        self._transport = transport
+        self._slots: dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(max(per_host, 1))
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        slot = self._slots[request.url.host]
+        await slot.acquire()
+        started = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            slot.release()
+            raise
+        if isinstance(response.stream, httpx.ByteStream):
+            # Body already in memory (mock/replay transports): httpx never closes
+            # these streams, so the slot is free as soon as the response exists.
+            slot.release()
+            _observe(len(response.content), started)
+            return response
+        response.stream = _ReleasingStream(response.stream, slot.release, started)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _http2_enabled() -> bool:
+    if not settings.http2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP2=true but the h2 package is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+def _trace_hook(name: str):
+    stats = _metrics[name]
+
+    async def trace(event: str, info: dict) -> None:
+        if event == "connection.connect_tcp.complete":
+            stats["connections_opened"] += 1
+        elif event == "connection.start_tls.complete":
+            stats["tls_handshakes"] += 1
+
+    async def on_request(request: httpx.Request) -> None:
+        stats["requests"] += 1
+        request.extensions["trace"] = trace
+
+    return on_request
+
+
+def _build_client(name: str) -> httpx.AsyncClient:
+    if _transport_factory is not None:
+        inner = _transport_factory()
+    else:
+        inner = httpx.AsyncHTTPTransport(
+            http2=_http2_enabled(),
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry_seconds,
+            ),
+        )
+    return httpx.AsyncClient(
+        timeout=CLIENT_TIMEOUTS.get(name, 60.0),
+        follow_redirects=True,
+        transport=HostLimitedTransport(inner, settings.http_max_connections_per_host),
+        event_hooks={"request": [_trace_hook(name)]},
+    )
+
+
+def get_client(name: str = "scraper") -> httpx.AsyncClient:
+    """Shared client for the running event loop; created on first use."""
+    loop = asyncio.get_running_loop()
+    clients = _clients.setdefault(loop, {})
+    client = clients.get(name)
+    if client is None or client.is_closed:
+        client = _build_client(name)
+        clients[name] = client
+    return client
+
+
+def init_http_clients() -> None:
+    for name in CLIENT_TIMEOUTS:
+        get_client(name)
+    logger.info("HTTP clients ready (http2=%s)", _http2_enabled())
+
+
+async def close_http_clients() -> None:
+    clients = _clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+
+def set_transport_factory(factory: Callable[[], httpx.AsyncBaseTransport] | None) -> None:
+    """Route every client through a custom transport (e.g. httpx.MockTransport or a
+    transport pointed at a local stand-in server). Existing clients are rebuilt lazily."""
+    global _transport_factory
+    _transport_factory = factory
+    for clients in list(_clients.values()):
+        clients.clear()
+
+
+def http_metrics() -> dict[str, dict[str, int]]:
+    """Requests, new connections and TLS handshakes per client since startup."""
+    result = {}
+    for name, stats in _metrics.items():
+        result[name] = {
+            **stats,
+            "reused_connections": max(stats["requests"] - stats["connections_opened"], 0),
+        }
+    return result
@@ -0,0 +1,61 @@
+"""Process pool for CPU-bound scrape parsing (BeautifulSoup/lxml, PyPDF2, deal regexes).
+
+Keeps the API event loop responsive when the scraper runs in-process (startup
+bootstrap, /admin/trigger-scrape, the scheduler). PARSE_WORKERS=0 parses inline.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor | None:
+    global _executor
+    if settings.parse_workers <= 0:
+        return None
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn: workers must not inherit the API's threads, sockets or event loop.
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.parse_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info("Parse pool started with %d workers", settings.parse_workers)
+    return _executor
+
+
+async def run_parse(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a picklable, module-level parse function in the pool (or inline)."""
+    global _executor
+    executor = _get_executor()
+    if executor is None:
+        return fn(*args)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM on a huge PDF); start a fresh pool for the next page.
+        with _executor_lock:
+            if _executor is executor:
+                _executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+
+
+def shutdown_parse_pool() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -1,37 +1,35 @@
+import asyncio
 import logging
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import Bank, Card, Discount, Merchant
-from app.services.embeddings import EmbeddingService
+from app.db.deal_search import deal_search
+from app.db.events import INDEX_REBUILT, publish
+from app.services.embeddings import get_embedding_service
 
 logger = logging.getLogger(__name__)
 
 
 class RAGService:
     def __init__(self) -> None:
-        self.embedding_service = EmbeddingService()
+        self.embedding_service = get_embedding_service()
 
     async def rebuild_index(self, session: AsyncSession) -> int:
-        query = (
-            select(
-                Discount.id.label("discount_id"),
-                Discount.discount_percent,
-                Discount.conditions,
-                Discount.valid_from,
-                Discount.valid_to,
-                Merchant.name.label("merchant_name"),
-                Merchant.city.label("merchant_city"),
-                Merchant.category.label("merchant_category"),
-                Card.name.label("card_name"),
-                Card.type.label("card_type"),
-                Card.tier.label("card_tier"),
-                Bank.name.label("bank_name"),
-            )
-            .join(Merchant, Discount.merchant_id == Merchant.id)
-            .join(Card, Discount.card_id == Card.id)
-            .join(Bank, Card.bank_id == Bank.id)
+        ds = deal_search.c
+        query = select(
+            ds.discount_id,
+            ds.discount_percent,
+            ds.conditions,
+            ds.valid_from,
+            ds.valid_to,
+            ds.merchant.label("merchant_name"),
+            ds.city.label("merchant_city"),
+            ds.category.label("merchant_category"),
+            ds.card_name,
+            ds.card_type,
+            ds.card_tier,
+            ds.bank.label("bank_name"),
         )
         result = await session.execute(query)
         rows = result.all()
@@ -61,8 +59,12 @@ class RAGService:
                     "valid_to": row.valid_to.isoformat() if row.valid_to else None,
                 }
             )
-        self.embedding_service.build_index(texts, metadata)
+        # Encode off the event loop; the shared index is swapped in when done.
+        await asyncio.to_thread(self.embedding_service.build_index, texts, metadata)
         logger.info("Rebuilt FAISS index with %s entries", len(texts))
+        # Other processes reload the saved index.
+        await publish(session, INDEX_REBUILT, entries=len(texts))
+        await session.commit()
         return len(texts)
 
     def search(self, query: str, top_k: int = 5) -> list[dict]:
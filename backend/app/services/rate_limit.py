@@ -0,0 +1,227 @@
+"""Per-host request pacing for scrapers that share an upstream (e.g. all Peekaboo banks).
+
+HostRateLimiter spaces requests at a fixed rate. AdaptiveHostLimiter adapts
+the rate to how each host is coping and stops sending to hosts that keep failing.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Cleared for archive replays, where every response is local.
+_pacing_enabled = True
+
+
+def set_pacing(enabled: bool) -> None:
+    """Turn request pacing on or off for every limiter in the process."""
+    global _pacing_enabled
+    _pacing_enabled = enabled
+
+
+def host_of(url: str) -> str:
+    return (urlsplit(url).hostname or url).lower()
+
+
+class HostRateLimiter:
+    """Spaces requests to the same host at least 1/rate seconds apart.
+    A rate of 0 disables pacing. Safe to share across tasks on one event loop."""
+
+    def __init__(self, requests_per_second: float) -> None:
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot: dict[str, float] = {}
+
+    async def wait(self, url: str) -> None:
+        if not self.interval or not _pacing_enabled:
+            return
+        host = host_of(url)
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class HostCircuitOpen(Exception):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+    def __init__(self, host: str, retry_in: float) -> None:
+        super().__init__(f"{host} skipped for {retry_in:.0f}s after repeated failures")
+        self.host = host
+        self.retry_in = retry_in
+
+
+@dataclass
+class _HostState:
+    rate: float  # current requests/s; 0 = unpaced
+    ceiling: float
+    tokens: float = 1.0
+    refilled_at: float = field(default_factory=time.monotonic)
+    blocked_until: float = 0.0  # Retry-After from a 429
+    failures: int = 0  # consecutive
+    open_until: float = 0.0
+    probing: bool = False
+    requests: int = 0
+    errors: int = 0
+    throttled: int = 0
+    skipped: int = 0
+    circuit_opens: int = 0
+    latency_ms_total: float = 0.0
+    latency_ms_max: float = 0.0
+
+
+class AdaptiveHostLimiter:
+    """Token bucket per host with AIMD rate adaptation and a circuit breaker.
+
+    Each host starts at its ceiling (ceiling_for(host) requests/s; 0 = unpaced).
+    The bucket holds one token, so requests are spaced 1/rate apart. A 429, a
+    5xx or a transport error (timeout, refused connection) multiplies the rate
+    by backoff_factor, down to min_rate; every other response adds
+    recovery_step back, up to the ceiling. A 429's Retry-After holds the host
+    for that long. After breaker_failures failures in a row the host's circuit
+    opens: requests raise HostCircuitOpen for cooldown seconds, then a single
+    probe request decides whether it closes again."""
+
+    def __init__(
+        self,
+        ceiling_for: Callable[[str], float],
+        min_rate: float,
+        backoff_factor: float,
+        recovery_step: float,
+        breaker_failures: int,
+        cooldown: float,
+    ) -> None:
+        self._ceiling_for = ceiling_for
+        self.min_rate = min_rate
+        self.backoff_factor = backoff_factor
+        self.recovery_step = recovery_step
+        self.breaker_failures = max(breaker_failures, 1)
+        self.cooldown = cooldown
+        self._hosts: dict[str, _HostState] = {}
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            ceiling = max(self._ceiling_for(host), 0.0)
+            state = self._hosts[host] = _HostState(rate=ceiling, ceiling=ceiling)
+        return state
+
+    async def _acquire(self, host: str, state: _HostState) -> None:
+        now = time.monotonic()
+        if state.open_until:
+            if now < state.open_until or state.probing:
+                state.skipped += 1
+                raise HostCircuitOpen(host, max(state.open_until - now, 0.0))
+            state.probing = True  # half-open: this request is the probe
+        if not _pacing_enabled:
+            return
+        wait = max(state.blocked_until - now, 0.0)
+        if state.rate > 0:
+            elapsed = now - state.refilled_at
+            state.tokens = min(1.0, state.tokens + elapsed * state.rate)
+            state.refilled_at = now
+            # Reserve a token; a negative balance is the queue of earlier callers.
+            state.tokens -= 1.0
+            if state.tokens < 0:
+                wait = max(wait, -state.tokens / state.rate)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _record(
+        self, host: str, state: _HostState, failed: bool, retry_after: float | None
+    ) -> None:
+        now = time.monotonic()
+        if failed:
+            state.errors += 1
+            state.failures += 1
+            if state.rate > 0:
+                state.rate = max(state.rate * self.backoff_factor, self.min_rate)
+            if retry_after:
+                hold = min(retry_after, self.cooldown)
+                state.blocked_until = max(state.blocked_until, now + hold)
+            if state.probing or state.failures >= self.breaker_failures:
+                state.open_until = now + self.cooldown
+                state.probing = False
+                state.circuit_opens += 1
+                logger.warning(
+                    "%s: circuit open for %.0fs after %d failures",
+                    host,
+                    self.cooldown,
+                    state.failures,
+                )
+            return
+        state.failures = 0
+        state.open_until = 0.0
+        state.probing = False
+        if state.rate > 0:
+            state.rate = min(state.rate + self.recovery_step, state.ceiling)
+
+    async def request(
+        self, client: httpx.AsyncClient, method: str, url: str, **kwargs
+    ) -> httpx.Response:
+        """client.request(method, url, **kwargs), paced and guarded per host."""
+        host = host_of(url)
+        state = self._state(host)
+        await self._acquire(host, state)
+        state.requests += 1
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            self._record(host, state, failed=True, retry_after=None)
+            raise
+        except BaseException:
+            state.probing = False
+            raise
+        finally:
+            latency_ms = (time.perf_counter() - started) * 1000
+            state.latency_ms_total += latency_ms
+            state.latency_ms_max = max(state.latency_ms_max, latency_ms)
+        status = response.status_code
+        if status == 429:
+            state.throttled += 1
+        failed = status == 429 or status >= 500
+        self._record(host, state, failed, _retry_after(response) if status == 429 else None)
+        return response
+
+    def stats(self) -> dict[str, dict]:
+        now = time.monotonic()
+        result = {}
+        for host, state in self._hosts.items():
+            if state.open_until and now < state.open_until:
+                circuit = "open"
+            elif state.open_until:
+                circuit = "half-open"
+            else:
+                circuit = "closed"
+            result[host] = {
+                "circuit": circuit,
+                "rate": round(state.rate, 3),
+                "ceiling": state.ceiling,
+                "requests": state.requests,
+                "errors": state.errors,
+                "throttled": state.throttled,
+                "skipped": state.skipped,
+                "circuit_opens": state.circuit_opens,
+                "latency_ms_mean": round(state.latency_ms_total / state.requests, 1)
+                if state.requests
+                else 0.0,
+                "latency_ms_max": round(state.latency_ms_max, 1),
+            }
+        return result
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None  # HTTP-date form; the AIMD backoff still applies
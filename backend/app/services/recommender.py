@@ -3,8 +3,23 @@ from __future__ import annotations
 from datetime import date
 
 from rapidfuzz import fuzz
+from sqlalchemy import Float, case, cast, func, literal
+from sqlalchemy.sql import ColumnElement
 
+from app.db.deal_search import deal_search
 
+# Share of each factor in the 0-100 deal score (rank_discounts and discount_score).
+WEIGHTS = {
+    "discount": 0.35,
+    "popularity": 0.15,
+    "location": 0.15,
+    "card": 0.15,
+    "validity": 0.10,
+    "intent": 0.10,
+}
+
+# deal_search.card_accessibility precomputes this (app/db/migrations.py, migration 7);
+# change both together.
 CARD_ACCESSIBILITY = {
     "debit": 1.0,
     "basic": 0.9,
@@ -69,17 +84,71 @@ def rank_discounts(
 
         discount_factor = min(discount.get("discount_percent", 0) / 100, 1.0)
         score = 100 * (
-            discount_factor * 0.35
-            + merchant_popularity * 0.15
-            + location_proximity * 0.15
-            + card_accessibility * 0.15
-            + validity_window * 0.10
-            + user_intent_match * 0.10
+            discount_factor * WEIGHTS["discount"]
+            + merchant_popularity * WEIGHTS["popularity"]
+            + location_proximity * WEIGHTS["location"]
+            + card_accessibility * WEIGHTS["card"]
+            + validity_window * WEIGHTS["validity"]
+            + user_intent_match * WEIGHTS["intent"]
         )
         discount["score"] = round(score, 2)
     return sorted(discounts, key=lambda x: x["score"], reverse=True)
 
 
+def discount_score(user_city: str | None, intent_words: list[str]) -> ColumnElement:
+    """rank_discounts' score as a SQL expression over deal_search, so a query can
+    ORDER BY it before LIMIT and every page continues the previous one.
+
+    The view precomputes discount factor, card accessibility and merchant
+    popularity. Validity is bucketed against today as in _validity_window.
+    Location is 1.0 when the user's city is part of the merchant's (the usual
+    partial_ratio match) and the 0.2 floor otherwise. Intent similarity is the
+    share of intent words found as word prefixes in the deal's search vector,
+    which, like token_set_ratio, is 1.0 when the deal mentions every word."""
+    ds = deal_search.c
+    today = func.current_date()
+    validity = case(
+        (ds.valid_to.is_(None), 0.6),
+        (ds.valid_to >= today + 60, 1.0),
+        (ds.valid_to >= today + 30, 0.8),
+        (ds.valid_to >= today + 7, 0.6),
+        else_=0.4,
+    )
+    if user_city:
+        location = case(
+            # No city (NULL or empty) is neutral, as in _location_proximity.
+            (func.coalesce(ds.city, "") == "", 0.5),
+            (ds.city.ilike(f"%{user_city}%"), 1.0),
+            else_=0.2,
+        )
+    else:
+        location = literal(0.5)
+    if intent_words:
+        found = sum(case((_matches(f"{word}:*"), 1), else_=0) for word in intent_words)
+        intent_match = func.greatest(0.3, found / float(len(intent_words)))
+    else:
+        intent_match = literal(0.4)
+    score = 100 * (
+        ds.discount_factor * WEIGHTS["discount"]
+        + ds.merchant_popularity * WEIGHTS["popularity"]
+        + location * WEIGHTS["location"]
+        + ds.card_accessibility * WEIGHTS["card"]
+        + validity * WEIGHTS["validity"]
+        + intent_match * WEIGHTS["intent"]
+    )
+    return cast(score, Float)
+
+
+def _matches(tsquery: str) -> ColumnElement:
+    return deal_search.c.search_vector.bool_op("@@")(func.to_tsquery("simple", tsquery))
+
+
+def matches_any_word(words: list[str]) -> ColumnElement:
+    """deal_search rows whose search vector contains any of words as a word prefix.
+    words must be plain letters/digits (tsquery syntax is not escaped)."""
+    return _matches(" | ".join(f"{word}:*" for word in words))
+
+
 def rank_cards(cards: list[dict]) -> list[dict]:
     for card in cards:
         total_discount_value = card.get("total_discount_value", 0.0)
@@ -0,0 +1,139 @@
+"""In-process cache of read endpoint responses.
+
+The deal data only changes when a scrape finishes, so GET /discounts, the
+discount filter endpoints, /banks and /admin/analytics cache their rendered
+JSON keyed by (route, normalized params, data generation). A new generation
+(app/db/deal_search.py) drops everything cached under older ones. Entries also
+expire after RESPONSE_CACHE_TTL_SECONDS, and the least recently used go once
+their bodies exceed RESPONSE_CACHE_MAX_MB. A hit costs no database query, except
+when the generation is due to be re-read.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.deal_search import known_generation
+
+
+class ResponseCache:
+    def __init__(self, max_bytes: int, ttl_seconds: float) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires_at, body)
+        self._entries: OrderedDict[tuple, tuple[float, bytes]] = OrderedDict()
+        self._bytes = 0
+        self._generation: int | None = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def _sync_generation(self, generation: int) -> None:
+        if self._generation is None or generation > self._generation:
+            if self._entries:
+                self._stats["invalidations"] += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._generation = generation
+
+    def _drop(self, key: tuple) -> None:
+        _, body = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def get(self, route: str, params: tuple, generation: int) -> bytes | None:
+        key = (route, params, generation)
+        with self._lock:
+            self._sync_generation(generation)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._drop(key)
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def put(self, route: str, params: tuple, generation: int, body: bytes) -> None:
+        key = (route, params, generation)
+        with self._lock:
+            # Built before a newer generation arrived: never served again.
+            if self._generation is not None and generation < self._generation:
+                return
+            if len(body) > self.max_bytes:
+                return
+            self._sync_generation(generation)
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, body)
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_ratio": round(self._stats["hits"] / lookups, 4) if lookups else None,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "generation": self._generation,
+            }
+
+
+_cache: ResponseCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache | None:
+    """Process-wide cache, or None when RESPONSE_CACHE_MAX_MB is 0."""
+    global _cache
+    if settings.response_cache_max_mb <= 0:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    int(settings.response_cache_max_mb * 1024 * 1024),
+                    settings.response_cache_ttl_seconds,
+                )
+    return _cache
+
+
+def _normalize(params: dict[str, Any]) -> tuple:
+    """Order-insensitive, with unset params (None or "") dropped."""
+    return tuple((name, value) for name, value in sorted(params.items()) if value not in (None, ""))
+
+
+async def cached_response(
+    session: AsyncSession,
+    route: str,
+    params: dict[str, Any],
+    build: Callable[[], Awaitable[Any]],
+) -> Response:
+    """build()'s result as JSON, from the cache when the same route and params
+    were answered under the current generation. params must hold everything
+    the response depends on, normalized the way the endpoint compares them
+    (e.g. lowercased for case-insensitive filters)."""
+    cache = get_response_cache()
+    if cache is None:
+        return JSONResponse(jsonable_encoder(await build()))
+    generation = await known_generation(session)
+    key = _normalize(params)
+    body = cache.get(route, key, generation)
+    if body is not None:
+        return Response(body, media_type="application/json", headers={"X-Cache": "hit"})
+    response = JSONResponse(jsonable_encoder(await build()), headers={"X-Cache": "miss"})
+    cache.put(route, key, generation, response.body)
+    return response
@@ -0,0 +1,192 @@
+"""Record/replay archive of raw scrape responses.
+
+Recording routes every shared HTTP client (bank pages, PDFs, Peekaboo config
+and entity pages, SERP, Groq) through a transport that stores each response in
+a deflate-compressed zip. Replaying serves the same responses from the zip with
+no network, so run_full_scrape re-runs extraction and sync_deals offline, e.g.
+after a parser change or as a reproducible end-to-end benchmark
+(scripts/scrape_archive.py).
+
+Requests are keyed by method, URL (without API keys) and body. A request seen
+twice keeps its last response. Both modes turn off the fetch cache and the
+Groq cache so every request reaches the transport; replay also turns off
+request pacing.
+"""
+
+import hashlib
+import json
+import logging
+import zipfile
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+from app.core.config import settings
+from app.services.http_client import set_transport_factory
+from app.services.rate_limit import set_pacing
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "index.json"
+# Query parameters never written to the archive or used in keys.
+SECRET_PARAMS = {"api_key", "key", "token"}
+# Bodies are stored decoded, so these no longer describe them.
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def _public_url(url: httpx.URL) -> str:
+    parts = urlsplit(str(url))
+    query = [
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name not in SECRET_PARAMS
+    ]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def request_key(request: httpx.Request) -> str:
+    digest = hashlib.sha256(f"{request.method} {_public_url(request.url)}\n".encode())
+    digest.update(request.content)
+    return digest.hexdigest()
+
+
+class ScrapeArchive:
+    """A zip of response bodies plus an index.json of status/headers per request key."""
+
+    def __init__(self, path: str, mode: str) -> None:
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown archive mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.index: dict[str, dict] = {}
+        self.misses = 0
+        if mode == "record":
+            self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+        else:
+            self._zip = zipfile.ZipFile(path, "r")
+            self.index = json.loads(self._zip.read(INDEX_NAME))
+
+    def put(self, request: httpx.Request, response: httpx.Response, body: bytes) -> None:
+        entry = f"bodies/{len(self._zip.infolist()):06d}"
+        self._zip.writestr(entry, body)
+        self.index[request_key(request)] = {
+            "method": request.method,
+            "url": _public_url(request.url),
+            "status": response.status_code,
+            "headers": [
+                [name, value]
+                for name, value in response.headers.multi_items()
+                if name.lower() not in DROPPED_HEADERS
+            ],
+            "body": entry,
+        }
+
+    def get(self, request: httpx.Request) -> httpx.Response | None:
+        meta = self.index.get(request_key(request))
+        if meta is None:
+            self.misses += 1
+            return None
+        return httpx.Response(
+            meta["status"],
+            headers=meta["headers"],
+            content=self._zip.read(meta["body"]),
+            request=request,
+        )
+
+    def close(self) -> None:
+        if self.mode == "record":
+            self._zip.writestr(INDEX_NAME, json.dumps(self.index, indent=1))
+        self._zip.close()
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "responses": len(self.index), "misses": self.misses}
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport, archive: ScrapeArchive) -> None:
+        self._transport = transport
+        self._archive = archive
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self._transport.handle_async_request(request)
+        try:
+            body = await response.aread()
+        finally:
+            await response.aclose()
+        self._archive.put(request, response, body)
+        headers = [
+            (name, value)
+            for name, value in response.headers.multi_items()
+            if name.lower() not in DROPPED_HEADERS
+        ]
+        return httpx.Response(
+            response.status_code,
+            headers=headers,
+            content=body,
+            request=request,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    def __init__(self, archive: ScrapeArchive) -> None:
+        self._archive = archive
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = self._archive.get(request)
+        if response is None:
+            logger.debug("Not in archive: %s %s", request.method, _public_url(request.url))
+            raise httpx.ConnectError(
+                f"Not in scrape archive: {_public_url(request.url)}", request=request
+            )
+        return response
+
+
+_archive: ScrapeArchive | None = None
+_saved_settings: dict = {}
+
+
+def start_archive(path: str, mode: str) -> ScrapeArchive:
+    """Record to or replay from `path` for every client created from now on."""
+    global _archive
+    stop_archive()
+    archive = ScrapeArchive(path, mode)
+    for name in ("fetch_cache_enabled", "groq_cache_enabled"):
+        _saved_settings[name] = getattr(settings, name)
+        setattr(settings, name, False)
+    if mode == "record":
+        set_transport_factory(
+            lambda: RecordingTransport(
+                httpx.AsyncHTTPTransport(
+                    limits=httpx.Limits(
+                        max_connections=settings.http_max_connections,
+                        max_keepalive_connections=settings.http_max_keepalive_connections,
+                        keepalive_expiry=settings.http_keepalive_expiry_seconds,
+                    )
+                ),
+                archive,
+            )
+        )
+    else:
+        set_pacing(False)
+        set_transport_factory(lambda: ReplayTransport(archive))
+    _archive = archive
+    logger.info("Scrape archive %s: %s", mode, path)
+    return archive
+
+
+def stop_archive() -> None:
+    """Write the index (when recording) and go back to the network."""
+    global _archive
+    if _archive is None:
+        return
+    set_transport_factory(None)
+    set_pacing(True)
+    for name, value in _saved_settings.items():
+        setattr(settings, name, value)
+    _saved_settings.clear()
+    _archive.close()
+    logger.info("Scrape archive closed: %s", _archive.stats())
+    _archive = None
@@ -0,0 +1,286 @@
+"""Scrape jobs: queued requests for a full scrape, run one at a time by the scrape worker.
+
+Every trigger (/admin/trigger-scrape, the scheduler, the startup bootstrap,
+scripts/run_scrape.py) calls enqueue_job, which returns the already queued or
+running job instead of adding a second one. Jobs run in the scrape worker
+(python -m app.tasks.worker, started next to the API by default), never in the
+API's own event loop.
+
+Single flight across processes and hosts is a Postgres advisory lock
+(pg_try_advisory_lock) held on a dedicated connection while a job runs; a
+crashed worker's connection closes and frees it. scripts/run_scrape_deals_only.py
+scrapes outside the job queue but under the same lock. Cancelling a running job stops
+it at the next poll; its scrape run stays resumable (scrape_progress).
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.events import SCRAPE_FINISHED, SCRAPE_STARTED, publish
+from app.db.models import ScrapeJob, ScrapeRun
+from app.db.session import AsyncSessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary but fixed: every process must use the same key.
+SCRAPE_LOCK_KEY = 0x5CA9E
+# Serializes enqueue_job's check-then-insert (transaction scoped, so it never
+# waits on SCRAPE_LOCK_KEY, which a running job holds).
+ENQUEUE_LOCK_KEY = 0x5CA9F
+ACTIVE_STATUSES = ("queued", "running")
+MAX_MAINTENANCE_HOURS = 1.0
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def job_dict(job: ScrapeJob) -> dict:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "trigger": job.trigger,
+        "requested_at": job.requested_at.isoformat() if job.requested_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "cancel_requested": job.cancel_requested,
+        "worker": job.worker,
+        "run_id": job.run_id,
+        "inserted": job.inserted,
+        "error": job.error,
+    }
+
+
+async def enqueue_job(session: AsyncSession, trigger: str) -> tuple[ScrapeJob, bool]:
+    """Queue a scrape unless one is already queued or running.
+    Returns (job, created)."""
+    # Concurrent triggers would otherwise both see no active job and both insert.
+    await session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ENQUEUE_LOCK_KEY})
+    active = (
+        await session.execute(
+            select(ScrapeJob)
+            .where(ScrapeJob.status.in_(ACTIVE_STATUSES))
+            .order_by(ScrapeJob.id)
+            .limit(1)
+        )
+    ).scalar_one_or_none()
+    if active:
+        await session.commit()
+        return active, False
+    job = ScrapeJob(status="queued", trigger=trigger)
+    session.add(job)
+    await session.commit()
+    logger.info("Queued scrape job %d (%s)", job.id, trigger)
+    return job, True
+
+
+async def get_job(session: AsyncSession, job_id: int) -> ScrapeJob | None:
+    return (
+        await session.execute(select(ScrapeJob).where(ScrapeJob.id == job_id))
+    ).scalar_one_or_none()
+
+
+async def list_jobs(session: AsyncSession, limit: int = 20) -> list[ScrapeJob]:
+    return list(
+        (
+            await session.execute(select(ScrapeJob).order_by(ScrapeJob.id.desc()).limit(limit))
+        ).scalars()
+    )
+
+
+async def cancel_job(session: AsyncSession, job_id: int) -> ScrapeJob | None:
+    """Cancel a queued job now; ask the worker to stop a running one."""
+    job = await get_job(session, job_id)
+    if job is None:
+        return None
+    if job.status == "queued":
+        job.status = "cancelled"
+        job.finished_at = datetime.now(timezone.utc)
+    elif job.status == "running":
+        job.cancel_requested = True
+    await session.commit()
+    return job
+
+
+async def maintenance_status(session: AsyncSession) -> tuple[bool, str | None]:
+    """(in_maintenance, message) while a job has been running for under an hour."""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=MAX_MAINTENANCE_HOURS)
+    running = (
+        await session.execute(
+            select(ScrapeJob.id)
+            .where(ScrapeJob.status == "running", ScrapeJob.started_at >= cutoff)
+            .limit(1)
+        )
+    ).scalar_one_or_none()
+    if running is None:
+        return False, None
+    return True, "Website in weekly maintenance. Deals refresh in under an hour."
+
+
+async def last_finished_job(session: AsyncSession) -> ScrapeJob | None:
+    return (
+        await session.execute(
+            select(ScrapeJob)
+            .where(ScrapeJob.status == "finished")
+            .order_by(ScrapeJob.finished_at.desc())
+            .limit(1)
+        )
+    ).scalar_one_or_none()
+
+
+@asynccontextmanager
+async def scrape_lock():
+    """Yields True while this process holds the cluster-wide scrape lock, False
+    when another process does. The lock lives on its own connection."""
+    async with engine.connect() as conn:
+        held = (
+            await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": SCRAPE_LOCK_KEY})
+        ).scalar()
+        # End the implicit transaction: the lock is session-level, not transactional.
+        await conn.commit()
+        try:
+            yield bool(held)
+        finally:
+            if held:
+                await conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": SCRAPE_LOCK_KEY}
+                )
+                await conn.commit()
+
+
+async def _finish(job_id: int, status: str, **values) -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(ScrapeJob)
+            .where(ScrapeJob.id == job_id)
+            .values(status=status, finished_at=datetime.now(timezone.utc), **values)
+        )
+        await publish(session, SCRAPE_FINISHED, job_id=job_id, status=status)
+        await session.commit()
+
+
+async def _execute(job_id: int) -> int:
+    # Imported here: the API process imports this module but never runs scrapes.
+    from app.services.rag import RAGService
+    from app.services.scraper import run_full_scrape
+    from app.tasks.scheduler import expire_old_discounts
+
+    async with AsyncSessionLocal() as session:
+        inserted = await run_full_scrape(session)
+        # Single flight: the run this job just touched is the latest one.
+        run_id = (
+            await session.execute(
+                select(ScrapeRun.id).order_by(ScrapeRun.updated_at.desc()).limit(1)
+            )
+        ).scalar_one_or_none()
+        await session.execute(
+            update(ScrapeJob).where(ScrapeJob.id == job_id).values(run_id=run_id)
+        )
+        await session.commit()
+        await expire_old_discounts(session)
+        try:
+            await RAGService().rebuild_index(session)
+        except Exception as exc:
+            logger.warning("RAG rebuild after scrape job %d failed: %s", job_id, exc)
+        return inserted
+
+
+async def _cancel_requested(job_id: int) -> bool:
+    async with AsyncSessionLocal() as session:
+        return bool(
+            (
+                await session.execute(
+                    select(ScrapeJob.cancel_requested).where(ScrapeJob.id == job_id)
+                )
+            ).scalar_one_or_none()
+        )
+
+
+async def run_next_job(stop: asyncio.Event | None = None) -> ScrapeJob | None:
+    """Run the oldest queued job if this process gets the scrape lock.
+    Returns the job as it ended, or None when there was nothing to run (or the
+    lock is held elsewhere). Setting stop puts a running job back in the queue."""
+    async with scrape_lock() as held:
+        if not held:
+            return None
+        async with AsyncSessionLocal() as session:
+            # Running jobs without the lock held belong to a worker that died.
+            orphaned = await session.execute(
+                update(ScrapeJob)
+                .where(ScrapeJob.status == "running")
+                .values(
+                    status="failed",
+                    finished_at=datetime.now(timezone.utc),
+                    error="worker exited; the next job resumes its scrape run",
+                )
+            )
+            job = (
+                await session.execute(
+                    select(ScrapeJob)
+                    .where(ScrapeJob.status == "queued")
+                    .order_by(ScrapeJob.id)
+                    .limit(1)
+                )
+            ).scalar_one_or_none()
+            if job is None:
+                await session.commit()
+                return None
+            if orphaned.rowcount:
+                logger.warning("Marked %d orphaned scrape job(s) failed", orphaned.rowcount)
+            job.status = "running"
+            job.started_at = datetime.now(timezone.utc)
+            job.worker = worker_name()
+            await publish(session, SCRAPE_STARTED, job_id=job.id, trigger=job.trigger)
+            await session.commit()
+            job_id = job.id
+
+        logger.info("Scrape job %d started (%s)", job_id, job.trigger)
+        task = asyncio.create_task(_execute(job_id))
+        poll = max(settings.scrape_worker_poll_seconds, 0.1)
+        stopping = False
+        cancelled = False
+        while not task.done():
+            await asyncio.wait({task}, timeout=poll)
+            if task.done():
+                break
+            if stop is not None and stop.is_set():
+                stopping = True
+            elif await _cancel_requested(job_id):
+                cancelled = True
+            if stopping or cancelled:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                break
+
+        if stopping:
+            # Back in the queue: the next worker resumes the checkpointed run.
+            async with AsyncSessionLocal() as session:
+                await session.execute(
+                    update(ScrapeJob)
+                    .where(ScrapeJob.id == job_id)
+                    .values(status="queued", started_at=None, worker=None)
+                )
+                await publish(session, SCRAPE_FINISHED, job_id=job_id, status="queued")
+                await session.commit()
+            logger.info("Scrape job %d requeued (worker stopping)", job_id)
+        elif cancelled:
+            await _finish(job_id, "cancelled")
+            logger.info("Scrape job %d cancelled", job_id)
+        elif task.exception() is not None:
+            exc = task.exception()
+            logger.error("Scrape job %d failed: %s", job_id, exc, exc_info=exc)
+            await _finish(job_id, "failed", error=f"{type(exc).__name__}: {exc}"[:2000])
+        else:
+            await _finish(job_id, "finished", inserted=task.result())
+            logger.info("Scrape job %d finished: +%d deals", job_id, task.result())
+
+    async with AsyncSessionLocal() as session:
+        return await get_job(session, job_id)
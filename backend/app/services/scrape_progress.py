@@ -0,0 +1,208 @@
+"""Checkpoints for resumable scrape runs.
+
+Progress is stored per bank and, for Peekaboo banks, per city and page offset
+(scrape_checkpoints). A run that is killed by the host or stops at its deadline
+is picked up by the next run_full_scrape, which skips finished banks/cities and
+continues partially fetched cities from their saved offset.
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import ScrapeCheckpoint, ScrapeRun
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CityProgress:
+    next_offset: int = 0
+    done: bool = False
+
+
+@dataclass
+class BankProgress:
+    bank_name: str
+    done: bool = False
+    cities: dict[str, CityProgress] = field(default_factory=dict)
+    # (merchant, card, percent) keys already synced for this bank in the run.
+    seen_keys: set[tuple[str, str, float]] = field(default_factory=set)
+    # time.monotonic() value after which no new requests should start.
+    deadline: float | None = None
+    # A Peekaboo city was left unfinished because its host's circuit was open.
+    circuit_skipped: bool = False
+
+    def city(self, name: str) -> CityProgress:
+        """A copy of the city's checkpoint; the scrape stores a new one only once
+        the pages fetched since are handed on."""
+        state = self.cities.get(name)
+        return replace(state) if state else CityProgress()
+
+    def city_snapshot(self) -> dict[str, CityProgress]:
+        return {name: replace(state) for name, state in self.cities.items()}
+
+    def out_of_time(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def time_left(self) -> float | None:
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def peekaboo_started(self) -> bool:
+        """Whether Peekaboo has served the bank in this run, resumed parts
+        included, or held cities back for the next attempt."""
+        return (
+            bool(self.seen_keys)
+            or self.circuit_skipped
+            or any(city.done or city.next_offset for city in self.cities.values())
+        )
+
+    @property
+    def seen_pairs(self) -> set[tuple[str, str]]:
+        return {(merchant, card) for merchant, card, _ in self.seen_keys}
+
+
+class ScrapeProgress:
+    def __init__(self, run_id: int, deadline: float | None) -> None:
+        self.run_id = run_id
+        self.deadline = deadline
+        self.banks: dict[str, BankProgress] = {}
+
+    def bank(self, name: str) -> BankProgress:
+        if name not in self.banks:
+            self.banks[name] = BankProgress(bank_name=name, deadline=self.deadline)
+        return self.banks[name]
+
+    def out_of_time(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    @classmethod
+    async def resume_or_start(cls, session: AsyncSession, resume: bool = True) -> "ScrapeProgress":
+        """Continue the latest unfinished run if it is recent enough, else start a new one.
+        resume=False abandons any unfinished run."""
+        deadline = None
+        if settings.scrape_deadline_minutes > 0:
+            # Stop starting requests early enough to sync and checkpoint before the deadline.
+            budget = settings.scrape_deadline_minutes * 60 - settings.scrape_commit_margin_seconds
+            deadline = time.monotonic() + max(budget, 0.0)
+
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.scrape_resume_max_age_hours)
+        run = (
+            await session.execute(
+                select(ScrapeRun)
+                .where(ScrapeRun.status.in_(("running", "partial")))
+                .order_by(ScrapeRun.started_at.desc())
+                .limit(1)
+            )
+        ).scalar_one_or_none()
+        if run and (not resume or run.started_at < cutoff):
+            run.status = "abandoned"
+            run = None
+        if run is None:
+            run = ScrapeRun(status="running")
+            session.add(run)
+            await session.commit()
+            logger.info("Started scrape run %d", run.id)
+            return cls(run.id, deadline)
+
+        run.status = "running"
+        run.updated_at = datetime.now(timezone.utc)
+        progress = cls(run.id, deadline)
+        rows = (
+            await session.execute(
+                select(ScrapeCheckpoint).where(ScrapeCheckpoint.run_id == run.id)
+            )
+        ).scalars().all()
+        for row in rows:
+            bank = progress.bank(row.bank_name)
+            if row.city:
+                bank.cities[row.city] = CityProgress(row.next_offset, row.done)
+                continue
+            bank.done = row.done
+            if row.seen_keys:
+                bank.seen_keys = {
+                    (merchant, card, float(percent))
+                    for merchant, card, percent in json.loads(row.seen_keys)
+                }
+        await session.commit()
+        logger.info(
+            "Resuming scrape run %d: %d banks already done",
+            run.id,
+            sum(1 for bank in progress.banks.values() if bank.done),
+        )
+        return progress
+
+    async def save_bank(self, session: AsyncSession, bank: BankProgress) -> None:
+        """Checkpoint a bank whose stream has ended."""
+        await self._upsert(session, bank, bank.done, bank.cities)
+        await session.commit()
+
+    async def save_batch(
+        self, session: AsyncSession, bank: BankProgress, cities: dict[str, CityProgress]
+    ) -> None:
+        """Checkpoint a bank mid-stream in the transaction of a write batch: its
+        seen keys and the cities whose deals are all in this or earlier batches.
+        The caller commits."""
+        await self._upsert(session, bank, False, cities)
+
+    async def _upsert(
+        self,
+        session: AsyncSession,
+        bank: BankProgress,
+        done: bool,
+        cities: dict[str, CityProgress],
+    ) -> None:
+        rows = [
+            {
+                "run_id": self.run_id,
+                "bank_name": bank.bank_name,
+                "city": "",
+                "next_offset": 0,
+                "done": done,
+                "seen_keys": json.dumps(sorted(bank.seen_keys)),
+            }
+        ] + [
+            {
+                "run_id": self.run_id,
+                "bank_name": bank.bank_name,
+                "city": city,
+                "next_offset": state.next_offset,
+                "done": state.done,
+                "seen_keys": None,
+            }
+            for city, state in cities.items()
+        ]
+        stmt = pg_insert(ScrapeCheckpoint).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_checkpoint_run_bank_city",
+            set_={
+                "next_offset": stmt.excluded.next_offset,
+                "done": stmt.excluded.done,
+                "seen_keys": stmt.excluded.seen_keys,
+            },
+        )
+        await session.execute(stmt)
+        await session.execute(
+            update(ScrapeRun)
+            .where(ScrapeRun.id == self.run_id)
+            .values(updated_at=datetime.now(timezone.utc))
+        )
+
+    async def finish(self, session: AsyncSession, complete: bool) -> None:
+        now = datetime.now(timezone.utc)
+        values = {"status": "finished" if complete else "partial", "updated_at": now}
+        if complete:
+            values["finished_at"] = now
+        await session.execute(
+            update(ScrapeRun).where(ScrapeRun.id == self.run_id).values(**values)
+        )
+        await session.commit()
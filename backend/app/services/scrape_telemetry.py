@@ -0,0 +1,229 @@
+"""Per-run and per-bank scrape telemetry (scrape_runs, scrape_run_stages).
+
+_scrape_bank opens track_bank() for each bank; every HTTP response, parse,
+Groq call and error inside it (including child tasks, which inherit the
+context) is added to that bank's BankStats. run_full_scrape adds sync results
+and persists the stats next to the bank's checkpoint, so a resumed run keeps
+accumulating into the same rows. /admin/scrape-status and /admin/scrape-runs
+read them back.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import cast, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import ScrapeRun, ScrapeRunStage
+from app.services.http_client import response_observer
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("fetch", "parse", "groq", "sync")
+COUNTERS = (
+    "requests",
+    "bytes_downloaded",
+    "fetch_ms",
+    "parse_ms",
+    "groq_ms",
+    "sync_ms",
+    "wall_ms",
+    "deals_seen",
+    "inserted",
+    "expired",
+    "updated",
+    "errors",
+)
+MAX_ERROR_LENGTH = 500
+
+
+@dataclass
+class BankStats:
+    bank_name: str
+    requests: int = 0
+    bytes_downloaded: int = 0
+    fetch_ms: float = 0.0
+    parse_ms: float = 0.0
+    groq_ms: float = 0.0
+    sync_ms: float = 0.0
+    wall_ms: float = 0.0
+    deals_seen: int = 0
+    inserted: int = 0
+    expired: int = 0
+    updated: int = 0
+    errors: int = 0
+    last_error: str | None = None
+    status: str = "running"  # done, partial (deadline) or failed
+
+    def observe_response(self, nbytes: int, seconds: float) -> None:
+        self.requests += 1
+        self.bytes_downloaded += nbytes
+        self.fetch_ms += seconds * 1000
+
+    def add_error(self, error: BaseException | str) -> None:
+        self.errors += 1
+        message = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+        self.last_error = message[:MAX_ERROR_LENGTH]
+
+
+_current: ContextVar[BankStats | None] = ContextVar("scrape_bank_stats", default=None)
+
+
+@contextmanager
+def track_bank(stats: BankStats):
+    """Attribute HTTP traffic, stage timings and errors in this context to stats."""
+    stats_token = _current.set(stats)
+    observer_token = response_observer.set(stats.observe_response)
+    started = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.wall_ms += (time.perf_counter() - started) * 1000
+        response_observer.reset(observer_token)
+        _current.reset(stats_token)
+
+
+@contextmanager
+def timed(stage: str, stats: BankStats | None = None):
+    """Add the block's wall time to stats (default: the tracked bank) as <stage>_ms."""
+    if stage not in STAGES:
+        raise ValueError(f"Unknown scrape stage: {stage}")
+    stats = stats or _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            field = f"{stage}_ms"
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            setattr(stats, field, getattr(stats, field) + elapsed_ms)
+
+
+def record_error(error: BaseException | str) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.add_error(error)
+
+
+async def save_bank_stats(session: AsyncSession, run_id: int, stats: BankStats) -> None:
+    """Add stats to the bank's row for this run. Not committed here; the bank
+    checkpoint that follows commits both."""
+    values = {name: getattr(stats, name) for name in COUNTERS}
+    stmt = pg_insert(ScrapeRunStage).values(
+        run_id=run_id,
+        bank_name=stats.bank_name,
+        status=stats.status,
+        last_error=stats.last_error,
+        **values,
+    )
+    table = ScrapeRunStage.__table__
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_run_stage_run_bank",
+        set_={
+            **{name: table.c[name] + stmt.excluded[name] for name in COUNTERS},
+            "status": stmt.excluded.status,
+            "last_error": func.coalesce(stmt.excluded.last_error, table.c.last_error),
+            "updated_at": func.now(),
+        },
+    )
+    await session.execute(stmt)
+
+
+async def save_run_stats(
+    session: AsyncSession, run_id: int, wall_ms: float, loop_lag_max_ms: float
+) -> None:
+    """Add this attempt's wall time to the run and keep the worst loop lag (not committed)."""
+    await session.execute(
+        update(ScrapeRun)
+        .where(ScrapeRun.id == run_id)
+        .values(
+            wall_ms=func.coalesce(ScrapeRun.wall_ms, 0) + wall_ms,
+            loop_lag_max_ms=func.greatest(
+                func.coalesce(ScrapeRun.loop_lag_max_ms, 0), loop_lag_max_ms
+            ),
+        )
+    )
+
+
+def _iso(value: datetime | None) -> str | None:
+    return value.isoformat() if value else None
+
+
+def _run_dict(run: ScrapeRun) -> dict:
+    return {
+        "id": run.id,
+        "status": run.status,
+        "started_at": _iso(run.started_at),
+        "updated_at": _iso(run.updated_at),
+        "finished_at": _iso(run.finished_at),
+        "wall_ms": run.wall_ms,
+        "loop_lag_max_ms": run.loop_lag_max_ms,
+    }
+
+
+def _stage_dict(stage: ScrapeRunStage) -> dict:
+    return {
+        "bank_name": stage.bank_name,
+        "status": stage.status,
+        **{name: getattr(stage, name) for name in COUNTERS},
+        "last_error": stage.last_error,
+        "updated_at": _iso(stage.updated_at),
+    }
+
+
+async def latest_run(session: AsyncSession) -> dict | None:
+    """The most recent run with one entry per bank."""
+    run = (
+        await session.execute(select(ScrapeRun).order_by(ScrapeRun.id.desc()).limit(1))
+    ).scalar_one_or_none()
+    if run is None:
+        return None
+    stages = (
+        await session.execute(
+            select(ScrapeRunStage)
+            .where(ScrapeRunStage.run_id == run.id)
+            .order_by(ScrapeRunStage.bank_name)
+        )
+    ).scalars().all()
+    return {**_run_dict(run), "banks": [_stage_dict(stage) for stage in stages]}
+
+
+async def run_history(session: AsyncSession, limit: int = 20) -> list[dict]:
+    """Recent runs, newest first, with counters summed over their banks."""
+    # Bank wall times overlap, so the run's own wall_ms is reported instead of a sum.
+    summed = [name for name in COUNTERS if name != "wall_ms"]
+    columns = ScrapeRunStage.__table__.c
+    totals = (
+        select(
+            ScrapeRunStage.run_id,
+            func.count().label("banks"),
+            # Postgres sums integers as numeric; cast back so JSON gets numbers.
+            *(cast(func.sum(columns[name]), columns[name].type).label(name) for name in summed),
+        )
+        .group_by(ScrapeRunStage.run_id)
+        .subquery()
+    )
+    rows = (
+        await session.execute(
+            select(ScrapeRun, totals)
+            .outerjoin(totals, totals.c.run_id == ScrapeRun.id)
+            .order_by(ScrapeRun.id.desc())
+            .limit(limit)
+        )
+    ).all()
+    history = []
+    for row in rows:
+        mapping = row._mapping
+        history.append(
+            {
+                **_run_dict(row.ScrapeRun),
+                "banks": mapping["banks"] or 0,
+                **{name: mapping[name] or 0 for name in summed},
+            }
+        )
+    return history
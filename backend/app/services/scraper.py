@@ -1,28 +1,74 @@
 import asyncio
+import hashlib
 import io
 import json
 import logging
 import re
-from dataclasses import dataclass
+import time
+from collections import defaultdict
+from dataclasses import asdict, astuple, dataclass
 from datetime import date
-from typing import Iterable
+from functools import lru_cache
+from typing import AsyncIterator, Iterable
+from urllib.parse import urljoin, urlsplit
 
 import httpx
 from bs4 import BeautifulSoup
 from dateutil import parser as date_parser
 from PyPDF2 import PdfReader
-from sqlalchemy import delete, select
+from sqlalchemy import Integer, Text, any_, bindparam, column, delete, select, update, values
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.services.groq_client import GroqClient
+from app.core.config import settings
+from app.db.deal_search import bump_generation, refresh_deal_search
+from app.services.fetch_cache import get_fetch_cache
+from app.services.groq_normalizer import normalize_texts
+from app.services.http_client import get_client
 from app.services.normalizer import normalize_category, normalize_city
+from app.services.parse_pool import run_parse
+from app.services.rate_limit import AdaptiveHostLimiter, HostCircuitOpen
+from app.services.scrape_progress import BankProgress, CityProgress, ScrapeProgress
+from app.services.scrape_telemetry import (
+    BankStats,
+    record_error,
+    save_bank_stats,
+    save_run_stats,
+    timed,
+    track_bank,
+)
 from app.services.serp_client import SerpApiClient
+from app.utils.loop_lag import LoopLagMonitor
 from app.utils.text import clean_text, parse_discount_percent
 from app.db.models import Bank, Card, Discount, Merchant, ScrapeSource
 
 logger = logging.getLogger(__name__)
 
 
+def _host_ceiling(host: str) -> float:
+    # All Peekaboo banks page through the same SDK host, so it gets its own cap.
+    if host.endswith("peekaboo.guru"):
+        return settings.peekaboo_requests_per_second
+    return settings.scrape_host_requests_per_second
+
+
+# Every scraper request (pages, PDFs, Peekaboo, SERP) goes through this.
+_host_limiter = AdaptiveHostLimiter(
+    _host_ceiling,
+    min_rate=settings.scrape_host_min_requests_per_second,
+    backoff_factor=settings.scrape_host_backoff_factor,
+    recovery_step=settings.scrape_host_recovery_step,
+    breaker_failures=settings.scrape_breaker_failures,
+    cooldown=settings.scrape_breaker_cooldown_seconds,
+)
+
+
+def scrape_host_stats() -> dict[str, dict]:
+    """Rate, circuit state, errors and latency per host the scraper has hit."""
+    return _host_limiter.stats()
+
+
 # Cover all major Pakistan cities for Peekaboo (target 4000+ deals nationwide)
 KNOWN_CITIES = [
     "Karachi",
@@ -55,10 +101,20 @@ CARD_TIER_MAP = {
     "classic": "Classic",
     "basic": "Basic",
 }
-MAX_GROQ_FIXES = 50
+# Garbled deals per bank sent to Groq; batched, so raising it adds little wall time.
+MAX_GROQ_FIXES = 200
 # Peekaboo: fetch more entities per page and paginate more (target 4000+ deals)
 PEEKABOO_PAGE_LIMIT = 50
 PEEKABOO_MAX_PAGES = 30
+# window.__pkbg__ values the scraper uses; only these are cached per host.
+PEEKABOO_CONFIG_KEYS = ("OWNER_KEY", "DOMAIN", "VERSION", "LIMIT", "BASE_COUNTRY")
+# Entity responses meaning the owner key / SDK version is no longer accepted.
+PEEKABOO_REJECTED_STATUSES = {400, 401, 403}
+# Bump when page text extraction (_extract_page_text: PDF/HTML text, Peekaboo base)
+# or _extract_deals_from_text and its helpers change, so cached results are re-derived.
+PARSER_VERSION = "1"
+# Rows per INSERT ... ON CONFLICT statement in sync_deals (asyncpg caps binds at 32767).
+SYNC_BATCH_SIZE = 1000
 MERCHANT_STOP_WORDS = re.compile(
     r"\b(with|using|via|when|till|until|valid|terms|conditions|offer|offers)\b",
     re.IGNORECASE,
@@ -197,44 +253,71 @@ SOURCES = [
 ]
 
 
+# Precompiled matchers. Each helper below scans its text once with a single
+# alternation; where several keywords match, the earliest in the keyword list
+# wins, exactly like the per-keyword checks these replaced.
+CATEGORY_KEYWORDS = [
+    ("Food", ["restaurant", "dining", "cafe", "food"]),
+    ("Travel", ["travel", "flight", "hotel"]),
+    ("Fashion", ["fashion", "clothing", "apparel"]),
+    ("Grocery", ["grocery", "mart", "supermarket"]),
+    ("Electronics", ["electronics", "gadgets"]),
+    ("Medical", ["health", "medical", "pharmacy"]),
+]
+_CITY_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(city) for city in KNOWN_CITIES) + r")\b", re.IGNORECASE
+)
+_CITY_RANK = {city.lower(): (rank, normalize_city(city)) for rank, city in enumerate(KNOWN_CITIES)}
+_CATEGORY_RANK = {
+    word: (rank, normalize_category(category))
+    for rank, (category, words) in enumerate(CATEGORY_KEYWORDS)
+    for word in words
+}
+# Keywords are plain substrings, so matches may overlap ("smartravel"); the
+# lookahead lets finditer report a match starting at every position.
+_CATEGORY_PATTERN = re.compile("(?=(" + "|".join(map(re.escape, _CATEGORY_RANK)) + "))")
+_DEFAULT_CATEGORY = normalize_category("Retail")
+_TIER_RANK = {key: (rank, value) for rank, (key, value) in enumerate(CARD_TIER_MAP.items())}
+_CARD_PATTERN = re.compile("(?=(credit|debit|" + "|".join(map(re.escape, CARD_TIER_MAP)) + "))")
+_CARD_WORDS = re.compile(r"\b(card|cards|credit|debit|visa|mastercard|amex)\b", re.IGNORECASE)
+_NUMBER_WORDS = re.compile(r"\b\d+(\.\d+)?\b")
+_REPEATED_SPACES = re.compile(r"\s{2,}")
+_LETTERS = re.compile(r"[A-Za-z]")
+_DIGITS = re.compile(r"\d")
+_WHITESPACE = re.compile(r"\s")
+_OFFER_WORDS = re.compile(r"\b(card|credit|debit|discount|cashback|offer|offers|deal|deals)\b")
+
+
+@lru_cache(maxsize=64)
+def _bank_noise_pattern(bank_name: str) -> re.Pattern:
+    """Bank name tokens and known cities, stripped from merchant names in one pass.
+    Built once per bank."""
+    tokens = {token for token in re.split(r"\W+", bank_name.lower()) if token}
+    tokens.update(city.lower() for city in KNOWN_CITIES)
+    alternation = "|".join(re.escape(token) for token in sorted(tokens, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE)
+
+
 def _guess_city(text: str) -> str:
-    for city in KNOWN_CITIES:
-        if re.search(rf"\b{re.escape(city)}\b", text, re.IGNORECASE):
-            return normalize_city(city)
-    return "Karachi"
+    ranked = [_CITY_RANK[match.lower()] for match in _CITY_PATTERN.findall(text)]
+    return min(ranked)[1] if ranked else "Karachi"
 
 
 def _guess_category(text: str) -> str:
-    lowered = text.lower()
-    if any(word in lowered for word in ["restaurant", "dining", "cafe", "food"]):
-        return normalize_category("Food")
-    if any(word in lowered for word in ["travel", "flight", "hotel"]):
-        return normalize_category("Travel")
-    if any(word in lowered for word in ["fashion", "clothing", "apparel"]):
-        return normalize_category("Fashion")
-    if any(word in lowered for word in ["grocery", "mart", "supermarket"]):
-        return normalize_category("Grocery")
-    if any(word in lowered for word in ["electronics", "gadgets"]):
-        return normalize_category("Electronics")
-    if any(word in lowered for word in ["health", "medical", "pharmacy"]):
-        return normalize_category("Medical")
-    return normalize_category("Retail")
+    ranked = [_CATEGORY_RANK[word] for word in _CATEGORY_PATTERN.findall(text.lower())]
+    return min(ranked)[1] if ranked else _DEFAULT_CATEGORY
 
 
 def _parse_card_type(text: str) -> tuple[str, str]:
-    lowered = text.lower()
-    if "credit" in lowered:
+    words = set(_CARD_PATTERN.findall(text.lower()))
+    if "credit" in words:
         card_type = "Credit"
-    elif "debit" in lowered:
+    elif "debit" in words:
         card_type = "Debit"
     else:
         card_type = "Card"
-    tier = "Basic"
-    for key, value in CARD_TIER_MAP.items():
-        if key in lowered:
-            tier = value
-            break
-    return card_type, tier
+    tiers = [_TIER_RANK[word] for word in words if word in _TIER_RANK]
+    return card_type, min(tiers)[1] if tiers else "Basic"
 
 
 def _parse_dates(text: str) -> tuple[date | None, date | None]:
@@ -255,31 +338,35 @@ def _looks_garbled(text: str) -> bool:
     cleaned = clean_text(text)
     if not cleaned:
         return True
-    letters = len(re.findall(r"[A-Za-z]", cleaned))
-    digits = len(re.findall(r"\d", cleaned))
-    total = len(re.sub(r"\s", "", cleaned))
+    letters = len(_LETTERS.findall(cleaned))
+    digits = len(_DIGITS.findall(cleaned))
+    total = len(_WHITESPACE.sub("", cleaned))
     readable_ratio = (letters + digits) / total if total else 0
     return letters < 4 or readable_ratio < 0.7
 
 
-def _sanitize_merchant_name(name: str, bank_name: str) -> str:
+def _sanitize_with(name: str, bank_noise: re.Pattern) -> str:
     cleaned = clean_text(name)
     if not cleaned:
         return ""
     cleaned = MERCHANT_STOP_WORDS.split(cleaned)[0]
     cleaned = MERCHANT_NOISE_WORDS.sub("", cleaned)
-    cleaned = re.sub(r"\b(card|cards|credit|debit|visa|mastercard|amex)\b", "", cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r"\b\d+(\.\d+)?\b", "", cleaned)
-    cleaned = re.sub(r"\s{2,}", " ", cleaned).strip(" -|,.;")
+    cleaned = _CARD_WORDS.sub("", cleaned)
+    cleaned = _NUMBER_WORDS.sub("", cleaned)
+    cleaned = _REPEATED_SPACES.sub(" ", cleaned).strip(" -|,.;")
+    cleaned = bank_noise.sub("", cleaned)
+    cleaned = _REPEATED_SPACES.sub(" ", cleaned).strip(" -|,.;")
+    return cleaned
 
-    bank_tokens = [t for t in re.split(r"\W+", bank_name.lower()) if t]
-    for token in bank_tokens:
-        cleaned = re.sub(rf"\b{re.escape(token)}\b", "", cleaned, flags=re.IGNORECASE)
-    for city in KNOWN_CITIES:
-        cleaned = re.sub(rf"\b{re.escape(city)}\b", "", cleaned, flags=re.IGNORECASE)
 
-    cleaned = re.sub(r"\s{2,}", " ", cleaned).strip(" -|,.;")
-    return cleaned
+def _sanitize_merchant_name(name: str, bank_name: str) -> str:
+    return _sanitize_with(name, _bank_noise_pattern(bank_name))
+
+
+def _sanitize_merchant_names(names: Iterable[str], bank_name: str) -> list[str]:
+    """Batch form of _sanitize_merchant_name for one bank's raw names."""
+    bank_noise = _bank_noise_pattern(bank_name)
+    return [_sanitize_with(name, bank_noise) for name in names]
 
 
 def _is_valid_merchant(name: str, bank_name: str) -> bool:
@@ -298,7 +385,7 @@ def _is_valid_merchant(name: str, bank_name: str) -> bool:
     lower = cleaned.lower()
     if bank_name.lower() in lower:
         return False
-    if re.search(r"\b(card|credit|debit|discount|cashback|offer|offers|deal|deals)\b", lower):
+    if _OFFER_WORDS.search(lower):
         return False
     if GENERIC_MERCHANT_PHRASES.search(lower):
         return False
@@ -335,29 +422,7 @@ def _extract_merchant_name(line: str, bank_name: str) -> str:
     return ""
 
 
-async def _normalize_deal_with_groq(deal: ScrapedDeal, source: BankSource) -> ScrapedDeal:
-    groq = GroqClient()
-    prompt = (
-        "You clean scraped bank discount text into structured fields.\n"
-        "Return JSON only with keys: merchant_name, category, city, conditions.\n"
-        "Use category values like Food, Retail, Fashion, Travel, Medical, Electronics, Grocery, Entertainment.\n"
-        "Use Pakistan city names when possible. If unknown, keep city empty.\n\n"
-        f"Bank: {source.name}\n"
-        f"Raw text: {deal.conditions}\n"
-    )
-    try:
-        response = await groq.chat(
-            [
-                {"role": "system", "content": "You output JSON only."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.1,
-        )
-        payload = json.loads(response)
-    except Exception as exc:
-        logger.warning("Groq normalization failed: %s", exc)
-        return deal
-
+def _apply_groq_fields(deal: ScrapedDeal, payload: dict) -> None:
     merchant_name = clean_text(str(payload.get("merchant_name", "")))
     category = clean_text(str(payload.get("category", "")))
     city = clean_text(str(payload.get("city", "")))
@@ -372,8 +437,6 @@ async def _normalize_deal_with_groq(deal: ScrapedDeal, source: BankSource) -> Sc
     if conditions:
         deal.conditions = conditions[:300]
 
-    return deal
-
 
 def _extract_deals_from_text(text: str, bank_name: str) -> list[ScrapedDeal]:
     deals: list[ScrapedDeal] = []
@@ -411,10 +474,9 @@ def _extract_deals_from_text(text: str, bank_name: str) -> list[ScrapedDeal]:
 
 
 async def _fetch_page(url: str) -> str:
-    async with httpx.AsyncClient(timeout=60, follow_redirects=True) as client:
-        response = await client.get(url)
-        response.raise_for_status()
-        return response.text
+    response = await _host_limiter.request(get_client("scraper"), "GET", url)
+    response.raise_for_status()
+    return response.text
 
 
 def _extract_peekaboo_base(html: str) -> str | None:
@@ -436,32 +498,149 @@ def _extract_text_from_pdf_bytes(data: bytes) -> str:
         return ""
 
 
-async def _fetch_content(url: str) -> tuple[str, str]:
-    async with httpx.AsyncClient(timeout=60, follow_redirects=True) as client:
-        response = await client.get(url)
-        response.raise_for_status()
-        content_type = (response.headers.get("content-type") or "").lower()
-        if "application/pdf" in content_type or url.lower().endswith(".pdf"):
-            if response.content.startswith(b"%PDF"):
-                return _extract_text_from_pdf_bytes(response.content), "pdf"
-            # Some bank sites return HTML for PDF links (bot protection).
-            text = response.content.decode("utf-8", "ignore")
-            return text, "html"
-        return response.text, "html"
+@dataclass
+class FetchedContent:
+    url: str
+    data: bytes | None  # None when the server answered 304 Not Modified
+    content_type: str
+    sha256: str
+
+
+async def _fetch_content(url: str, conditional: bool = True) -> FetchedContent:
+    cache = get_fetch_cache()
+    cached = await asyncio.to_thread(cache.get_fetch, url) if cache and conditional else None
+    headers = cache.conditional_headers(cached) if cache else {}
+    response = await _host_limiter.request(get_client("scraper"), "GET", url, headers=headers)
+    if response.status_code == 304 and cached:
+        cache.record_not_modified()
+        return FetchedContent(url, None, cached.content_type, cached.sha256)
+    response.raise_for_status()
+    content_type = (response.headers.get("content-type") or "").lower()
+    digest = hashlib.sha256(response.content).hexdigest()
+    if cache:
+        await asyncio.to_thread(
+            cache.put_fetch,
+            url,
+            response.headers.get("etag"),
+            response.headers.get("last-modified"),
+            digest,
+            content_type,
+        )
+    return FetchedContent(url, response.content, content_type, digest)
+
+
+def _decode_html(data: bytes, content_type: str) -> str:
+    match = re.search(r"charset=([\w-]+)", content_type)
+    try:
+        return data.decode(match.group(1) if match else "utf-8", "replace")
+    except LookupError:
+        return data.decode("utf-8", "replace")
+
+
+def _extract_page_text(data: bytes, content_type: str, url: str) -> tuple[str, str | None]:
+    """Return (plain text, Peekaboo host referenced by the HTML)."""
+    if "application/pdf" in content_type or url.lower().endswith(".pdf"):
+        if data.startswith(b"%PDF"):
+            return _extract_text_from_pdf_bytes(data), None
+        # Some bank sites return HTML for PDF links (bot protection).
+        html = data.decode("utf-8", "ignore")
+    else:
+        html = _decode_html(data, content_type)
+    if not html:
+        return "", None
+    peekaboo_base = _extract_peekaboo_base(html)
+    soup = BeautifulSoup(html, "lxml")
+    return soup.get_text("\n"), peekaboo_base
+
+
+def _deals_to_json(deals: list[ScrapedDeal]) -> str:
+    return json.dumps([asdict(deal) for deal in deals], default=str)
+
+
+def _deals_from_json(payload: str) -> list[ScrapedDeal]:
+    deals = []
+    for item in json.loads(payload):
+        for key in ("valid_from", "valid_to"):
+            if item[key]:
+                item[key] = date.fromisoformat(item[key])
+        deals.append(ScrapedDeal(**item))
+    return deals
+
+
+def _deal_tuples(text: str, bank_name: str) -> list[tuple]:
+    """Parse-pool worker: text in, ScrapedDeal field tuples out."""
+    return [astuple(deal) for deal in _extract_deals_from_text(text, bank_name)]
+
+
+def _parse_page_bytes(
+    data: bytes, content_type: str, url: str, bank_name: str
+) -> tuple[str, str | None, list[tuple]]:
+    """Parse-pool worker: raw page/PDF bytes in, (text, peekaboo base, deal tuples) out."""
+    text, peekaboo_base = _extract_page_text(data, content_type, url)
+    return text, peekaboo_base, _deal_tuples(text, bank_name) if text else []
+
+
+async def _load_page(url: str, bank_name: str) -> tuple[str, str | None, list[ScrapedDeal]]:
+    """Fetch a page and return (text, peekaboo base, deals). Parsing runs in the
+    parse pool and is skipped when the same content was parsed before."""
+    cache = get_fetch_cache()
+    fetched = await _fetch_content(url)
+    cached_text = (
+        await asyncio.to_thread(cache.get_text, fetched.sha256, PARSER_VERSION)
+        if cache
+        else None
+    )
+    if cached_text:
+        text, peekaboo_base = cached_text
+        cached_deals = await asyncio.to_thread(
+            cache.get_deals, fetched.sha256, bank_name, PARSER_VERSION
+        )
+        if cached_deals is not None:
+            return text, peekaboo_base, _deals_from_json(cached_deals)
+        with timed("parse"):
+            deal_tuples = await run_parse(_deal_tuples, text, bank_name)
+    else:
+        if fetched.data is None:
+            # 304, but the extracted text has been evicted: fetch the body again.
+            fetched = await _fetch_content(url, conditional=False)
+        with timed("parse"):
+            text, peekaboo_base, deal_tuples = await run_parse(
+                _parse_page_bytes, fetched.data, fetched.content_type, url, bank_name
+            )
+        if cache:
+            await asyncio.to_thread(
+                cache.put_text, fetched.sha256, PARSER_VERSION, text, peekaboo_base
+            )
+    deals = [ScrapedDeal(*fields) for fields in deal_tuples]
+    if cache:
+        await asyncio.to_thread(
+            cache.put_deals, fetched.sha256, bank_name, PARSER_VERSION, _deals_to_json(deals)
+        )
+    return text, peekaboo_base, deals
 
 
 def _city_slug(city: str) -> str:
     return city.lower().replace(" ", "-")
 
 
+def _peekaboo_landing_url(base: str) -> str:
+    if settings.peekaboo_landing_url:
+        return f"{settings.peekaboo_landing_url.rstrip('/')}/{base}/"
+    return f"https://{base}/"
+
+
 async def _fetch_peekaboo_config(base: str) -> dict:
-    html = await _fetch_page(f"https://{base}/")
+    landing_url = _peekaboo_landing_url(base)
+    html = await _fetch_page(landing_url)
     soup = BeautifulSoup(html, "lxml")
     script_srcs = [s.get("src") for s in soup.find_all("script") if s.get("src")]
     for src in script_srcs:
-        script_url = src if src.startswith("http") else f"https://{base}{src}"
+        script_url = urljoin(landing_url, src)
         try:
             content = await _fetch_page(script_url)
+        except HostCircuitOpen:
+            # Not a bad bundle: the host is backed off, so the bank stays resumable.
+            raise
         except Exception:
             continue
         match = re.search(r"window.__pkbg__\s*=\s*(\{[\s\S]*\})", content)
@@ -471,6 +650,24 @@ async def _fetch_peekaboo_config(base: str) -> dict:
     return {}
 
 
+async def _peekaboo_config(base: str, refresh: bool = False) -> tuple[dict, bool]:
+    """SDK config for a Peekaboo host and whether it came from the fetch cache.
+    Cached for PEEKABOO_CONFIG_TTL_HOURS; refresh=True skips the cached copy."""
+    cache = get_fetch_cache()
+    host = base.lower()
+    if cache and not refresh:
+        cached = await asyncio.to_thread(
+            cache.get_peekaboo_config, host, settings.peekaboo_config_ttl_hours * 3600
+        )
+        if cached:
+            return cached, True
+    config = await _fetch_peekaboo_config(base)
+    config = {key: config[key] for key in PEEKABOO_CONFIG_KEYS if key in config}
+    if cache and config.get("OWNER_KEY"):
+        await asyncio.to_thread(cache.put_peekaboo_config, host, config)
+    return config, False
+
+
 def _peekaboo_entity_payload(
     city: str,
     country: str,
@@ -496,18 +693,116 @@ def _peekaboo_entity_payload(
     }
 
 
-async def _scrape_peekaboo(source: BankSource) -> list[ScrapedDeal]:
-    if not source.peekaboo_base:
-        return []
+def _peekaboo_entity_deals(entities: list, source: BankSource, city: str) -> list[ScrapedDeal]:
+    """Deals for one page of Peekaboo entities, in page order. Merchant names are
+    sanitized as a batch with the bank's precompiled matcher."""
+    entities = [
+        entity
+        for entity in entities
+        if isinstance(entity, dict) and float(entity.get("maxDiscount") or 0) > 0
+    ]
+    names = _sanitize_merchant_names([entity.get("name", "") for entity in entities], source.name)
+    city = normalize_city(city)
+    deals: list[ScrapedDeal] = []
+    for entity, merchant_name in zip(entities, names):
+        if not _is_valid_merchant(merchant_name, source.name):
+            continue
+        max_discount = float(entity.get("maxDiscount") or 0)
+        merchant_image = entity.get("logo") or entity.get("cover")
+        description = entity.get("description", "")
+        keywords = entity.get("keywords", "")
+        meta_text = f"{keywords} {description} {entity.get('name', '')}"
+        category = _guess_category(meta_text)
+        discount_flag = str(entity.get("discountFlag") or "Up to")
+        conditions = clean_text(f"{discount_flag} {max_discount}% off")[:300]
+        card_type, tier = _parse_card_type(meta_text)
+        card_label = f"{source.name} {tier} {card_type} Card".replace(" Card Card", " Card")
+        deals.append(
+            ScrapedDeal(
+                merchant_name=merchant_name,
+                city=city,
+                category=category,
+                merchant_image_url=merchant_image,
+                discount_percent=max_discount,
+                card_name=card_label.strip(),
+                card_tier=tier,
+                card_type=card_type,
+                conditions=conditions,
+                valid_from=None,
+                valid_to=None,
+            )
+        )
+    return deals
 
-    config = await _fetch_peekaboo_config(source.peekaboo_base)
+
+async def _fetch_peekaboo_city(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: dict,
+    city: str,
+    country: str,
+    limit: int,
+    city_slots: asyncio.Semaphore,
+    progress: BankProgress,
+) -> tuple[list[list], bool, CityProgress]:
+    """Fetch one city's entity pages in offset order (pages are sequential per city).
+    Starts at the checkpointed offset and stops early, unfinished, at the run deadline
+    or when Peekaboo rejects the SDK config. Returns (pages, rejected, the city's
+    state after them); the city's checkpoint in progress is left to the caller."""
+    pages: list[list] = []
+    state = progress.city(city)
+    if state.done:
+        return pages, False, state
+    async with city_slots:
+        offset = state.next_offset
+        for _ in range(PEEKABOO_MAX_PAGES - offset // limit):
+            if progress.out_of_time():
+                return pages, False, state
+            payload = _peekaboo_entity_payload(city, country, limit, offset)
+            try:
+                response = await _host_limiter.request(
+                    client, "POST", url, headers=headers, json=payload
+                )
+                if response.status_code in PEEKABOO_REJECTED_STATUSES:
+                    logger.info("Peekaboo rejected %s (HTTP %s)", city, response.status_code)
+                    return pages, True, state
+                response.raise_for_status()
+                entities = response.json()
+            except HostCircuitOpen as exc:
+                # Not done: the city resumes from this offset in the next run.
+                logger.warning("Peekaboo skipped for %s: %s", city, exc)
+                record_error(exc)
+                progress.circuit_skipped = True
+                return pages, False, state
+            except Exception as exc:
+                logger.warning("Peekaboo fetch failed for %s: %s", city, exc)
+                record_error(exc)
+                break
+
+            if not entities:
+                break
+            pages.append(entities)
+            offset += limit
+            state.next_offset = offset
+            if len(entities) < limit:
+                break
+    state.done = True
+    return pages, False, state
+
+
+async def _fetch_peekaboo_cities(
+    config: dict, progress: BankProgress
+) -> AsyncIterator[tuple[str, list[list], bool, CityProgress]]:
+    """(city, entity pages, rejected, city state) per city in KNOWN_CITIES order,
+    each as soon as it and every earlier city are done. Nothing when the config
+    has no owner key."""
     if not config:
-        return []
+        return
 
     domain = str(config.get("DOMAIN", "https://secure-sdk.peekaboo.guru/")).rstrip("/")
     owner_key = config.get("OWNER_KEY")
     if not owner_key:
-        return []
+        return
 
     headers = {
         "ownerkey": owner_key,
@@ -518,82 +813,108 @@ async def _scrape_peekaboo(source: BankSource) -> list[ScrapedDeal]:
     config_limit = int(config.get("LIMIT", 0)) or 12
     limit = min(max(config_limit, PEEKABOO_PAGE_LIMIT), 100)
     country = str(config.get("BASE_COUNTRY", "Pakistan"))
+    url = f"{domain}/uljin2s3nitoi89njkhklgkj5"
+
+    # City shards run concurrently but are handed out in KNOWN_CITIES order, so
+    # seen_keys dedup picks the same city for a merchant as a sequential walk.
+    concurrency = max(settings.peekaboo_city_concurrency, 1)
+    city_slots = asyncio.Semaphore(concurrency)
+    client = get_client("scraper")
+    tasks = [
+        asyncio.create_task(
+            _fetch_peekaboo_city(client, url, headers, city, country, limit, city_slots, progress)
+        )
+        for city in KNOWN_CITIES
+    ]
+    try:
+        for city, task in zip(KNOWN_CITIES, tasks, strict=True):
+            yield city, *await task
+    finally:
+        for task in tasks:
+            task.cancel()
 
-    deals: list[ScrapedDeal] = []
-    seen_keys: set[tuple[str, str, float]] = set()
-    async with httpx.AsyncClient(timeout=60, follow_redirects=True) as client:
-        for city in KNOWN_CITIES:
-            offset = 0
-            for _ in range(PEEKABOO_MAX_PAGES):
-                payload = _peekaboo_entity_payload(city, country, limit, offset)
-                try:
-                    response = await client.post(
-                        f"{domain}/uljin2s3nitoi89njkhklgkj5",
-                        headers=headers,
-                        json=payload,
-                    )
-                    response.raise_for_status()
-                    entities = response.json()
-                except Exception as exc:
-                    logger.warning("Peekaboo fetch failed for %s: %s", city, exc)
-                    break
 
-                if not entities:
-                    break
+class PeekabooConfigRejected(Exception):
+    """Peekaboo rejected a freshly fetched SDK config, so retrying cannot help."""
 
-                for entity in entities:
-                    if not isinstance(entity, dict):
-                        continue
-                    max_discount = float(entity.get("maxDiscount") or 0)
-                    if max_discount <= 0:
-                        continue
-                    merchant_name = _sanitize_merchant_name(entity.get("name", ""), source.name)
-                    if not _is_valid_merchant(merchant_name, source.name):
-                        continue
-                    merchant_image = entity.get("logo") or entity.get("cover")
-                    description = entity.get("description", "")
-                    keywords = entity.get("keywords", "")
-                    meta_text = f"{keywords} {description} {entity.get('name', '')}"
-                    category = _guess_category(meta_text)
-                    discount_flag = str(entity.get("discountFlag") or "Up to")
-                    conditions = clean_text(f"{discount_flag} {max_discount}% off")[:300]
-                    card_type, tier = _parse_card_type(meta_text)
-                    card_label = f"{source.name} {tier} {card_type} Card".replace(" Card Card", " Card")
-                    deal_key = (merchant_name, card_label.strip(), max_discount)
+
+async def _stream_peekaboo(
+    source: BankSource, progress: BankProgress | None = None
+) -> AsyncIterator[list[ScrapedDeal]]:
+    """New deals per Peekaboo city, yielded while later cities are still fetching.
+    A city's checkpoint moves into progress only once its deals were taken: pages
+    of a city still fetching, or done but queued behind one, are fetched again by
+    the next run rather than skipped."""
+    if not source.peekaboo_base:
+        return
+    progress = progress or BankProgress(bank_name=source.name)
+    # Keys synced earlier in a resumed run count as seen.
+    seen_keys: set[tuple[str, str, float]] = set(progress.seen_keys)
+
+    def city_deals(city: str, pages: list[list]) -> list[ScrapedDeal]:
+        deals: list[ScrapedDeal] = []
+        with timed("parse"):
+            for entities in pages:
+                for deal in _peekaboo_entity_deals(entities, source, city):
+                    deal_key = (deal.merchant_name, deal.card_name, deal.discount_percent)
                     if deal_key in seen_keys:
                         continue
                     seen_keys.add(deal_key)
-                    deals.append(
-                        ScrapedDeal(
-                            merchant_name=merchant_name,
-                            city=normalize_city(city),
-                            category=category,
-                            merchant_image_url=merchant_image,
-                            discount_percent=max_discount,
-                            card_name=card_label.strip(),
-                            card_tier=tier,
-                            card_type=card_type,
-                            conditions=conditions,
-                            valid_from=None,
-                            valid_to=None,
-                        )
-                    )
-
-                if len(entities) < limit:
-                    break
-                offset += limit
-
-    return deals
-
-
-async def scrape_source(source: BankSource) -> list[ScrapedDeal]:
-    if source.peekaboo_base:
-        deals = await _scrape_peekaboo(source)
+                    deals.append(deal)
+        return deals
+
+    config, cached = await _peekaboo_config(source.peekaboo_base)
+    rejected = False
+    async for city, pages, city_rejected, state in _fetch_peekaboo_cities(config, progress):
+        rejected = rejected or city_rejected
+        deals = city_deals(city, pages)
         if deals:
-            logger.info("Scraped %s deals from %s (peekaboo)", len(deals), source.name)
-            return deals
-
-    serp = SerpApiClient()
+            yield deals
+        progress.cities[city] = state
+    if not rejected:
+        return
+    # A rotated owner key or SDK version: forget the cached config and, if it
+    # was a cached copy, retry the unfinished cities once with a fresh one.
+    cache = get_fetch_cache()
+    if cache:
+        await asyncio.to_thread(cache.drop_peekaboo_config, source.peekaboo_base.lower())
+    if not cached:
+        # Raised so _scrape_bank fails the bank: its rejected cities would
+        # otherwise stay unfinished, and the run incomplete, for good.
+        raise PeekabooConfigRejected(f"{source.name}: Peekaboo rejected a freshly fetched config")
+    logger.info("%s: cached Peekaboo config rejected; refetching", source.name)
+    config, _ = await _peekaboo_config(source.peekaboo_base, refresh=True)
+    rejected = False
+    async for city, pages, city_rejected, state in _fetch_peekaboo_cities(config, progress):
+        rejected = rejected or city_rejected
+        deals = city_deals(city, pages)
+        if deals:
+            yield deals
+        progress.cities[city] = state
+    if rejected:
+        raise PeekabooConfigRejected(f"{source.name}: Peekaboo rejected a freshly fetched config")
+
+
+async def stream_source(
+    source: BankSource, progress: BankProgress | None = None
+) -> AsyncIterator[list[ScrapedDeal]]:
+    """A bank's deals in chunks as they are scraped: one chunk per Peekaboo city.
+    The SERP/page path yields once, after every page is loaded, since any page
+    may reveal a Peekaboo base whose deals replace the page deals.
+    A Peekaboo bank falls back to the SERP/page path only when Peekaboo gave it
+    nothing in the whole run (e.g. no config), never for a resumed or
+    circuit-skipped remainder."""
+    if source.peekaboo_base:
+        progress = progress or BankProgress(bank_name=source.name)
+        count = 0
+        async for deals in _stream_peekaboo(source, progress):
+            count += len(deals)
+            yield deals
+        if count or progress.peekaboo_started() or progress.out_of_time():
+            logger.info("Scraped %s deals from %s (peekaboo)", count, source.name)
+            return
+
+    serp = SerpApiClient(limiter=_host_limiter)
     query = f"site:{source.base_url} discounts offers card"
     results = await serp.search(query, num=100)
     urls = {source.website}
@@ -603,174 +924,482 @@ async def scrape_source(source: BankSource) -> list[ScrapedDeal]:
             urls.add(link)
 
     deals: list[ScrapedDeal] = []
-    tasks = [asyncio.create_task(_fetch_content(url)) for url in urls]
-    for task, url in zip(tasks, urls, strict=False):
-        try:
-            text, kind = await task
-        except Exception as exc:
-            logger.warning("Failed to fetch %s: %s", url, exc)
-            continue
-        if not text:
-            continue
-        if kind == "html" and not source.peekaboo_base:
-            peekaboo_base = _extract_peekaboo_base(text)
-            if peekaboo_base:
-                discovered = BankSource(
-                    name=source.name,
-                    website=source.website,
-                    base_url=source.base_url,
-                    peekaboo_base=peekaboo_base,
-                )
-                peekaboo_deals = await _scrape_peekaboo(discovered)
-                if peekaboo_deals:
-                    logger.info(
-                        "Scraped %s deals from %s (peekaboo discovered)",
-                        len(peekaboo_deals),
-                        source.name,
+    tasks = [asyncio.create_task(_load_page(url, source.name)) for url in urls]
+    try:
+        for task, url in zip(tasks, urls, strict=False):
+            try:
+                text, peekaboo_base, page_deals = await task
+            except HostCircuitOpen:
+                # Left to _scrape_bank, which keeps the bank unfinished for the next run.
+                raise
+            except Exception as exc:
+                logger.warning("Failed to fetch %s: %s", url, exc)
+                record_error(exc)
+                continue
+            if not text:
+                continue
+            if not source.peekaboo_base:
+                if peekaboo_base:
+                    discovered = BankSource(
+                        name=source.name,
+                        website=source.website,
+                        base_url=source.base_url,
+                        peekaboo_base=peekaboo_base,
                     )
-                    return peekaboo_deals
-        if kind == "html":
-            soup = BeautifulSoup(text, "lxml")
-            text = soup.get_text("\n")
-        deals.extend(_extract_deals_from_text(text, source.name))
+                    count = 0
+                    async for peekaboo_deals in _stream_peekaboo(discovered, progress):
+                        count += len(peekaboo_deals)
+                        yield peekaboo_deals
+                    if count:
+                        logger.info(
+                            "Scraped %s deals from %s (peekaboo discovered)", count, source.name
+                        )
+                        return
+            deals.extend(page_deals)
+    finally:
+        for task in tasks:
+            task.cancel()
     logger.info("Scraped %s deals from %s", len(deals), source.name)
 
-    fixes_used = 0
-    for idx, deal in enumerate(deals):
-        if fixes_used >= MAX_GROQ_FIXES:
-            break
-        if _looks_garbled(deal.merchant_name):
-            deals[idx] = await _normalize_deal_with_groq(deal, source)
-            fixes_used += 1
+    garbled = [deal for deal in deals if _looks_garbled(deal.merchant_name)][:MAX_GROQ_FIXES]
+    with timed("groq"):
+        results = await normalize_texts(source.name, [deal.conditions for deal in garbled])
+    for deal, payload in zip(garbled, results):
+        if payload:
+            _apply_groq_fields(deal, payload)
+    if deals:
+        yield deals
 
-    return deals
+
+async def scrape_source(
+    source: BankSource, progress: BankProgress | None = None
+) -> list[ScrapedDeal]:
+    """All of a bank's deals at once (stream_source collected)."""
+    return [deal async for deals in stream_source(source, progress) for deal in deals]
 
 
 def _deal_key(deal: ScrapedDeal) -> tuple[str, str]:
     return (deal.merchant_name, deal.card_name)
 
 
-async def sync_deals(
-    session: AsyncSession, source: BankSource, deals: list[ScrapedDeal]
-) -> tuple[int, int, int]:
-    """Sync deals: NEW (insert), EXPIRED (remove), UPDATED (replace changed).
-    Returns (inserted, expired, updated)."""
-    bank = (
-        await session.execute(select(Bank).where(Bank.name == source.name))
-    ).scalar_one_or_none()
-    if not bank:
-        bank = Bank(name=source.name, website=source.website)
-        session.add(bank)
-        await session.flush()
-
-    deals = [d for d in deals if not _looks_garbled(d.merchant_name)]
-    scraped_keys = {_deal_key(d) for d in deals}
-
-    # 1. EXPIRED: remove discounts for this bank where (merchant, card) not in scraped set
-    existing_for_bank = (
+def _deal_fields(deal: ScrapedDeal) -> tuple:
+    return (deal.discount_percent, deal.conditions, deal.valid_from, deal.valid_to)
+
+
+def discount_fingerprint(
+    discount_percent: float,
+    conditions: str | None,
+    valid_from: date | None,
+    valid_to: date | None,
+) -> str:
+    """Stable hash of the fields that make a discount "changed" (Discount.fingerprint)."""
+    raw = "\x1f".join(
+        [
+            repr(float(discount_percent)),
+            conditions or "",
+            valid_from.isoformat() if valid_from else "",
+            valid_to.isoformat() if valid_to else "",
+        ]
+    )
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def _chunks(items: list, size: int = SYNC_BATCH_SIZE) -> Iterable[list]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _id_array(ids: list[int]):
+    return any_(bindparam("ids", ids, type_=ARRAY(Integer)))
+
+
+async def _upsert_merchants(
+    session: AsyncSession, deals: list[ScrapedDeal]
+) -> dict[str, int]:
+    """Return merchant ids by name, inserting missing merchants in batches.
+    The first deal seen for a name decides its category/city (as before)."""
+    first_by_name: dict[str, ScrapedDeal] = {}
+    image_by_name: dict[str, str] = {}
+    for deal in deals:
+        first_by_name.setdefault(deal.merchant_name, deal)
+        if deal.merchant_image_url:
+            image_by_name.setdefault(deal.merchant_name, deal.merchant_image_url)
+    names = list(first_by_name)
+    if not names:
+        return {}
+
+    rows = (
         await session.execute(
-            select(Discount, Merchant.name, Card.name)
-            .join(Merchant, Discount.merchant_id == Merchant.id)
-            .join(Card, Discount.card_id == Card.id)
-            .where(Card.bank_id == bank.id)
+            select(Merchant.id, Merchant.name, Merchant.image_url).where(
+                Merchant.name == any_(bindparam("names", names, type_=ARRAY(Text)))
+            )
         )
     ).all()
-    expired = 0
-    for row in existing_for_bank:
-        d, mname, cname = row
-        if (mname, cname) not in scraped_keys:
-            await session.execute(delete(Discount).where(Discount.id == d.id))
-            expired += 1
-
-    # 2. NEW + UPDATED: for each scraped deal, insert or replace
-    inserted = 0
-    updated = 0
-    for deal in deals:
-        merchant = (
-            await session.execute(
-                select(Merchant).where(Merchant.name == deal.merchant_name)
-            )
-        ).scalar_one_or_none()
-        if not merchant:
-            merchant = Merchant(
-                name=deal.merchant_name,
-                category=deal.category,
-                city=deal.city,
-                image_url=deal.merchant_image_url,
+    ids = {row.name: row.id for row in rows}
+    missing_image = {row.name: row.id for row in rows if not row.image_url}
+
+    new_names = [name for name in names if name not in ids]
+    for chunk in _chunks(new_names):
+        stmt = (
+            pg_insert(Merchant)
+            .values(
+                [
+                    {
+                        "name": name,
+                        "category": first_by_name[name].category,
+                        "city": first_by_name[name].city,
+                        "image_url": image_by_name.get(name),
+                    }
+                    for name in chunk
+                ]
             )
-            session.add(merchant)
-            await session.flush()
-        elif deal.merchant_image_url and not merchant.image_url:
-            merchant.image_url = deal.merchant_image_url
-
-        card = (
+            .on_conflict_do_nothing(index_elements=[Merchant.name])
+            .returning(Merchant.id, Merchant.name)
+        )
+        for row in (await session.execute(stmt)).all():
+            ids[row.name] = row.id
+    lost = [name for name in new_names if name not in ids]
+    if lost:
+        # Inserted concurrently by another writer between our select and insert.
+        rows = (
             await session.execute(
-                select(Card).where(
-                    Card.bank_id == bank.id,
-                    Card.name == deal.card_name,
+                select(Merchant.id, Merchant.name).where(
+                    Merchant.name == any_(bindparam("names", lost, type_=ARRAY(Text)))
                 )
             )
-        ).scalar_one_or_none()
-        if not card:
-            card = Card(
-                bank_id=bank.id,
-                name=deal.card_name,
-                tier=deal.card_tier,
-                type=deal.card_type,
+        ).all()
+        ids.update({row.name: row.id for row in rows})
+
+    image_updates = [
+        {"id": merchant_id, "image_url": image_by_name[name]}
+        for name, merchant_id in missing_image.items()
+        if name in image_by_name
+    ]
+    for chunk in _chunks(image_updates):
+        data = values(
+            column("id", Integer), column("image_url", Text), name="new_images"
+        ).data([(item["id"], item["image_url"]) for item in chunk])
+        await session.execute(
+            update(Merchant)
+            .where(Merchant.id == data.c.id, Merchant.image_url.is_(None))
+            .values(image_url=data.c.image_url)
+        )
+    return ids
+
+
+async def _upsert_cards(
+    session: AsyncSession, bank_id: int, deals: list[ScrapedDeal]
+) -> dict[str, int]:
+    """Return card ids by name for this bank, inserting missing cards in batches."""
+    rows = (
+        await session.execute(select(Card.id, Card.name).where(Card.bank_id == bank_id))
+    ).all()
+    ids = {row.name: row.id for row in rows}
+
+    new_cards: dict[str, ScrapedDeal] = {}
+    for deal in deals:
+        if deal.card_name not in ids:
+            new_cards.setdefault(deal.card_name, deal)
+    for chunk in _chunks(list(new_cards.values())):
+        stmt = (
+            pg_insert(Card)
+            .values(
+                [
+                    {
+                        "bank_id": bank_id,
+                        "name": deal.card_name,
+                        "tier": deal.card_tier,
+                        "type": deal.card_type,
+                    }
+                    for deal in chunk
+                ]
             )
-            session.add(card)
+            .on_conflict_do_nothing(constraint="uq_cards_bank_name")
+            .returning(Card.id, Card.name)
+        )
+        for row in (await session.execute(stmt)).all():
+            ids[row.name] = row.id
+    if any(name not in ids for name in new_cards):
+        rows = (
+            await session.execute(select(Card.id, Card.name).where(Card.bank_id == bank_id))
+        ).all()
+        ids = {row.name: row.id for row in rows}
+    return ids
+
+
+class DealWriter:
+    """Applies one bank's deals to the DB batch by batch as they stream in:
+    NEW (insert), UPDATED (replace changed) per batch, EXPIRED once at finish().
+
+    start() loads the bank's current discounts once as (pair, fingerprint, id),
+    without their text; each write() upserts the batch's merchants and cards,
+    compares fingerprints against the rows known so far (including rows written
+    by earlier batches) and touches only pairs whose fingerprints differ, with
+    batched DELETE ... WHERE id = ANY(...) and INSERT ... ON CONFLICT. An
+    unchanged scrape writes nothing. Nothing is committed here; callers commit
+    between batches."""
+
+    def __init__(self, session: AsyncSession, source: BankSource) -> None:
+        self.session = session
+        self.source = source
+        self.inserted = 0
+        self.updated = 0
+        self._bank_id: int | None = None
+        # (merchant_id, card_id) -> [(fingerprint, discount id)] as loaded in start().
+        self._existing: dict[tuple[int, int], list[tuple[str, int | None]]] = {}
+        self._existing_names: dict[tuple[int, int], tuple[str, str]] = {}
+        # Pairs seen in this stream -> their rows after the batches so far.
+        self._current: dict[tuple[int, int], list[tuple[str, int | None]]] = {}
+
+    async def start(self) -> None:
+        session = self.session
+        bank = (
+            await session.execute(select(Bank).where(Bank.name == self.source.name))
+        ).scalar_one_or_none()
+        if not bank:
+            bank = Bank(name=self.source.name, website=self.source.website)
+            session.add(bank)
             await session.flush()
+        self._bank_id = bank.id
 
-        existing = (
+        existing_rows = (
             await session.execute(
-                select(Discount).where(
-                    Discount.merchant_id == merchant.id,
-                    Discount.card_id == card.id,
+                select(
+                    Discount.id,
+                    Discount.merchant_id,
+                    Discount.card_id,
+                    Discount.fingerprint,
+                    Merchant.name.label("merchant_name"),
+                    Card.name.label("card_name"),
                 )
+                .join(Merchant, Discount.merchant_id == Merchant.id)
+                .join(Card, Discount.card_id == Card.id)
+                .where(Card.bank_id == bank.id)
             )
-        ).scalars().all()
-
-        exact_match = any(
-            (
-                e.discount_percent == deal.discount_percent
-                and e.conditions == deal.conditions
-                and e.valid_from == deal.valid_from
-                and e.valid_to == deal.valid_to
+        ).all()
+        fingerprints = {row.id: row.fingerprint for row in existing_rows}
+        missing = [row_id for row_id, fingerprint in fingerprints.items() if not fingerprint]
+        if missing:
+            fingerprints.update(await self._backfill_fingerprints(missing))
+        for row in existing_rows:
+            pair = (row.merchant_id, row.card_id)
+            self._existing.setdefault(pair, []).append((fingerprints[row.id], row.id))
+            self._existing_names[pair] = (row.merchant_name, row.card_name)
+
+    async def _backfill_fingerprints(self, ids: list[int]) -> dict[int, str]:
+        """Fingerprint rows written before the column existed (or by other tools)."""
+        computed: dict[int, str] = {}
+        for chunk in _chunks(ids, SYNC_BATCH_SIZE * 10):
+            rows = (
+                await self.session.execute(
+                    select(
+                        Discount.id,
+                        Discount.discount_percent,
+                        Discount.conditions,
+                        Discount.valid_from,
+                        Discount.valid_to,
+                    ).where(Discount.id == _id_array(chunk))
+                )
+            ).all()
+            for row in rows:
+                computed[row.id] = discount_fingerprint(
+                    row.discount_percent, row.conditions, row.valid_from, row.valid_to
+                )
+        for chunk in _chunks(list(computed.items())):
+            data = values(
+                column("id", Integer), column("fingerprint", Text), name="new_fingerprints"
+            ).data(chunk)
+            await self.session.execute(
+                update(Discount)
+                .where(Discount.id == data.c.id)
+                .values(fingerprint=data.c.fingerprint)
             )
-            for e in existing
-        )
-        if exact_match:
-            continue
+        logger.info("%s: fingerprinted %d existing discounts", self.source.name, len(computed))
+        return computed
+
+    async def write(self, deals: list[ScrapedDeal]) -> None:
+        session = self.session
+        deals = [d for d in deals if not _looks_garbled(d.merchant_name)]
+        if not deals:
+            return
+        merchant_ids = await _upsert_merchants(session, deals)
+        card_ids = await _upsert_cards(session, self._bank_id, deals)
+
+        # Replay the per-deal rules in order: an exact match keeps the current rows,
+        # anything else replaces every current row for that (merchant, card) pair.
+        stale_ids: list[int] = []
+        # Latest replacement per pair; earlier ones in the same batch are never written.
+        pending: dict[tuple[int, int], tuple[tuple, str]] = {}
+        for deal in deals:
+            pair = (merchant_ids[deal.merchant_name], card_ids[deal.card_name])
+            if pair not in self._current:
+                self._current[pair] = self._existing.get(pair, [])
+            rows = self._current[pair]
+            fields = _deal_fields(deal)
+            fingerprint = discount_fingerprint(*fields)
+            if any(existing == fingerprint for existing, _ in rows):
+                continue
+            self.updated += len(rows)
+            stale_ids.extend(row_id for _, row_id in rows if row_id)
+            self._current[pair] = [(fingerprint, None)]
+            pending[pair] = (fields, fingerprint)
+            self.inserted += 1
+
+        for chunk in _chunks(stale_ids, SYNC_BATCH_SIZE * 10):
+            await session.execute(delete(Discount).where(Discount.id == _id_array(chunk)))
+
+        new_rows = [
+            {
+                "merchant_id": pair[0],
+                "card_id": pair[1],
+                "discount_percent": fields[0],
+                "conditions": fields[1],
+                "valid_from": fields[2],
+                "valid_to": fields[3],
+                "fingerprint": fingerprint,
+            }
+            for pair, (fields, fingerprint) in pending.items()
+        ]
+        for chunk in _chunks(new_rows):
+            stmt = (
+                pg_insert(Discount)
+                .values(chunk)
+                .on_conflict_do_nothing(constraint="uq_discount_unique")
+                .returning(Discount.id, Discount.merchant_id, Discount.card_id)
+            )
+            # Remember the new ids so a later batch can replace these rows.
+            for row in (await session.execute(stmt)).all():
+                pair = (row.merchant_id, row.card_id)
+                self._current[pair] = [(self._current[pair][0][0], row.id)]
+
+    async def finish(
+        self, expire: bool = True, keep_pairs: set[tuple[str, str]] | None = None
+    ) -> int:
+        """EXPIRED: delete this bank's (merchant, card) pairs the stream did not
+        contain, except keep_pairs (names synced earlier in a resumed run).
+        Returns the number of expired rows."""
+        if not expire:
+            return 0
+        keep_pairs = keep_pairs or set()
+        expired_ids = [
+            row_id
+            for pair, rows in self._existing.items()
+            if pair not in self._current and self._existing_names[pair] not in keep_pairs
+            for _, row_id in rows
+        ]
+        for chunk in _chunks(expired_ids, SYNC_BATCH_SIZE * 10):
+            await self.session.execute(delete(Discount).where(Discount.id == _id_array(chunk)))
+        return len(expired_ids)
 
-        # UPDATED: delete old rows for this merchant+card (percent/conditions changed)
-        for e in existing:
-            await session.execute(delete(Discount).where(Discount.id == e.id))
-            updated += 1
-
-        # INSERT (new or replacement)
-        discount = Discount(
-            merchant_id=merchant.id,
-            card_id=card.id,
-            discount_percent=deal.discount_percent,
-            conditions=deal.conditions,
-            valid_from=deal.valid_from,
-            valid_to=deal.valid_to,
-        )
-        session.add(discount)
-        inserted += 1
 
+async def sync_deals(
+    session: AsyncSession,
+    source: BankSource,
+    deals: list[ScrapedDeal],
+    expire: bool = True,
+    keep_pairs: set[tuple[str, str]] | None = None,
+) -> tuple[int, int, int]:
+    """Sync deals: NEW (insert), EXPIRED (remove), UPDATED (replace changed).
+    Returns (inserted, expired, updated).
+
+    expire=False skips the EXPIRED step (partial scrape of a bank); keep_pairs
+    are (merchant, card) names synced earlier in a resumed run that must not
+    be expired. One-shot form of DealWriter."""
+    writer = DealWriter(session, source)
+    await writer.start()
+    await writer.write(deals)
+    expired = await writer.finish(expire, keep_pairs)
     await session.commit()
-    return inserted, expired, updated
-
+    return writer.inserted, expired, writer.updated
+
+
+# Public suffixes with two labels among the banks' hosts; a registrable domain
+# sits one label below them (mcb.com.pk, not com.pk).
+_TWO_LABEL_SUFFIXES = {"com.pk", "org.pk", "net.pk", "gov.pk", "edu.pk", "co.uk", "com.au"}
+
+
+def _source_host(source: BankSource) -> str:
+    """Registrable domain a bank's scrape mostly hits (all Peekaboo banks share one)."""
+    host = source.peekaboo_base or urlsplit(f"//{source.base_url}").hostname or source.base_url
+    labels = host.lower().split(".")
+    keep = 3 if ".".join(labels[-2:]) in _TWO_LABEL_SUFFIXES else 2
+    return ".".join(labels[-keep:])
+
+
+async def _scrape_bank(
+    source: BankSource,
+    bank_slots: asyncio.Semaphore,
+    host_slots: dict[str, asyncio.Semaphore],
+    progress: BankProgress,
+    queue: asyncio.Queue,
+) -> None:
+    """Stage one: network scrape for one bank, bounded globally and per host.
+    Puts (source, deals, stats, cities) batches of up to SCRAPE_WRITE_BATCH_SIZE
+    deals on queue as they are scraped, then (source, None, stats, None) when the
+    bank is over. cities are the Peekaboo city checkpoints whose deals are all in
+    that batch or earlier ones (None if no city was completed since the last).
+    Sets progress.done unless the run deadline cut the bank short."""
+    stats = BankStats(bank_name=source.name, status="partial")
+    batch_size = max(settings.scrape_write_batch_size, 1)
+    batch: list[ScrapedDeal] = []
+    # (deals streamed, city checkpoints covering only those), oldest first.
+    marks: list[tuple[int, dict[str, CityProgress]]] = []
+
+    def cities_within(streamed: int) -> dict[str, CityProgress] | None:
+        cities = None
+        while marks and marks[0][0] <= streamed:
+            cities = marks.pop(0)[1]
+        return cities
+
+    async def pump() -> None:
+        async for deals in stream_source(source, progress):
+            # progress now holds the cities of every earlier chunk.
+            marks.append((stats.deals_seen, progress.city_snapshot()))
+            stats.deals_seen += len(deals)
+            batch.extend(deals)
+            while len(batch) >= batch_size:
+                cities = cities_within(stats.deals_seen - len(batch) + batch_size)
+                # Trimmed only once queued, so a put cut off by the deadline keeps its deals.
+                await queue.put((source, batch[:batch_size], stats, cities))
+                del batch[:batch_size]
 
-async def _scrape_and_sync_bank(
-    session: AsyncSession, source: BankSource
-) -> tuple[int, int, int]:
-    """Scrape one bank and sync (new + expired + updated)."""
-    deals = await scrape_source(source)
-    if not deals:
-        return 0, 0, 0
-    return await sync_deals(session, source, deals)
+    try:
+        async with bank_slots, host_slots[_source_host(source)]:
+            if progress.out_of_time():
+                return
+            started = time.perf_counter()
+            time_left = progress.time_left()
+            # Peekaboo stops itself at the deadline; the grace covers one in-flight request.
+            timeout = None
+            if time_left is not None:
+                timeout = time_left + settings.scrape_commit_margin_seconds / 2
+            with track_bank(stats):
+                try:
+                    await asyncio.wait_for(pump(), timeout)
+                    progress.done = all(city.done for city in progress.cities.values())
+                except asyncio.TimeoutError:
+                    logger.warning("%s: stopped at the run deadline", source.name)
+                except HostCircuitOpen as exc:
+                    # Left unfinished, so the next run retries the bank.
+                    logger.warning("%s: %s", source.name, exc)
+                    stats.add_error(exc)
+                except Exception as exc:
+                    logger.warning("Scrape failed for %s: %s", source.name, exc)
+                    stats.add_error(exc)
+                    stats.status = "failed"
+                    progress.done = True
+            if progress.done and stats.status != "failed":
+                stats.status = "done"
+            if batch:
+                await queue.put((source, batch, stats, progress.city_snapshot()))
+            logger.info(
+                "%s: scraped %d deals in %.1fs",
+                source.name,
+                stats.deals_seen,
+                time.perf_counter() - started,
+            )
+    finally:
+        await queue.put((source, None, stats, None))
 
 
 async def get_sources(session: AsyncSession) -> list[BankSource]:
@@ -792,31 +1421,124 @@ async def get_sources(session: AsyncSession) -> list[BankSource]:
     return SOURCES
 
 
-async def run_full_scrape(session: AsyncSession) -> int:
+async def run_full_scrape(
+    session: AsyncSession, resume: bool = True, sources: list[BankSource] | None = None
+) -> int:
     """Scrape all banks. Each bank runs NEW+EXPIRED+UPDATED sync.
-    Banks run sequentially to avoid DB contention."""
+    Stage one scrapes banks concurrently (SCRAPE_BANK_CONCURRENCY overall,
+    SCRAPE_HOST_CONCURRENCY per host) and streams their deals through a queue
+    bounded at SCRAPE_QUEUE_BATCHES batches; stage two is a single writer on
+    this session that applies each batch while scraping continues and runs a
+    bank's EXPIRED step once its stream ends.
+
+    Progress is checkpointed per bank and Peekaboo city with each write batch
+    and after each bank, so a run killed by the host (or stopped at SCRAPE_DEADLINE_MINUTES) is resumed
+    by the next call instead of starting over (unless resume=False).
+
+    sources overrides get_sources (e.g. synthetic banks for a load test)."""
     total_inserted = 0
     total_expired = 0
     total_updated = 0
-    sources = await get_sources(session)
-    logger.info("Using %d sources for scrape", len(sources))
-    for source in sources:
-        inserted, expired, updated = await _scrape_and_sync_bank(session, source)
-        total_inserted += inserted
-        total_expired += expired
-        total_updated += updated
-        if inserted or expired or updated:
-            logger.info(
-                "%s: +%d new, -%d expired, ~%d updated",
-                source.name,
-                inserted,
-                expired,
-                updated,
-            )
+    started = time.perf_counter()
+    sources = sources or await get_sources(session)
+    progress = await ScrapeProgress.resume_or_start(session, resume)
+    pending = [source for source in sources if not progress.bank(source.name).done]
+    logger.info(
+        "Using %d sources for scrape (%d left in run %d)",
+        len(sources),
+        len(pending),
+        progress.run_id,
+    )
+    bank_slots = asyncio.Semaphore(settings.scrape_bank_concurrency)
+    host_slots: dict[str, asyncio.Semaphore] = defaultdict(
+        lambda: asyncio.Semaphore(settings.scrape_host_concurrency)
+    )
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(settings.scrape_queue_batches, 1))
+    tasks = [
+        asyncio.create_task(
+            _scrape_bank(source, bank_slots, host_slots, progress.bank(source.name), queue)
+        )
+        for source in pending
+    ]
+    writers: dict[str, DealWriter] = {}
+    lag = LoopLagMonitor()
+    try:
+        async with lag:
+            remaining = len(tasks)
+            while remaining:
+                source, deals, stats, cities = await queue.get()
+                bank_progress = progress.bank(source.name)
+                writer = writers.get(source.name)
+                if deals is not None:
+                    bank_progress.seen_keys.update(
+                        (d.merchant_name, d.card_name, d.discount_percent) for d in deals
+                    )
+                    with timed("sync", stats):
+                        if writer is None:
+                            writer = writers[source.name] = DealWriter(session, source)
+                            await writer.start()
+                        await writer.write(deals)
+                        await progress.save_batch(session, bank_progress, cities or {})
+                        await session.commit()
+                    continue
+
+                remaining -= 1
+                if writer is not None:
+                    del writers[source.name]
+                    with timed("sync", stats):
+                        # A failed bank was only partly scraped: keep what it did not list.
+                        expired = await writer.finish(
+                            expire=bank_progress.done and stats.status != "failed",
+                            keep_pairs=bank_progress.seen_pairs,
+                        )
+                    stats.inserted, stats.expired, stats.updated = (
+                        writer.inserted,
+                        expired,
+                        writer.updated,
+                    )
+                    total_inserted += writer.inserted
+                    total_expired += expired
+                    total_updated += writer.updated
+                    if writer.inserted or expired or writer.updated:
+                        logger.info(
+                            "%s: +%d new, -%d expired, ~%d updated",
+                            source.name,
+                            writer.inserted,
+                            expired,
+                            writer.updated,
+                        )
+                await save_bank_stats(session, progress.run_id, stats)
+                await progress.save_bank(session, bank_progress)
+    finally:
+        for task in tasks:
+            task.cancel()
+    complete = all(progress.bank(source.name).done for source in sources)
+    await save_run_stats(
+        session, progress.run_id, (time.perf_counter() - started) * 1000, lag.max_ms
+    )
+    await progress.finish(session, complete)
+    if total_inserted or total_expired or total_updated:
+        # Readers switch to the new deals here, all banks at once.
+        await refresh_deal_search(session)
+    else:
+        # No deal changed, but bank rows may have (e.g. a newly added source).
+        await bump_generation(session)
+        await session.commit()
+    if not complete:
+        logger.warning(
+            "Scrape run %d stopped early: %d/%d banks done; the next run resumes it",
+            progress.run_id,
+            sum(1 for source in sources if progress.bank(source.name).done),
+            len(sources),
+        )
     logger.info(
-        "Scrape done: +%d new, -%d expired, ~%d updated",
+        "Scrape done in %.1fs: +%d new, -%d expired, ~%d updated "
+        "(event loop lag max %.0f ms, mean %.1f ms)",
+        time.perf_counter() - started,
         total_inserted,
         total_expired,
         total_updated,
+        lag.max_ms,
+        lag.mean_ms,
     )
     return total_inserted
@@ -1,20 +1,26 @@
 import logging
 from typing import Any
 
-import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
 
 from app.core.config import settings
+from app.services.http_client import get_client
+from app.services.rate_limit import AdaptiveHostLimiter, HostCircuitOpen
 
 logger = logging.getLogger(__name__)
 
 
 class SerpApiClient:
-    def __init__(self) -> None:
-        self.base_url = "https://serpapi.com/search.json"
+    def __init__(self, limiter: AdaptiveHostLimiter | None = None) -> None:
+        self.base_url = f"{settings.serp_base_url.rstrip('/')}/search.json"
         self.api_key = settings.serp_api_key
+        self.limiter = limiter
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=8))
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(min=1, max=8),
+        retry=retry_if_not_exception_type(HostCircuitOpen),
+    )
     async def search(self, query: str, num: int = 10) -> list[dict[str, Any]]:
         params = {
             "engine": "google",
@@ -22,10 +28,13 @@ class SerpApiClient:
             "api_key": self.api_key,
             "num": num,
         }
-        async with httpx.AsyncClient(timeout=30) as client:
+        client = get_client("serp")
+        if self.limiter:
+            response = await self.limiter.request(client, "GET", self.base_url, params=params)
+        else:
             response = await client.get(self.base_url, params=params)
-            response.raise_for_status()
-            payload = response.json()
+        response.raise_for_status()
+        payload = response.json()
         results = payload.get("organic_results", []) or []
         logger.info("SERP API results for %s: %s", query, len(results))
         return results
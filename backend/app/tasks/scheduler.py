@@ -6,9 +6,9 @@ from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.db.deal_search import refresh_deal_search
 from app.db.models import Discount
-from app.services.rag import RAGService
-from app.services.scraper import run_full_scrape
+from app.services.scrape_jobs import enqueue_job
 
 logger = logging.getLogger(__name__)
 
@@ -17,19 +17,21 @@ async def expire_old_discounts(session: AsyncSession) -> int:
     stmt = delete(Discount).where(Discount.valid_to.is_not(None), Discount.valid_to < date.today())
     result = await session.execute(stmt)
     await session.commit()
-    return result.rowcount or 0
+    expired = result.rowcount or 0
+    if expired:
+        await refresh_deal_search(session)
+    return expired
 
 
 def start_scheduler(get_session):
     scheduler = AsyncIOScheduler()
 
     async def scheduled_job():
+        # The scrape worker runs it (scrape, expiry, RAG rebuild).
         async for session in get_session():
-            inserted = await run_full_scrape(session)
-            expired = await expire_old_discounts(session)
-            await RAGService().rebuild_index(session)
+            job, created = await enqueue_job(session, "scheduler")
             logger.info(
-                "Scheduler: inserted %s, expired %s discounts", inserted, expired
+                "Scheduler: %s scrape job %s", "queued" if created else "already have", job.id
             )
 
     scheduler.add_job(
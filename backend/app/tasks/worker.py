@@ -0,0 +1,81 @@
+"""Scrape worker: runs queued scrape jobs (app.services.scrape_jobs) one at a time.
+
+    python -m app.tasks.worker
+
+The API starts one as a child process unless SCRAPE_WORKER_EMBEDDED=false, in
+which case run it as its own service. Any number of workers may run; the
+advisory lock lets one scrape at a time. SIGTERM/SIGINT requeue a running job
+so the next worker resumes it from its checkpoint.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+
+from app.core.config import settings
+from app.core.logging import configure_logging
+from app.db.init_db import init_db
+from app.db.session import engine
+from app.services.http_client import close_http_clients, init_http_clients
+from app.services.parse_pool import shutdown_parse_pool
+from app.services.scrape_jobs import run_next_job, worker_name
+
+logger = logging.getLogger(__name__)
+
+
+async def _watch_parent(parent_pid: int, stop: asyncio.Event) -> None:
+    # Reparented (the API died without terminating us): stop like on SIGTERM.
+    while not stop.is_set():
+        if os.getppid() != parent_pid:
+            logger.warning("Parent process %d is gone; stopping", parent_pid)
+            stop.set()
+            return
+        await asyncio.sleep(1)
+
+
+async def run_worker(parent_pid: int | None = None) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    watcher = asyncio.create_task(_watch_parent(parent_pid, stop)) if parent_pid else None
+
+    await init_db()
+    init_http_clients()
+    logger.info("Scrape worker %s started", worker_name())
+    poll = max(settings.scrape_worker_poll_seconds, 0.1)
+    try:
+        while not stop.is_set():
+            try:
+                job = await run_next_job(stop)
+            except Exception as exc:
+                logger.error("Scrape worker error: %s", exc, exc_info=exc)
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(stop.wait(), poll)
+                except asyncio.TimeoutError:
+                    pass
+    finally:
+        if watcher:
+            watcher.cancel()
+        await close_http_clients()
+        shutdown_parse_pool()
+        await engine.dispose()
+        logger.info("Scrape worker %s stopped", worker_name())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--parent-pid", type=int, default=None, help="exit when this process goes away"
+    )
+    args = parser.parse_args()
+    configure_logging()
+    asyncio.run(run_worker(args.parent_pid))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import asyncio
+import time
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a periodic sleeper (async context manager).
+
+    A busy loop (e.g. CPU-bound parsing on it) shows up as large max_ms.
+    """
+
+    def __init__(self, interval: float = 0.1) -> None:
+        self.interval = interval
+        self.samples = 0
+        self.max_ms = 0.0
+        self.total_ms = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag_ms = max((time.perf_counter() - started - self.interval) * 1000, 0.0)
+            self.samples += 1
+            self.total_ms += lag_ms
+            self.max_ms = max(self.max_ms, lag_ms)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.samples if self.samples else 0.0
+
+    async def __aenter__(self) -> "LoopLagMonitor":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
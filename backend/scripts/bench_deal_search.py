@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Benchmark the read paths on the four-way join vs the deal_search view.
+Seeds a throwaway bank ("Deal Search Benchmark Bank") with N synthetic deals in
+SQL, refreshes deal_search, times each query (median of --repeat runs) both
+ways, then removes the bank and refreshes again.
+
+From backend dir (DATABASE_URL from .env or env):
+  python scripts/bench_deal_search.py                    # 4k, 40k and 400k deals
+  python scripts/bench_deal_search.py 40000 --repeat 9
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+backend_root = Path(__file__).resolve().parent.parent
+if str(backend_root) not in sys.path:
+    sys.path.insert(0, str(backend_root))
+os.chdir(backend_root)
+
+from sqlalchemy import delete, func, select, text
+
+from app.db.deal_search import deal_search, refresh_deal_search
+from app.db.init_db import init_db
+from app.db.models import Bank, Card, Discount, Merchant
+from app.db.session import AsyncSessionLocal, engine
+from app.routers.discounts import filtered_discounts_query
+from app.services.scraper import KNOWN_CITIES
+
+BANK = "Deal Search Benchmark Bank"
+MERCHANT_PREFIX = "DS Bench Merchant "
+CATEGORIES = ["Food", "Clothing", "Health", "Travel", "Electronics", "Education"]
+DEALS_PER_MERCHANT = 3  # one per card
+ds = deal_search.c
+
+
+async def _seed(session, count: int) -> None:
+    bank_id = (
+        await session.execute(
+            text("INSERT INTO banks (name, website) VALUES (:n, 'https://example.com') RETURNING id"),
+            {"n": BANK},
+        )
+    ).scalar_one()
+    await session.execute(
+        text(
+            "INSERT INTO cards (bank_id, name, tier, type) VALUES "
+            "(:b, :n || ' Gold Credit Card', 'Gold', 'Credit'), "
+            "(:b, :n || ' Platinum Credit Card', 'Platinum', 'Credit'), "
+            "(:b, :n || ' Debit Card', NULL, 'Debit')"
+        ),
+        {"b": bank_id, "n": BANK},
+    )
+    await session.execute(
+        text(
+            "INSERT INTO merchants (name, category, city) "
+            "SELECT :prefix || i, (CAST(:categories AS text[]))[1 + i % :ncat], "
+            "(CAST(:cities AS text[]))[1 + i % :ncity] "
+            "FROM generate_series(0, :merchants - 1) AS i"
+        ),
+        {
+            "prefix": MERCHANT_PREFIX,
+            "categories": CATEGORIES,
+            "ncat": len(CATEGORIES),
+            "cities": KNOWN_CITIES,
+            "ncity": len(KNOWN_CITIES),
+            "merchants": -(-count // DEALS_PER_MERCHANT),
+        },
+    )
+    await session.execute(
+        text(
+            "INSERT INTO discounts (merchant_id, card_id, discount_percent, conditions, valid_to) "
+            "SELECT m.id, c.id, 5 + (m.id + c.id) % 45, "
+            "'Up to ' || (5 + (m.id + c.id) % 45) || '% off on dine-in and buffet', "
+            "current_date + (m.id % 90) "
+            "FROM merchants m CROSS JOIN cards c "
+            "WHERE m.name LIKE :prefix || '%' AND c.bank_id = :b "
+            "ORDER BY m.id, c.id LIMIT :count"
+        ),
+        {"prefix": MERCHANT_PREFIX, "b": bank_id, "count": count},
+    )
+    await session.commit()
+    await session.execute(text("ANALYZE discounts, merchants, cards, banks"))
+    await refresh_deal_search(session)
+    await session.execute(text("ANALYZE deal_search"))
+
+
+async def _cleanup(session) -> None:
+    bank_id = (await session.execute(select(Bank.id).where(Bank.name == BANK))).scalar()
+    if bank_id:
+        card_ids = select(Card.id).where(Card.bank_id == bank_id)
+        await session.execute(delete(Discount).where(Discount.card_id.in_(card_ids)))
+        await session.execute(delete(Card).where(Card.bank_id == bank_id))
+        await session.execute(delete(Bank).where(Bank.id == bank_id))
+    await session.execute(delete(Merchant).where(Merchant.name.like(MERCHANT_PREFIX + "%")))
+    await session.commit()
+    await refresh_deal_search(session)
+
+
+def _joined(*columns):
+    return (
+        select(*columns)
+        .select_from(Discount)
+        .join(Merchant, Discount.merchant_id == Merchant.id)
+        .join(Card, Discount.card_id == Card.id)
+        .join(Bank, Card.bank_id == Bank.id)
+    )
+
+
+_JOIN_COLUMNS = (
+    Discount.id,
+    Discount.discount_percent,
+    Discount.conditions,
+    Discount.valid_from,
+    Discount.valid_to,
+    Merchant.name,
+    Merchant.city,
+    Merchant.category,
+    Merchant.image_url,
+    Card.name,
+    Card.type,
+    Card.tier,
+    Bank.name,
+)
+
+
+# What the read paths select; the view's tsvector is only ever filtered on.
+_VIEW_COLUMNS = [column for column in deal_search.c if column.name != "search_vector"]
+
+
+def _page_and_count(query) -> list:
+    return [query.limit(50), select(func.count()).select_from(query.order_by(None).subquery())]
+
+
+def _scenarios() -> list[tuple[str, list, list]]:
+    """(label, join statements, deal_search statements); each side runs all of its statements."""
+    search = func.to_tsquery("simple", "buffet:*")
+    join_search = _joined(*_JOIN_COLUMNS).where(Discount.search_vector.bool_op("@@")(search))
+    join_search = join_search.order_by(func.ts_rank(Discount.search_vector, search).desc(), Discount.id)
+    popularity = (
+        select(Merchant.id, func.count(Discount.id))
+        .join(Discount, Discount.merchant_id == Merchant.id)
+        .group_by(Merchant.id)
+    )
+    return [
+        (
+            "discounts?category=Food",
+            _page_and_count(
+                _joined(*_JOIN_COLUMNS).where(func.lower(Merchant.category) == "food")
+            ),
+            _page_and_count(filtered_discounts_query(category="Food", sort="id")[0]),
+        ),
+        (
+            "discounts?bank=&city=",
+            _page_and_count(
+                _joined(*_JOIN_COLUMNS).where(
+                    func.lower(Bank.name) == BANK.lower(), Merchant.city.ilike("%Lahore%")
+                )
+            ),
+            _page_and_count(filtered_discounts_query(bank=BANK, city="Lahore", sort="id")[0]),
+        ),
+        (
+            "discounts?intent=buffet",
+            _page_and_count(join_search),
+            _page_and_count(filtered_discounts_query(intent="buffet", sort="relevance")[0]),
+        ),
+        (
+            "assistant candidates (city)",
+            [popularity, _joined(*_JOIN_COLUMNS).where(func.lower(Merchant.city) == "karachi")],
+            [select(*_VIEW_COLUMNS).where(func.lower(ds.city) == "karachi")],
+        ),
+        (
+            "analytics top categories",
+            [
+                select(Merchant.category, func.count(Discount.id))
+                .join(Discount, Discount.merchant_id == Merchant.id)
+                .group_by(Merchant.category)
+                .order_by(func.count(Discount.id).desc())
+                .limit(5)
+            ],
+            [
+                select(ds.category, func.count())
+                .group_by(ds.category)
+                .order_by(func.count().desc())
+                .limit(5)
+            ],
+        ),
+        ("RAG rebuild scan", [_joined(*_JOIN_COLUMNS)], [select(*_VIEW_COLUMNS)]),
+    ]
+
+
+async def _time(session, statements: list, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for statement in statements:
+            (await session.execute(statement)).all()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("counts", nargs="*", type=int, default=[4000, 40000, 400000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    await init_db()
+    async with AsyncSessionLocal() as session:
+        await _cleanup(session)
+        for count in args.counts:
+            started = time.perf_counter()
+            await _seed(session, count)
+            total = (await session.execute(select(func.count()).select_from(deal_search))).scalar()
+            print(
+                f"\n{count:,} benchmark deals ({total:,} in deal_search), "
+                f"seeded and refreshed in {time.perf_counter() - started:.1f}s"
+            )
+            started = time.perf_counter()
+            await refresh_deal_search(session)
+            print(f"refresh concurrently: {(time.perf_counter() - started) * 1000:.0f} ms")
+            print(f"{'query':<30}{'join ms':>10}{'view ms':>10}{'speedup':>9}")
+            for label, join_statements, view_statements in _scenarios():
+                join_ms = await _time(session, join_statements, args.repeat)
+                view_ms = await _time(session, view_statements, args.repeat)
+                print(f"{label:<30}{join_ms:>10.1f}{view_ms:>10.1f}{join_ms / view_ms:>8.1f}x")
+            await _cleanup(session)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
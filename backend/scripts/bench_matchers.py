@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark the scraper's text matchers (merchant sanitization, city,
+category and card guessing) against the per-keyword regex versions they
+replaced. Checks both give identical results, then prints microseconds per
+Peekaboo entity.
+
+The corpus is synthetic Peekaboo entities (name, keywords, description) unless
+a JSON file with a list of entity dicts, e.g. saved SDK responses, is given.
+
+From backend dir:
+  python scripts/bench_matchers.py                  # 20000 synthetic entities
+  python scripts/bench_matchers.py 50000
+  python scripts/bench_matchers.py entities.json
+"""
+import json
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+backend_root = Path(__file__).resolve().parent.parent
+if str(backend_root) not in sys.path:
+    sys.path.insert(0, str(backend_root))
+os.chdir(backend_root)
+
+from app.services import scraper
+from app.services.normalizer import normalize_category, normalize_city
+from app.utils.text import clean_text
+
+BANKS = [source.name for source in scraper.SOURCES]
+BRANDS = [
+    "Cafe Aylanto", "Kababjees", "Hardee's", "Gloria Jean's Coffees", "Outfitters",
+    "Khaadi", "J.", "Sapphire", "Imtiaz Super Market", "Chase Up", "Pizza Hut",
+    "Howdy", "Ginsoy", "Bundu Khan", "Espresso", "Dr. Skin Clinic", "Shaheen Chemist",
+    "Mobile Zone", "Pearl Continental Hotel", "Gourmet Bakers", "Nishat Linen",
+    "Tehzeeb Bakers", "Monal", "Salt'n Pepper", "Butlers Chocolate Cafe",
+]
+AREAS = ["Gulberg", "DHA Phase 6", "F-7 Markaz", "Clifton", "Bahria Town", "Saddar", "Blue Area"]
+KEYWORDS = [
+    "restaurant, dining", "cafe, coffee", "fashion, apparel", "clothing, kids",
+    "supermarket, grocery", "electronics, gadgets", "pharmacy, health", "hotel, travel",
+    "bakery, desserts", "salon, spa", "",
+]
+DESCRIPTIONS = [
+    "Enjoy up to {pct}% off with {bank} Platinum Credit Card",
+    "{pct}% discount for {bank} Gold debit cardholders in {city}",
+    "Valid on dine-in and takeaway. Terms and conditions apply.",
+    "Exclusive offer for Visa Signature cards, {city} outlets only",
+    "Flat {pct}% off on total bill with {bank} Classic cards",
+    "",
+]
+
+
+def synthetic_entities(count: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    entities = []
+    for _ in range(count):
+        bank = rng.choice(BANKS)
+        city = rng.choice(scraper.KNOWN_CITIES)
+        pct = rng.choice([5, 10, 15, 20, 25, 30, 40, 50])
+        name = rng.choice(BRANDS)
+        roll = rng.random()
+        if roll < 0.3:
+            name = f"{name} - {rng.choice(AREAS)}"
+        elif roll < 0.5:
+            name = f"{name} {city}"
+        elif roll < 0.6:
+            name = f"{name} {pct}% off with {bank} card"
+        entities.append(
+            {
+                "name": name,
+                "keywords": rng.choice(KEYWORDS),
+                "description": rng.choice(DESCRIPTIONS).format(pct=pct, bank=bank, city=city),
+                "maxDiscount": pct,
+                "_bank": bank,
+            }
+        )
+    return entities
+
+
+# Versions before the precompiled matchers, kept verbatim as the baseline.
+def legacy_guess_city(text: str) -> str:
+    for city in scraper.KNOWN_CITIES:
+        if re.search(rf"\b{re.escape(city)}\b", text, re.IGNORECASE):
+            return normalize_city(city)
+    return "Karachi"
+
+
+def legacy_guess_category(text: str) -> str:
+    lowered = text.lower()
+    if any(word in lowered for word in ["restaurant", "dining", "cafe", "food"]):
+        return normalize_category("Food")
+    if any(word in lowered for word in ["travel", "flight", "hotel"]):
+        return normalize_category("Travel")
+    if any(word in lowered for word in ["fashion", "clothing", "apparel"]):
+        return normalize_category("Fashion")
+    if any(word in lowered for word in ["grocery", "mart", "supermarket"]):
+        return normalize_category("Grocery")
+    if any(word in lowered for word in ["electronics", "gadgets"]):
+        return normalize_category("Electronics")
+    if any(word in lowered for word in ["health", "medical", "pharmacy"]):
+        return normalize_category("Medical")
+    return normalize_category("Retail")
+
+
+def legacy_parse_card_type(text: str) -> tuple[str, str]:
+    lowered = text.lower()
+    if "credit" in lowered:
+        card_type = "Credit"
+    elif "debit" in lowered:
+        card_type = "Debit"
+    else:
+        card_type = "Card"
+    tier = "Basic"
+    for key, value in scraper.CARD_TIER_MAP.items():
+        if key in lowered:
+            tier = value
+            break
+    return card_type, tier
+
+
+def legacy_sanitize_merchant_name(name: str, bank_name: str) -> str:
+    cleaned = clean_text(name)
+    if not cleaned:
+        return ""
+    cleaned = scraper.MERCHANT_STOP_WORDS.split(cleaned)[0]
+    cleaned = scraper.MERCHANT_NOISE_WORDS.sub("", cleaned)
+    cleaned = re.sub(r"\b(card|cards|credit|debit|visa|mastercard|amex)\b", "", cleaned, flags=re.IGNORECASE)
+    cleaned = re.sub(r"\b\d+(\.\d+)?\b", "", cleaned)
+    cleaned = re.sub(r"\s{2,}", " ", cleaned).strip(" -|,.;")
+
+    bank_tokens = [t for t in re.split(r"\W+", bank_name.lower()) if t]
+    for token in bank_tokens:
+        cleaned = re.sub(rf"\b{re.escape(token)}\b", "", cleaned, flags=re.IGNORECASE)
+    for city in scraper.KNOWN_CITIES:
+        cleaned = re.sub(rf"\b{re.escape(city)}\b", "", cleaned, flags=re.IGNORECASE)
+
+    cleaned = re.sub(r"\s{2,}", " ", cleaned).strip(" -|,.;")
+    return cleaned
+
+
+def _meta(entity: dict) -> str:
+    return f"{entity.get('keywords', '')} {entity.get('description', '')} {entity.get('name', '')}"
+
+
+def legacy(entities: list[dict]) -> list[tuple]:
+    return [
+        (
+            legacy_sanitize_merchant_name(e["name"], e["_bank"]),
+            legacy_guess_city(_meta(e)),
+            legacy_guess_category(_meta(e)),
+            legacy_parse_card_type(_meta(e)),
+        )
+        for e in entities
+    ]
+
+
+def current(entities: list[dict]) -> list[tuple]:
+    return [
+        (
+            scraper._sanitize_merchant_name(e["name"], e["_bank"]),
+            scraper._guess_city(_meta(e)),
+            scraper._guess_category(_meta(e)),
+            scraper._parse_card_type(_meta(e)),
+        )
+        for e in entities
+    ]
+
+
+def current_batched(entities: list[dict]) -> list[tuple]:
+    by_bank: dict[str, list[int]] = {}
+    for idx, entity in enumerate(entities):
+        by_bank.setdefault(entity["_bank"], []).append(idx)
+    names = [""] * len(entities)
+    for bank, indexes in by_bank.items():
+        batch = scraper._sanitize_merchant_names([entities[i]["name"] for i in indexes], bank)
+        for idx, name in zip(indexes, batch):
+            names[idx] = name
+    return [
+        (
+            name,
+            scraper._guess_city(_meta(e)),
+            scraper._guess_category(_meta(e)),
+            scraper._parse_card_type(_meta(e)),
+        )
+        for name, e in zip(names, entities)
+    ]
+
+
+def _time(fn, entities: list[dict], repeat: int = 3) -> tuple[float, list[tuple]]:
+    best = float("inf")
+    result: list[tuple] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(entities)
+        best = min(best, time.perf_counter() - started)
+    return best * 1e6 / len(entities), result
+
+
+def main(arg: str | None) -> None:
+    if arg and not arg.isdigit():
+        entities = [e for e in json.loads(Path(arg).read_text()) if isinstance(e, dict)]
+        for idx, entity in enumerate(entities):
+            entity.setdefault("_bank", BANKS[idx % len(BANKS)])
+            entity["name"] = str(entity.get("name") or "")
+    else:
+        entities = synthetic_entities(int(arg) if arg else 20000)
+
+    baseline_us, expected = _time(legacy, entities)
+    print(f"{len(entities)} entities")
+    print(f"{'legacy per-keyword regexes':<30}{baseline_us:>8.1f} us/entity")
+    for label, fn in [("precompiled", current), ("precompiled, batched names", current_batched)]:
+        per_entity, result = _time(fn, entities)
+        mismatches = sum(1 for a, b in zip(expected, result) if a != b)
+        print(
+            f"{label:<30}{per_entity:>8.1f} us/entity  "
+            f"({baseline_us / per_entity:.1f}x, {mismatches} mismatches)"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark sync_deals: round trips and wall time per bank.
+Uses a throwaway bank ("Sync Benchmark Bank") and removes its rows afterwards.
+
+From backend dir (DATABASE_URL from .env or env):
+  python scripts/bench_sync.py            # 4000 deals
+  python scripts/bench_sync.py 20000
+"""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+backend_root = Path(__file__).resolve().parent.parent
+if str(backend_root) not in sys.path:
+    sys.path.insert(0, str(backend_root))
+os.chdir(backend_root)
+
+from sqlalchemy import delete, event, select
+
+from app.db.init_db import init_db
+from app.db.models import Bank, Card, Discount, Merchant
+from app.db.session import AsyncSessionLocal, engine
+from app.services.scraper import BankSource, KNOWN_CITIES, ScrapedDeal, sync_deals
+
+BANK = BankSource(name="Sync Benchmark Bank", website="https://example.com", base_url="example.com")
+TIERS = ["Basic", "Gold", "Platinum"]
+
+
+def _deals(count: int, shift: int = 0) -> list[ScrapedDeal]:
+    deals = []
+    for i in range(count):
+        tier = TIERS[i % len(TIERS)]
+        deals.append(
+            ScrapedDeal(
+                merchant_name=f"Bench Merchant {i}",
+                city=KNOWN_CITIES[i % len(KNOWN_CITIES)],
+                category="Food",
+                merchant_image_url=None,
+                discount_percent=float(10 + (i + shift) % 40),
+                card_name=f"{BANK.name} {tier} Credit Card",
+                card_tier=tier,
+                card_type="Credit",
+                conditions=f"Up to {10 + (i + shift) % 40}% off",
+                valid_from=None,
+                valid_to=None,
+            )
+        )
+    return deals
+
+
+async def _cleanup(session) -> None:
+    bank_id = (await session.execute(select(Bank.id).where(Bank.name == BANK.name))).scalar()
+    if bank_id:
+        card_ids = select(Card.id).where(Card.bank_id == bank_id)
+        await session.execute(delete(Discount).where(Discount.card_id.in_(card_ids)))
+        await session.execute(delete(Card).where(Card.bank_id == bank_id))
+        await session.execute(delete(Bank).where(Bank.id == bank_id))
+    await session.execute(delete(Merchant).where(Merchant.name.like("Bench Merchant %")))
+    await session.commit()
+
+
+async def main(count: int) -> None:
+    await init_db()
+    statements = {"n": 0}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(*_args):
+        statements["n"] += 1
+
+    scenarios = [
+        ("initial load", _deals(count)),
+        ("unchanged", _deals(count)),
+        ("10% changed, 10% gone", _deals(count, shift=0)[: int(count * 0.9)]),
+    ]
+    # Change every 9th surviving deal's percent.
+    for idx, deal in enumerate(scenarios[2][1]):
+        if idx % 9 == 0:
+            deal.discount_percent += 1
+
+    async with AsyncSessionLocal() as session:
+        await _cleanup(session)
+        print(f"{'scenario':<24}{'round trips':>12}{'seconds':>10}  (inserted, expired, updated)")
+        for label, deals in scenarios:
+            statements["n"] = 0
+            started = time.perf_counter()
+            result = await sync_deals(session, BANK, deals)
+            elapsed = time.perf_counter() - started
+            print(f"{label:<24}{statements['n']:>12}{elapsed:>10.2f}  {result}")
+        await _cleanup(session)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 4000))
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Check that the hot read and expiry queries can use their indexes (app/db/migrations.py).
+Runs EXPLAIN (no ANALYZE, nothing is executed) for each query with sequential
+scans disabled, so small tables still show whether an index is usable, and
+prints each plan's indexes. Exits 1 if an expected index is missing from a plan.
+
+From backend dir (DATABASE_URL from .env or env):
+  python scripts/explain_queries.py
+  python scripts/explain_queries.py --verbose    # also print the plans
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+backend_root = Path(__file__).resolve().parent.parent
+if str(backend_root) not in sys.path:
+    sys.path.insert(0, str(backend_root))
+os.chdir(backend_root)
+
+from sqlalchemy import delete, func, select, text
+
+from app.db.deal_search import deal_search
+from app.db.explain import explain_plan
+from app.db.init_db import init_db
+from app.db.models import Card, Discount
+from app.db.session import engine
+from app.routers.discounts import filtered_discounts_query
+
+
+def _queries() -> list[tuple[str, object, str, bool]]:
+    """(label, statement, index expected in its plan, needs pg_trgm)."""
+    soon = date.today() + timedelta(days=7)
+    ds = deal_search.c
+    return [
+        (
+            "discounts?bank=",
+            filtered_discounts_query(bank="HBL")[0],
+            "ix_deal_search_lower_bank",
+            False,
+        ),
+        (
+            "discounts?category=",
+            filtered_discounts_query(category="Food")[0],
+            "ix_deal_search_lower_category",
+            False,
+        ),
+        (
+            "discounts?city=",
+            filtered_discounts_query(city="Karachi")[0],
+            "ix_deal_search_city_trgm",
+            True,
+        ),
+        (
+            "discounts?intent=",
+            filtered_discounts_query(intent="buffet")[0],
+            "ix_deal_search_search_vector",
+            False,
+        ),
+        (
+            "discounts?card=",
+            filtered_discounts_query(card="HBL Gold Credit Card")[0],
+            "ix_deal_search_card_name",
+            False,
+        ),
+        (
+            "assistant candidates (city)",
+            select(deal_search).where(func.lower(ds.city) == "karachi"),
+            "ix_deal_search_lower_city",
+            False,
+        ),
+        (
+            "discounts by card",
+            select(Discount.id).where(Discount.card_id == 1),
+            "ix_discounts_card_id",
+            False,
+        ),
+        (
+            "cards by bank (sync)",
+            select(Card.id).where(Card.bank_id == 1),
+            "ix_cards_bank_id",
+            False,
+        ),
+        (
+            "expire_old_discounts",
+            delete(Discount).where(Discount.valid_to.is_not(None), Discount.valid_to < date.today()),
+            "ix_discounts_valid_to",
+            False,
+        ),
+        (
+            "analytics expiring_soon",
+            select(func.count()).where(ds.valid_to.is_not(None), ds.valid_to <= soon),
+            "ix_deal_search_valid_to",
+            False,
+        ),
+    ]
+
+
+def _index_names(plan: dict) -> set[str]:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= _index_names(child)
+    return names
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--verbose", action="store_true", help="print each plan")
+    args = parser.parse_args()
+
+    await init_db()
+    failures = 0
+    async with engine.connect() as conn:
+        has_trgm = (
+            await conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+        ).scalar() is not None
+        await conn.execute(text("SET LOCAL enable_seqscan = off"))
+        for label, stmt, expected, needs_trgm in _queries():
+            plan = await explain_plan(conn, stmt)
+            indexes = _index_names(plan)
+            if needs_trgm and not has_trgm:
+                status = "skip (pg_trgm not installed)"
+            elif expected in indexes:
+                status = "ok"
+            else:
+                status = "MISSING " + expected
+                failures += 1
+            print(f"{label:32} {status:32} {', '.join(sorted(indexes)) or '-'}")
+            if args.verbose:
+                print(json.dumps(plan, indent=2))
+        await conn.rollback()
+    await engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
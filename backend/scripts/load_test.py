@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Load-test run_full_scrape and run_assistant against the local stand-in server
+(python -m standin) instead of Peekaboo, SERP API and Groq.
+
+Starts the stand-in on --port, scrapes synthetic banks sized to --scale times
+today's ~4,000 deals, then times run_assistant. Writes to DATABASE_URL, so use
+a scratch database; --cleanup removes the synthetic banks, cards and deals.
+
+From backend dir:
+  python scripts/load_test.py                      # 10x
+  python scripts/load_test.py --scale 100 --latency-ms 80 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+backend_root = Path(__file__).resolve().parent.parent
+if str(backend_root) not in sys.path:
+    sys.path.insert(0, str(backend_root))
+os.chdir(backend_root)
+
+from standin import backend_env
+
+BASELINE_DEALS = 4000
+CITIES = 20  # scraper.KNOWN_CITIES
+MAX_ENTITIES_PER_CITY = 1500  # PEEKABOO_MAX_PAGES * PEEKABOO_PAGE_LIMIT
+QUERIES = [
+    "best food deals in Lahore",
+    "fashion discounts Karachi",
+    "grocery offers Islamabad",
+    "which card is best for dining",
+    "pharmacy discount Rawalpindi",
+]
+
+
+def _start_standin(args, entities_per_city: int) -> subprocess.Popen:
+    command = [
+        sys.executable,
+        "-m",
+        "standin",
+        "--port",
+        str(args.port),
+        "--entities-per-city",
+        str(entities_per_city),
+        "--latency-ms",
+        str(args.latency_ms),
+        "--error-rate",
+        str(args.error_rate),
+        "--groq-latency-ms",
+        str(args.groq_latency_ms),
+    ]
+    server = subprocess.Popen(command, cwd=backend_root)
+    for _ in range(100):
+        if server.poll() is not None:
+            sys.exit(f"stand-in server exited (is port {args.port} in use?)")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{args.port}/stats", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    sys.exit("stand-in server did not start")
+
+
+async def main(args) -> None:
+    banks = args.peekaboo_banks + args.html_banks
+    entities_per_city = min(
+        math.ceil(BASELINE_DEALS * args.scale / (args.peekaboo_banks * CITIES)),
+        MAX_ENTITIES_PER_CITY,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    os.environ.update(backend_env(base_url))
+    os.environ.setdefault("FETCH_CACHE_PATH", str(Path(tempfile.mkdtemp()) / "fetch_cache.sqlite3"))
+    os.environ.setdefault("GROQ_CACHE_ENABLED", "false")
+
+    from sqlalchemy import delete, func, select
+
+    from app.db.deal_search import refresh_deal_search
+    from app.db.init_db import init_db
+    from app.db.models import Bank, Card, Discount
+    from app.db.session import AsyncSessionLocal, engine
+    from app.services.ai_assistant import run_assistant
+    from app.services.http_client import close_http_clients, http_metrics
+    from app.services.rate_limit import set_pacing
+    from app.services.scraper import BankSource, run_full_scrape
+
+    if not args.paced:
+        set_pacing(False)
+    sources = [
+        BankSource(
+            name=f"Standin Bank {index}",
+            website=f"{base_url}/banks/bank-{index}/home",
+            base_url=f"127.0.0.1:{args.port}/banks/bank-{index}",
+            peekaboo_base=f"bank-{index}.peekaboo.local" if index < args.peekaboo_banks else None,
+        )
+        for index in range(banks)
+    ]
+    names = [source.name for source in sources]
+    server = _start_standin(args, entities_per_city)
+    try:
+        await init_db()
+        async with AsyncSessionLocal() as session:
+            started = time.perf_counter()
+            inserted = await run_full_scrape(session, resume=False, sources=sources)
+            scrape_seconds = time.perf_counter() - started
+            deals = (
+                await session.execute(
+                    select(func.count(Discount.id))
+                    .join(Card, Discount.card_id == Card.id)
+                    .join(Bank, Card.bank_id == Bank.id)
+                    .where(Bank.name.in_(names))
+                )
+            ).scalar_one()
+            print(
+                f"scrape: {banks} banks, target {int(BASELINE_DEALS * args.scale):,} deals "
+                f"({entities_per_city} per Peekaboo bank and city), {deals:,} in DB, "
+                f"+{inserted:,} new, {scrape_seconds:.1f}s, "
+                f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB"
+            )
+
+            latencies = []
+            for index in range(args.queries):
+                started = time.perf_counter()
+                await run_assistant(session, QUERIES[index % len(QUERIES)], use_rag=False)
+                latencies.append((time.perf_counter() - started) * 1000)
+            if latencies:
+                latencies.sort()
+                p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+                print(
+                    f"run_assistant: {len(latencies)} queries, p50 "
+                    f"{statistics.median(latencies):.0f} ms, p95 {p95:.0f} ms, "
+                    f"max {latencies[-1]:.0f} ms"
+                )
+
+            if args.cleanup:
+                bank_ids = select(Bank.id).where(Bank.name.in_(names))
+                card_ids = select(Card.id).where(Card.bank_id.in_(bank_ids))
+                await session.execute(delete(Discount).where(Discount.card_id.in_(card_ids)))
+                await session.execute(delete(Card).where(Card.bank_id.in_(bank_ids)))
+                await session.execute(delete(Bank).where(Bank.name.in_(names)))
+                await session.commit()
+                await refresh_deal_search(session)
+        print(f"http: {http_metrics()}")
+        with urllib.request.urlopen(f"{base_url}/stats", timeout=5) as response:
+            print(f"stand-in requests: {json.load(response)}")
+    finally:
+        await close_http_clients()
+        await engine.dispose()
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=float, default=10, help="multiple of ~4,000 deals")
+    parser.add_argument("--peekaboo-banks", type=int, default=12)
+    parser.add_argument("--html-banks", type=int, default=2, help="banks scraped via SERP + pages")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=30)
+    parser.add_argument("--groq-latency-ms", type=float, default=400)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--queries", type=int, default=50, help="run_assistant calls to time")
+    parser.add_argument("--paced", action="store_true", help="keep PEEKABOO_REQUESTS_PER_SECOND")
+    parser.add_argument("--cleanup", action="store_true")
+    asyncio.run(main(parser.parse_args()))
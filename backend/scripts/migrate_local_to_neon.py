@@ -39,6 +39,8 @@ async def migrate():
     from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
     from sqlalchemy.orm import sessionmaker
 
+    from app.db.deal_search import refresh_deal_search
+
     source_url = _fix_url(os.environ.get("SOURCE_DATABASE_URL", ""))
     target_url = _fix_url(os.environ.get("TARGET_DATABASE_URL", os.environ.get("DATABASE_URL", "")))
 
@@ -168,6 +170,11 @@ async def migrate():
                 print(f"  ... {processed} processed, {inserted} inserted")
         await tgt.commit()
         print(f"Discounts: {inserted} inserted, {skipped_fk} skipped (missing merchant/card in target)")
+        # The API reads deals through deal_search (created by the app's init_db);
+        # the generation bump makes its workers drop their cached responses.
+        if inserted and (await tgt.execute(text("SELECT to_regclass('deal_search')"))).scalar():
+            generation = await refresh_deal_search(tgt)
+            print(f"deal_search refreshed (generation {generation})")
 
     await src_engine.dispose()
     await tgt_engine.dispose()
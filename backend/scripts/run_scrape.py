@@ -2,6 +2,7 @@
 """
 Run scraper + RAG rebuild. Use from PythonAnywhere cron or manually.
 From backend dir: python scripts/run_scrape.py  or  python -m scripts.run_scrape
+Queues a scrape job and runs it here, unless a worker is already scraping.
 """
 import asyncio
 import os
@@ -14,21 +15,24 @@ if str(backend_root) not in sys.path:
     sys.path.insert(0, str(backend_root))
 os.chdir(backend_root)
 
+from app.db.init_db import init_db
 from app.db.session import AsyncSessionLocal
-from app.services.rag import RAGService
-from app.services.scraper import run_full_scrape
-from app.tasks.scheduler import expire_old_discounts
+from app.services.http_client import close_http_clients
+from app.services.scrape_jobs import enqueue_job, run_next_job
 
 
 async def main():
+    await init_db()  # creates the scrape checkpoint and job tables on first run
     async with AsyncSessionLocal() as session:
-        inserted = await run_full_scrape(session)
-        expired = await expire_old_discounts(session)
-        try:
-            await RAGService().rebuild_index(session)
-        except Exception as e:
-            print(f"RAG rebuild skipped: {e}")
-        print(f"Scrape done: inserted {inserted}, expired {expired}")
+        job, _ = await enqueue_job(session, "cli")
+    finished = await run_next_job()
+    await close_http_clients()
+    if finished is None:
+        print(f"Scrape job {job.id} is queued; another worker holds the scrape lock")
+        return
+    print(f"Scrape job {finished.id} {finished.status}: inserted {finished.inserted or 0}")
+    if finished.error:
+        print(f"Error: {finished.error}")
 
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@
 Run scraper only (no RAG). Use when running locally to populate Neon.
 Avoids sentence_transformers/numpy deps. RAG rebuild can run on backend.
 From backend dir: python scripts/run_scrape_deals_only.py
+Takes the scrape lock, so it never runs next to a worker's scrape job.
 """
 import asyncio
 import sys
@@ -21,9 +22,12 @@ from datetime import date
 
 from sqlalchemy import delete
 
+from app.db.deal_search import refresh_deal_search
 from app.db.init_db import init_db
 from app.db.models import Discount
 from app.db.session import AsyncSessionLocal
+from app.services.http_client import close_http_clients
+from app.services.scrape_jobs import scrape_lock
 from app.services.scraper import run_full_scrape
 
 
@@ -33,15 +37,22 @@ async def expire_old(session):
     )
     r = await session.execute(stmt)
     await session.commit()
+    if r.rowcount:
+        await refresh_deal_search(session)
     return r.rowcount or 0
 
 
 async def main():
     await init_db()
-    async with AsyncSessionLocal() as session:
-        inserted = await run_full_scrape(session)
-        expired = await expire_old(session)
-        print(f"Scrape done: inserted {inserted}, expired {expired}")
+    async with scrape_lock() as held:
+        if not held:
+            print("Not scraping: another worker holds the scrape lock")
+            return
+        async with AsyncSessionLocal() as session:
+            inserted = await run_full_scrape(session)
+            expired = await expire_old(session)
+            print(f"Scrape done: inserted {inserted}, expired {expired}")
+    await close_http_clients()
 
 
 if __name__ == "__main__":
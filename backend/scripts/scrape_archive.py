@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Record a full scrape's raw responses to an archive, or replay one offline.
+Replay runs extraction + sync_deals for every bank from the archive with no
+network, so it doubles as a reproducible end-to-end scrape benchmark. Point
+DATABASE_URL at a scratch database when replaying old archives.
+
+From backend dir:
+  python scripts/scrape_archive.py record data/scrape_archive.zip
+  python scripts/scrape_archive.py replay data/scrape_archive.zip
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+backend_root = Path(__file__).resolve().parent.parent
+if str(backend_root) not in sys.path:
+    sys.path.insert(0, str(backend_root))
+os.chdir(backend_root)
+
+from app.db.init_db import init_db
+from app.db.session import AsyncSessionLocal, engine
+from app.services.http_client import close_http_clients
+from app.services.scrape_archive import start_archive, stop_archive
+from app.services.scraper import run_full_scrape
+
+
+async def main(mode: str, path: str) -> None:
+    await init_db()
+    archive = start_archive(path, mode)
+    started = time.perf_counter()
+    try:
+        async with AsyncSessionLocal() as session:
+            inserted = await run_full_scrape(session, resume=False)
+    finally:
+        await close_http_clients()
+        stop_archive()
+    elapsed = time.perf_counter() - started
+    print(f"{mode}: {elapsed:.1f}s, inserted {inserted}, archive {archive.stats()}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ("record", "replay"):
+        sys.exit(__doc__)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(sys.argv[1], sys.argv[2]))
@@ -0,0 +1,10 @@
+"""Local stand-ins for the upstream APIs the backend calls (Peekaboo SDK, SERP API,
+Groq), for load tests and latency measurements without outside services.
+
+Run from backend dir:  python -m standin --port 8900 --entities-per-city 50
+and point the backend at it (see standin.server.backend_env).
+"""
+
+from standin.server import StandinConfig, backend_env, create_app
+
+__all__ = ["StandinConfig", "backend_env", "create_app"]
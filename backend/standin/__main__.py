@@ -0,0 +1,26 @@
+import argparse
+from dataclasses import fields
+
+import uvicorn
+
+from standin.server import StandinConfig, create_app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stand-in Peekaboo / SERP API / Groq server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    defaults = StandinConfig()
+    for field in fields(StandinConfig):
+        parser.add_argument(
+            f"--{field.name.replace('_', '-')}",
+            type=type(getattr(defaults, field.name)),
+            default=getattr(defaults, field.name),
+        )
+    args = vars(parser.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+    uvicorn.run(create_app(StandinConfig(**args)), host=host, port=port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""FastAPI app mimicking the Peekaboo SDK, SERP API and Groq chat completions.
+
+Peekaboo
+  GET  /peekaboo/{base}/                  landing page with two <script src> bundles
+  GET  /peekaboo/{base}/static/{name}.js  vendor padding, then the window.__pkbg__ config
+  POST /peekaboo-sdk/uljin2s3nitoi89njkhklgkj5
+                                          entity pages for (ownerkey, city, offset, limit)
+SERP API
+  GET  /serp/search.json                  organic_results pointing at /banks/{slug}/... pages
+  GET  /banks/{slug}/{page}               HTML deal listings for the non-Peekaboo path
+Groq
+  POST /groq/openai/v1/chat/completions   answers the deal-normalization batch prompt,
+                                          canned text otherwise
+
+Entities are generated deterministically from (base, city, index), so repeated
+scrapes see the same catalog. Latency, error rate, entity counts and bundle size
+come from StandinConfig.
+"""
+
+import asyncio
+import json
+import random
+import re
+import string
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response
+
+ENTITY_PATH = "uljin2s3nitoi89njkhklgkj5"
+BRANDS = ["Cafe", "Kabab House", "Bakers", "Outfitters", "Mart", "Pharmacy", "Grill", "Boutique"]
+KEYWORDS = {
+    "Cafe": "cafe, coffee",
+    "Kabab House": "restaurant, dining",
+    "Bakers": "bakery, food",
+    "Outfitters": "fashion, apparel",
+    "Mart": "supermarket, grocery",
+    "Pharmacy": "pharmacy, health",
+    "Grill": "restaurant, dining",
+    "Boutique": "clothing, fashion",
+}
+TIERS = ["Gold Credit", "Platinum Credit", "Classic Debit", "Signature Credit"]
+
+
+@dataclass
+class StandinConfig:
+    entities_per_city: int = 15  # Peekaboo entities per (bank, city)
+    latency_ms: float = 30.0  # mean added latency per request
+    latency_jitter: float = 0.5  # +/- fraction of latency_ms
+    error_rate: float = 0.0  # share of requests answered with HTTP 503
+    bundle_kb: int = 256  # size of the padding script bundle
+    serp_results: int = 5  # organic results per SERP query
+    deals_per_page: int = 20  # deal lines on each /banks/... HTML page
+    groq_latency_ms: float = 400.0  # mean latency for chat completions
+
+
+def backend_env(base_url: str) -> dict[str, str]:
+    """Environment variables that point the backend at a stand-in on base_url."""
+    base_url = base_url.rstrip("/")
+    return {
+        "PEEKABOO_LANDING_URL": f"{base_url}/peekaboo",
+        "SERP_BASE_URL": f"{base_url}/serp",
+        "GROQ_BASE_URL": f"{base_url}/groq/openai/v1",
+    }
+
+
+def _letters(number: int, width: int = 3) -> str:
+    """Alphabetic code for a number; the scraper strips digits from merchant names."""
+    chars = []
+    for _ in range(width):
+        number, rest = divmod(number, 26)
+        chars.append(string.ascii_lowercase[rest])
+    return "".join(reversed(chars)).capitalize()
+
+
+def _entity(base: str, city: str, index: int) -> dict:
+    rng = random.Random(f"{base}|{city}|{index}")
+    brand = BRANDS[index % len(BRANDS)]
+    tier = rng.choice(TIERS)
+    discount = rng.choice([5, 10, 15, 20, 25, 30, 40, 50])
+    return {
+        "name": f"{_letters(random.Random(city).randrange(26**3))} {_letters(index, 4)} {brand}",
+        "maxDiscount": discount,
+        "discountFlag": "Up to",
+        "keywords": KEYWORDS[brand],
+        "description": f"Enjoy {discount}% off with {tier} cards",
+        "logo": f"https://img.example/{index}.png",
+    }
+
+
+def _deal_lines(slug: str, page: str, count: int) -> list[str]:
+    rng = random.Random(f"{slug}|{page}")
+    lines = []
+    for index in range(count):
+        brand = BRANDS[index % len(BRANDS)]
+        discount = rng.choice([10, 15, 20, 25, 30])
+        lines.append(
+            f"{_letters(rng.randrange(26**4), 4)} {brand} - {discount}% off with "
+            f"{rng.choice(TIERS)} Card"
+        )
+    return lines
+
+
+def _normalization_answer(prompt: str) -> dict:
+    match = re.search(r"Input: (\[.*\])", prompt, re.DOTALL)
+    items = json.loads(match.group(1)) if match else []
+    results = []
+    for item in items:
+        words = re.findall(r"[A-Za-z]{3,}", str(item.get("text", "")))
+        results.append(
+            {
+                "id": item.get("id"),
+                "merchant_name": " ".join(words[:2]).title(),
+                "category": "Food",
+                "city": "",
+                "conditions": str(item.get("text", ""))[:120],
+            }
+        )
+    return {"results": results}
+
+
+def create_app(config: StandinConfig | None = None) -> FastAPI:
+    config = config or StandinConfig()
+    app = FastAPI(title="Upstream stand-ins")
+    app.state.config = config
+    app.state.requests = {"peekaboo": 0, "serp": 0, "groq": 0, "pages": 0, "errors": 0}
+    padding = "/* vendor */\n" + "var pad='" + "x" * (config.bundle_kb * 1024) + "';\n"
+
+    async def delay(mean_ms: float) -> None:
+        if mean_ms > 0:
+            spread = config.latency_jitter
+            await asyncio.sleep(mean_ms / 1000 * random.uniform(1 - spread, 1 + spread))
+
+    def failed(kind: str) -> bool:
+        app.state.requests[kind] += 1
+        if config.error_rate > 0 and random.random() < config.error_rate:
+            app.state.requests["errors"] += 1
+            return True
+        return False
+
+    @app.get("/peekaboo/{base}/")
+    async def peekaboo_landing(base: str):
+        await delay(config.latency_ms)
+        return HTMLResponse(
+            "<html><head>"
+            f'<script src="/peekaboo/{base}/static/vendor.js"></script>'
+            f'<script src="/peekaboo/{base}/static/sdk.js"></script>'
+            "</head><body></body></html>"
+        )
+
+    @app.get("/peekaboo/{base}/static/{name}.js")
+    async def peekaboo_bundle(base: str, name: str, request: Request):
+        await delay(config.latency_ms)
+        if name != "sdk":
+            return PlainTextResponse(padding, media_type="application/javascript")
+        sdk_config = {
+            "OWNER_KEY": f"key-{base}",
+            "DOMAIN": f"{str(request.base_url).rstrip('/')}/peekaboo-sdk/",
+            "VERSION": "1.0.0",
+            "LIMIT": 12,
+            "BASE_COUNTRY": "Pakistan",
+        }
+        return PlainTextResponse(
+            f"window.__pkbg__ = {json.dumps(sdk_config)}", media_type="application/javascript"
+        )
+
+    @app.post(f"/peekaboo-sdk/{ENTITY_PATH}")
+    async def peekaboo_entities(request: Request):
+        await delay(config.latency_ms)
+        if failed("peekaboo"):
+            return Response(status_code=503)
+        owner_key = request.headers.get("ownerkey", "")
+        if not owner_key.startswith("key-"):
+            return Response(status_code=403)
+        payload = await request.json()
+        base = owner_key[len("key-") :]
+        city = str(payload.get("fksyd", ""))
+        offset = int(payload.get("opmsta", 0))
+        limit = int(payload.get("mnakls", 12))
+        end = min(offset + limit, config.entities_per_city)
+        return JSONResponse([_entity(base, city, index) for index in range(offset, end)])
+
+    @app.get("/serp/search.json")
+    async def serp_search(request: Request, q: str = "", num: int = 10):
+        await delay(config.latency_ms)
+        if failed("serp"):
+            return Response(status_code=503)
+        site = re.search(r"site:(\S+)", q)
+        base = str(request.base_url).rstrip("/")
+        results = []
+        for index in range(min(num, config.serp_results)):
+            if site:
+                link = f"http://{site.group(1)}/offers-{index}"
+            else:
+                link = f"{base}/banks/search/offers-{index}"
+            results.append({"title": f"Offer {index}", "link": link, "snippet": q})
+        return {"organic_results": results}
+
+    @app.get("/banks/{slug}/{page}")
+    async def bank_page(slug: str, page: str):
+        await delay(config.latency_ms)
+        if failed("pages"):
+            return Response(status_code=503)
+        lines = "".join(f"<p>{line}</p>" for line in _deal_lines(slug, page, config.deals_per_page))
+        return HTMLResponse(f"<html><body><h1>{slug} offers</h1>{lines}</body></html>")
+
+    @app.post("/groq/openai/v1/chat/completions")
+    async def groq_chat(request: Request):
+        await delay(config.groq_latency_ms)
+        if failed("groq"):
+            return Response(status_code=503)
+        payload = await request.json()
+        prompt = str(payload.get("messages", [{}])[-1].get("content", ""))
+        if "Input: [" in prompt:
+            content = json.dumps(_normalization_answer(prompt))
+        else:
+            content = "Stand-in answer."
+        return {
+            "id": "standin",
+            "object": "chat.completion",
+            "model": payload.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.requests
+
+    return app